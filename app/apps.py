@@ -1,11 +1,33 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
 
 
 class AppConfig(AppConfig):
     name = 'app'
 
     def ready(self):
+        from app.extraction import queue_document_text, reset_document_text
+        from app.facets import invalidate_facets
+        from app.keywords import invalidate_keywords
+        from app.reference_data import invalidate_reference_data
         from app.signals import set_keywords
+        from app.stats import invalidate_stats
+        post_save.connect(invalidate_keywords, sender='app.Keyword', dispatch_uid="keyword_matcher_save")
+        post_delete.connect(invalidate_keywords, sender='app.Keyword', dispatch_uid="keyword_matcher_delete")
         post_save.connect(set_keywords, sender='app.Keyword', dispatch_uid="keyword_save")
         post_delete.connect(set_keywords, sender='app.Keyword', dispatch_uid="keyword_delete")
+        for model in ('app.Tender', 'app.Award'):
+            post_save.connect(invalidate_stats, sender=model, dispatch_uid=f"{model}_stats_save")
+            post_delete.connect(invalidate_stats, sender=model, dispatch_uid=f"{model}_stats_delete")
+        # Every import ends by saving a WorkerLog
+        post_save.connect(invalidate_stats, sender='app.WorkerLog', dispatch_uid="worker_log_stats_save")
+        for model in ('app.Tender', 'app.Award', 'app.Vendor', 'app.Tag', 'app.WorkerLog'):
+            post_save.connect(invalidate_facets, sender=model, dispatch_uid=f"{model}_facets_save")
+            post_delete.connect(invalidate_facets, sender=model, dispatch_uid=f"{model}_facets_delete")
+        for through in ('app.Tender_tags', 'app.Award_vendors'):
+            m2m_changed.connect(invalidate_facets, sender=through, dispatch_uid=f"{through}_facets_changed")
+        for model in ('app.UNSPSCCode', 'app.CPVCode', 'app.TedCountry'):
+            post_save.connect(invalidate_reference_data, sender=model, dispatch_uid=f"{model}_reference_save")
+            post_delete.connect(invalidate_reference_data, sender=model, dispatch_uid=f"{model}_reference_delete")
+        pre_save.connect(reset_document_text, sender='app.TenderDocument', dispatch_uid="document_text_reset")
+        post_save.connect(queue_document_text, sender='app.TenderDocument', dispatch_uid="document_text_queue")
@@ -2,7 +2,7 @@ from django_elasticsearch_dsl import Document, Index, fields
 from elasticsearch_dsl import analyzer
 from elasticsearch_dsl.analysis import normalizer
 
-from .models import Tender, Award, TenderDocument
+from .models import Tender, Award, TenderDocument, Vendor
 
 case_insensitive_analyzer = analyzer(
     'case_insensitive_analyzer',
@@ -62,6 +62,7 @@ class TenderDoc(Document):
     class Django:
         model = Tender
         fields = [
+            'id',
             'unspsc_codes',
             'cpv_codes',
             'organization',
@@ -104,13 +105,38 @@ class AwardDoc(Document):
     class Django:
         model = Award
         fields = [
+            'id',
             'currency',
         ]
+        related_models = [Tender, Vendor]
+
+    def get_ids_from_related(self, model, ids):
+        """
+        Ids of the awards of the tenders or vendors with the given ids, see
+        app.indexing
+        """
+        if model is Tender:
+            return Award.objects.filter(tender_id__in=ids).values_list('id', flat=True)
+        return Award.vendors.through.objects.filter(
+            vendor_id__in=ids).values_list('award_id', flat=True)
+
+    def get_instances_from_related(self, related_instance):
+        return Award.objects.filter(id__in=self.get_ids_from_related(
+            type(related_instance), [related_instance.pk]))
+
+    def get_queryset(self):
+        # The tender title and the vendor names without a query per award
+        return super().get_queryset().select_related('tender').prefetch_related('vendors')
 
 
 @tender_document.doc_type
 class TenderDocumentDoc(Document):
     reference = fields.KeywordField(attr='tender.reference')
+    tender_id = fields.IntegerField(attr='tender.id')
+    tender_title = fields.TextField(
+        attr='tender.title',
+        analyzer=case_insensitive_analyzer,
+    )
 
     content = fields.TextField(
         analyzer=case_insensitive_analyzer,
@@ -125,6 +151,23 @@ class TenderDocumentDoc(Document):
     class Django:
         model = TenderDocument
         fields = [
+            'id',
             'name',
             'download_url',
         ]
+        related_models = [Tender]
+
+    def get_ids_from_related(self, model, ids):
+        """
+        Ids of the documents of the tenders with the given ids, see
+        app.indexing
+        """
+        return TenderDocument.objects.filter(
+            tender_id__in=ids).values_list('id', flat=True)
+
+    def get_instances_from_related(self, related_instance):
+        return related_instance.tenderdocument_set.all()
+
+    def get_queryset(self):
+        # The content is read from the stored text, see app.extraction
+        return super().get_queryset().select_related('tender', 'document_text')
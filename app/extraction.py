@@ -0,0 +1,144 @@
+"""
+Text extraction of the tender documents.
+
+The text of a document file is extracted by Tika once and stored in a
+`DocumentText` keyed by the SHA-256 of the file, which the tender documents
+with the same file share. Indexing a document reads the stored text, so
+reindexing the tender documents costs no extraction.
+
+A document is queued for extraction in the django-q workers when it is saved
+with a file whose text is not stored yet; the `extract_documents` command
+extracts the missing texts with a pool of threads.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import connections, transaction
+from django_q.tasks import async_task
+from tika import parser
+
+from app.indexing import queue_index
+from app.models import DocumentText, TenderDocument
+from app.utils import file_digest
+
+
+class ExtractionFailed(Exception):
+    """
+    Tika could not be reached or failed with a server error, the extraction
+    is retried later.
+    """
+
+
+def extract_text(file_path):
+    try:
+        parsed = parser.from_file(file_path)
+    except ValueError as e:
+        # Not a document Tika can parse, there is no text to store
+        logging.warning(e)
+        return None
+    except requests.exceptions.RequestException as e:
+        raise ExtractionFailed(f"Extracting {file_path} failed: {e}") from e
+    status = parsed.get("status")
+    if status is None or status >= 500:
+        raise ExtractionFailed(f"Extracting {file_path} failed with status {status}")
+    if status != 200:
+        # Tika refused the document, like an encrypted (422) or unsupported
+        # (415) file, extracting it again would fail the same way
+        logging.warning(f"Extracting {file_path} failed with status {status}")
+        return None
+    return parsed["content"]
+
+
+def extract_document_text(document_id):
+    """
+    Store the text of the document file, extracting it only when no other
+    file with the same content was extracted before, and reindex the
+    document.
+    """
+    document = TenderDocument.objects.filter(id=document_id).first()
+    if document is None or not document.document:
+        return None
+    try:
+        content_hash = file_digest(document.document.path)
+    except FileNotFoundError as e:
+        logging.warning(e)
+        return None
+
+    document_text = DocumentText.objects.filter(content_hash=content_hash).first()
+    if document_text is None:
+        try:
+            text = extract_text(document.document.path)
+        except ExtractionFailed as e:
+            # Nothing is stored, so the next run extracts the file again
+            logging.warning(e)
+            return None
+        document_text, _ = DocumentText.objects.get_or_create(
+            content_hash=content_hash, defaults={"text": text}
+        )
+    if document.document_text_id != document_text.pk:
+        # Without the save signals, which would queue the document again
+        TenderDocument.objects.filter(id=document.id).update(
+            document_text=document_text
+        )
+        queue_index(TenderDocument, [document.id])
+    return content_hash
+
+
+def extract_in_thread(document_id):
+    try:
+        return extract_document_text(document_id)
+    finally:
+        # Each thread has its own database connection
+        connections.close_all()
+
+
+def extract_documents(documents, workers=None):
+    """
+    Extract the texts of the documents with a pool of threads, and return the
+    number of documents extracted. Failures are logged and skipped.
+    """
+    workers = max(workers or settings.DOCUMENT_EXTRACTION_WORKERS, 1)
+    document_ids = list(documents.values_list("id", flat=True))
+    extracted = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(extract_in_thread, document_id)
+            for document_id in document_ids
+        ]
+        for document_id, future in zip(document_ids, futures):
+            try:
+                if future.result():
+                    extracted += 1
+            except Exception as e:
+                logging.error(f"Extracting document {document_id} failed: {e}")
+    return extracted
+
+
+def reset_document_text(sender, instance, **kwargs):
+    """
+    Forget the stored text of a document whose file changed. Connected to
+    the TenderDocument pre_save signal.
+    """
+    if not instance.pk or not instance.document_text_id:
+        return
+    saved_name = (
+        TenderDocument.objects.filter(pk=instance.pk)
+        .values_list("document", flat=True)
+        .first()
+    )
+    if saved_name != instance.document.name:
+        instance.document_text = None
+
+
+def queue_document_text(sender, instance, **kwargs):
+    """
+    Queue the extraction of a document saved with a file whose text is not
+    stored. Connected to the TenderDocument post_save signal.
+    """
+    if not instance.document or instance.document_text_id:
+        return
+    transaction.on_commit(
+        lambda: async_task("app.extraction.extract_document_text", instance.id)
+    )
@@ -0,0 +1,73 @@
+"""
+Option lists of the listing filters.
+
+The distinct values of the filtered columns, with the number of rows having
+each of them, are computed once and cached for FACETS_CACHE_TTL seconds.
+The cache is cleared whenever one of the models they come from is saved or
+deleted and when an import finishes. The filter forms only embed the
+selected options of the long lists, the others are looked up by prefix
+through `FacetAjaxView`.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+FACET_KEY = "facet_{}"
+# Options returned by one lookup
+LOOKUP_LIMIT = 50
+
+
+def values_count(model_name, field, counted="id"):
+    def options():
+        model = apps.get_model("app", model_name)
+        return list(
+            model.objects.exclude(**{f"{field}__isnull": True})
+            .exclude(**{field: ""})
+            .values_list(field)
+            .annotate(count=Count(counted))
+            .order_by(field)
+        )
+
+    return options
+
+
+FACETS = {
+    "organization": values_count("Tender", "organization"),
+    "notice_type": values_count("Tender", "notice_type"),
+    "tag": values_count("Tag", "name", counted="tender"),
+    "vendor": values_count("Award", "vendors__name"),
+}
+
+
+def facet_options(name):
+    """
+    Return the (value, count) options of the facet, sorted by value.
+    """
+    key = FACET_KEY.format(name)
+    options = cache.get(key)
+    if options is None:
+        options = FACETS[name]()
+        cache.set(key, options, settings.FACETS_CACHE_TTL)
+    return options
+
+
+def facet_lookup(name, prefix="", limit=LOOKUP_LIMIT, offset=0):
+    """
+    Return the options of the facet whose value starts with the prefix, case
+    insensitively, and whether there are more of them after `limit`.
+    """
+    prefix = prefix.strip().lower()
+    options = [
+        option for option in facet_options(name)
+        if option[0].lower().startswith(prefix)
+    ]
+    return options[offset:offset + limit], len(options) > offset + limit
+
+
+def invalidate_facets(*args, **kwargs):
+    """
+    Clear the cached options. Connected to the signals of the models the
+    options come from and to the WorkerLog post_save signal.
+    """
+    cache.delete_many([FACET_KEY.format(name) for name in FACETS])
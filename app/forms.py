@@ -1,5 +1,7 @@
 from django import forms
-from .models import Tender, Award,Tag
+from django.urls import reverse_lazy
+
+from .facets import facet_options
 
 MAX = 220000
 STEP = 20000
@@ -46,8 +48,26 @@ VALUES = (
 )
 
 
+def facet_select(name):
+    """
+    A select whose options are looked up through the facet endpoint, see
+    scratch_datatables.js
+    """
+    return forms.Select(attrs={
+        "data-facet-url": reverse_lazy("facet_ajax_view", kwargs={"name": name})
+    })
+
+
+def selected_choices(empty_label, value):
+    """
+    Only the selected option of a facet looked up on demand is embedded
+    """
+    return [("", empty_label)] + ([(str(value), str(value))] if value else [])
+
+
 class TendersFilter(forms.Form):
-    organization = forms.ChoiceField(required=False)
+    organization = forms.ChoiceField(
+        required=False, widget=facet_select("organization"))
     source = forms.ChoiceField(choices=SOURCES, required=False)
     status = forms.ChoiceField(choices=STATUS, required=False)
     favourite = forms.ChoiceField(choices=FAVOURITES, required=False)
@@ -58,46 +78,32 @@ class TendersFilter(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        organizations_list = (
-            Tender.objects.order_by("organization")
-            .values_list("organization", flat=True)
-            .distinct()
+        self.fields["organization"].choices = selected_choices(
+            "All organizations", self.initial.get("organization")
         )
-        self.fields["organization"].choices = [("", "All organizations")] + [
-            (org, org) for org in organizations_list
-        ]
-        types_list = Tender.objects.values_list(
-            "notice_type", flat=True
-        ).distinct()
         self.fields["type"].choices = [("", "All notice types")] + [
-            (tp, tp) for tp in types_list
+            (tp, tp) for tp, _ in facet_options("notice_type")
+        ]
+        self.fields["tags"].choices = [
+            (name, name) for name, _ in facet_options("tag")
         ]
-      
-        self.fields['tags'].choices =  [(i.name,i.name) for i in Tag.objects.all()]
 
 
 class AwardsFilter(forms.Form):
     source = forms.ChoiceField(choices=SOURCES, required=False)
-    organization = forms.ChoiceField(required=False)
-    vendor = forms.ChoiceField(required=False)
+    organization = forms.ChoiceField(
+        required=False, widget=facet_select("organization"))
+    vendor = forms.ChoiceField(required=False, widget=facet_select("vendor"))
     value = forms.ChoiceField(choices=VALUES, required=False)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        organizations_list = (
-            Tender.objects.order_by("organization")
-            .values_list("organization", flat=True)
-            .distinct()
+        self.fields["organization"].choices = selected_choices(
+            "All organizations", self.initial.get("organization")
+        )
+        self.fields["vendor"].choices = selected_choices(
+            "All vendors", self.initial.get("vendor")
         )
-        self.fields["organization"].choices = [("", "All organizations")] + [
-            (org, org) for org in organizations_list
-        ]
-        vendors_list = Award.objects.values_list(
-            "vendors__name", flat=True
-        ).distinct()
-        self.fields["vendor"].choices = [("", "All vendors")] + [
-            (vendor, vendor) for vendor in vendors_list
-        ]
 
 
 class SearchForm(forms.Form):
@@ -0,0 +1,131 @@
+"""
+Rebuild of the Elasticsearch indices without downtime.
+
+The documents of app/documents.py are read and written through an alias
+named after their index, pointing to a versioned index (`tenders_<version>`).
+A rebuild loads a new version while the searches keep using the current one:
+the rows are streamed with a server-side cursor, the documents are indexed by
+parallel bulk requests into the new index, with no refresh and no replica
+during the load, and the alias is moved to the new index in one atomic
+update. The previous versions are deleted afterwards.
+
+The drain of the index queue (see app/indexing.py) is paused during the
+rebuild, so the changes made meanwhile are indexed in the new version once
+the alias points to it.
+"""
+import copy
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch.helpers import parallel_bulk
+from elasticsearch_dsl.connections import connections
+
+REBUILD_RUNNING_KEY = "index_rebuild_running"
+# Seconds after which a rebuild which did not finish no longer pauses the
+# index queue
+REBUILD_TIMEOUT = 12 * 60 * 60
+
+
+def rebuild_running():
+    return bool(cache.get(REBUILD_RUNNING_KEY))
+
+
+def index_versions(client, alias):
+    """
+    Return the names of the versioned indices of the alias, oldest first.
+    """
+    return sorted(client.indices.get(index=f"{alias}_*"))
+
+
+def load_index(client, document, index_name, threads, chunk_size):
+    """
+    Index all the documents in `index_name` and return their number.
+    """
+    queryset = document.get_queryset().order_by()
+    objects = queryset.iterator(chunk_size=chunk_size)
+
+    def actions():
+        for action in document._get_actions(objects, "index"):
+            action["_index"] = index_name
+            yield action
+
+    indexed = 0
+    for ok, result in parallel_bulk(
+        client, actions(), thread_count=threads, chunk_size=chunk_size,
+        raise_on_error=False,
+    ):
+        if ok:
+            indexed += 1
+        else:
+            logging.error(f"Indexing in {index_name} failed: {result}")
+    return indexed
+
+
+def rebuild_index(document_class, client=None, threads=None, chunk_size=None, keep=0):
+    """
+    Load a new version of the index of the document and move its alias to
+    it. Return the name of the new index and the number of documents indexed.
+    """
+    client = client or connections.get_connection()
+    threads = threads or settings.INDEX_REBUILD_THREADS
+    chunk_size = chunk_size or settings.INDEX_REBUILD_CHUNK_SIZE
+    document = document_class()
+    alias = document._index._name
+    index_name = f"{alias}_{timezone.now():%Y%m%d%H%M%S}"
+
+    # The settings of the document index are returned, not a copy
+    body = copy.deepcopy(document._index.to_dict())
+    index_settings = body.setdefault("settings", {})
+    replicas = index_settings.get("number_of_replicas", 1)
+    refresh_interval = index_settings.get("refresh_interval", None)
+    index_settings.update(number_of_replicas=0, refresh_interval="-1")
+    client.indices.create(index=index_name, body=body)
+
+    start = time.monotonic()
+    indexed = load_index(client, document, index_name, threads, chunk_size)
+    logging.warning(
+        f"Indexed {indexed} documents in {index_name} "
+        f"in {time.monotonic() - start:.1f}s"
+    )
+
+    client.indices.put_settings(
+        index=index_name,
+        body={
+            "index": {
+                "number_of_replicas": replicas,
+                "refresh_interval": refresh_interval,
+            }
+        },
+    )
+    client.indices.refresh(index=index_name)
+
+    old_versions = [name for name in index_versions(client, alias) if name != index_name]
+    actions = [{"add": {"index": index_name, "alias": alias}}]
+    if client.indices.exists(index=alias) and not client.indices.exists_alias(name=alias):
+        # An index created before the aliases, replaced by the alias
+        actions.insert(0, {"remove_index": {"index": alias}})
+    for name in old_versions:
+        actions.insert(0, {"remove": {"index": name, "alias": alias}})
+    client.indices.update_aliases(body={"actions": actions})
+
+    for name in old_versions[:max(len(old_versions) - keep, 0)]:
+        client.indices.delete(index=name, ignore=404)
+    return index_name, indexed
+
+
+def rebuild_indices(document_classes=None, **kwargs):
+    """
+    Rebuild the indices of the documents, all the registered ones by
+    default, with the index queue paused.
+    """
+    document_classes = document_classes or list(registry.get_documents())
+    if not cache.add(REBUILD_RUNNING_KEY, True, REBUILD_TIMEOUT):
+        raise RuntimeError("The indices are already being rebuilt")
+    try:
+        return [rebuild_index(document_class, **kwargs) for document_class in document_classes]
+    finally:
+        cache.delete(REBUILD_RUNNING_KEY)
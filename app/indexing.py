@@ -0,0 +1,276 @@
+"""
+Queued Elasticsearch indexing.
+
+Saving or deleting an indexed model, or a model the indexed documents are
+built from (see `related_models` in app/documents.py), only records the ids
+of the objects to index in `IndexQueue`. The `drain_index_queue` task,
+scheduled INDEX_QUEUE_DELAY seconds after the first change, indexes them with
+bulk requests of up to INDEX_QUEUE_BATCH_SIZE objects, so the imports do not
+wait for Elasticsearch. The objects failing to index are retried with an
+exponential backoff, INDEX_QUEUE_MAX_ATTEMPTS times at most.
+
+The lag of the index is the age of the oldest queued change, see
+`index_queue_status` and the `index_queue` command. The drain waits while the
+indices are rebuilt, see app/index_rebuild.py.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
+from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
+from django_q.models import Schedule
+from django_q.tasks import schedule
+from elasticsearch.helpers import bulk
+from elasticsearch_dsl.connections import connections
+
+from app.index_rebuild import rebuild_running
+
+DRAIN_SCHEDULE = "drain_index_queue"
+# Set while a drain is scheduled, so the saves do not check the schedule
+DRAIN_SCHEDULED_KEY = "index_queue_drain_scheduled"
+
+
+def indexed_documents(model):
+    return [
+        document
+        for document in registry.get_documents([model])
+        if not document.django.ignore_signals
+    ]
+
+
+def related_ids(model, ids):
+    """
+    Return {indexed model: ids} of the objects whose documents are built from
+    the objects of `model` with the given ids.
+    """
+    related = {}
+    for related_model in registry._related_models.get(model, ()):
+        for document in indexed_documents(related_model):
+            queryset = document().get_ids_from_related(model, ids)
+            related.setdefault(related_model, set()).update(queryset)
+    return related
+
+
+def queue_index(model, ids, related=True):
+    """
+    Queue the objects of `model` with the given ids, and the objects built
+    from them when `related`, for indexing.
+    """
+    ids = set(ids)
+    if not ids or not DEDConfig.autosync_enabled():
+        return
+
+    queued = {}
+    if indexed_documents(model):
+        queued[model] = ids
+    if related:
+        for related_model, object_ids in related_ids(model, ids).items():
+            queued.setdefault(related_model, set()).update(object_ids)
+    if not any(queued.values()):
+        return
+
+    IndexQueue = apps.get_model("app", "IndexQueue")
+    now = timezone.now()
+    IndexQueue.objects.bulk_create(
+        [
+            IndexQueue(
+                model=queued_model._meta.label_lower,
+                object_id=object_id,
+                queued_at=now,
+                changed_at=now,
+                available_at=now,
+            )
+            for queued_model, object_ids in queued.items()
+            for object_id in object_ids
+        ],
+        update_conflicts=True,
+        unique_fields=["model", "object_id"],
+        # The time of the first change is kept to measure the lag
+        update_fields=["changed_at"],
+    )
+    schedule_drain()
+
+
+def schedule_drain(next_run=None):
+    """
+    Schedule the drain of the queue, unless one is already waiting.
+    """
+    if next_run is None:
+        next_run = timezone.now() + timedelta(seconds=settings.INDEX_QUEUE_DELAY)
+        if not cache.add(DRAIN_SCHEDULED_KEY, True, settings.INDEX_QUEUE_DELAY):
+            return
+    if Schedule.objects.filter(name=DRAIN_SCHEDULE).exists():
+        return
+    try:
+        schedule(
+            "app.indexing.drain_index_queue",
+            name=DRAIN_SCHEDULE,
+            schedule_type=Schedule.ONCE,
+            next_run=next_run,
+        )
+    except IntegrityError:
+        # Scheduled by a concurrent save
+        pass
+
+
+class QueuedSignalProcessor(RealTimeSignalProcessor):
+    """
+    Queue the saved and deleted objects for indexing, instead of indexing
+    them while they are saved.
+    """
+
+    def handle_save(self, sender, instance, **kwargs):
+        queue_index(instance.__class__, [instance.pk])
+
+    def handle_pre_delete(self, sender, instance, **kwargs):
+        # The objects built from the deleted one, while it is still related
+        model = instance.__class__
+        for related_model, object_ids in related_ids(model, [instance.pk]).items():
+            queue_index(related_model, object_ids, related=False)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        # Removed from the index by the drain, as it no longer exists
+        queue_index(instance.__class__, [instance.pk], related=False)
+
+
+def index_actions(items):
+    """
+    Return the bulk actions indexing the queued objects which exist and
+    removing the others from the index, with a {(index, id): item} dict.
+    """
+    by_model = defaultdict(dict)
+    for item in items:
+        by_model[item.model][item.object_id] = item
+
+    actions = []
+    items_by_doc = {}
+    for label, model_items in by_model.items():
+        model = apps.get_model(label)
+        for document_class in indexed_documents(model):
+            document = document_class()
+            index = document._index._name
+            objects = document.get_queryset().filter(pk__in=model_items)
+            found = set()
+            for action in document._get_actions(objects, "index"):
+                actions.append(action)
+                found.add(int(action["_id"]))
+            for object_id, item in model_items.items():
+                items_by_doc[(index, str(object_id))] = item
+                if object_id not in found:
+                    actions.append(
+                        {"_op_type": "delete", "_index": index, "_id": object_id}
+                    )
+    return actions, items_by_doc
+
+
+def retry_later(item):
+    """
+    Retry indexing the object after a backoff doubling with every attempt, or
+    give up after INDEX_QUEUE_MAX_ATTEMPTS attempts.
+    """
+    item.attempts += 1
+    if item.attempts >= settings.INDEX_QUEUE_MAX_ATTEMPTS:
+        logging.error(f"Gave up indexing {item} after {item.attempts} attempts")
+        item.__class__.objects.filter(pk=item.pk, changed_at=item.changed_at).delete()
+        return
+    backoff = settings.INDEX_QUEUE_DELAY * 2 ** item.attempts
+    item.available_at = timezone.now() + timedelta(seconds=backoff)
+    item.save(update_fields=["attempts", "available_at"])
+
+
+def drain_index_queue(batch_size=None):
+    """
+    Index the queued objects in bulk, oldest changes first, until the queue
+    holds no object ready to index.
+    """
+    if rebuild_running():
+        # Indexed in the new indices once the rebuild is done
+        schedule_drain(
+            timezone.now() + timedelta(seconds=settings.INDEX_QUEUE_DELAY)
+        )
+        return "Waiting for the rebuild of the indices"
+
+    IndexQueue = apps.get_model("app", "IndexQueue")
+    batch_size = batch_size or settings.INDEX_QUEUE_BATCH_SIZE
+    started = timezone.now()
+    client = connections.get_connection()
+    indexed = failed = 0
+
+    while True:
+        items = list(
+            # The objects changed since the drain started are left to the
+            # next one
+            IndexQueue.objects.filter(
+                available_at__lte=started, changed_at__lte=started
+            ).order_by("queued_at")[:batch_size]
+        )
+        if not items:
+            break
+
+        actions, items_by_doc = index_actions(items)
+        failed_items = {}
+        try:
+            _, errors = bulk(
+                client,
+                actions,
+                raise_on_error=False,
+                # Too many requests are retried by the helper itself
+                max_retries=3,
+                ignore_status=(404,),
+            )
+        except Exception as e:
+            logging.error(f"Indexing {len(items)} queued objects failed: {e}")
+            errors = []
+            failed_items = {item.pk: item for item in items}
+        for error in errors:
+            (result,) = error.values()
+            item = items_by_doc.get((result["_index"], str(result["_id"])))
+            if item:
+                failed_items[item.pk] = item
+                logging.error(f"Indexing {item} failed: {result.get('error')}")
+
+        done = [item for item in items if item.pk not in failed_items]
+        # A change made while indexing keeps the object queued
+        done_query = Q(pk__in=[])
+        for item in done:
+            done_query |= Q(pk=item.pk, changed_at=item.changed_at)
+        if done:
+            IndexQueue.objects.filter(done_query).delete()
+        for item in failed_items.values():
+            retry_later(item)
+        indexed += len(done)
+        failed += len(failed_items)
+
+    pending = IndexQueue.objects.aggregate(next_run=Min("available_at"))
+    if pending["next_run"]:
+        schedule_drain(max(pending["next_run"], timezone.now()))
+    return f"Indexed {indexed} objects, {failed} failed"
+
+
+def index_queue_status():
+    """
+    Return the number of queued objects, by model and failing, and the lag of
+    the index in seconds.
+    """
+    IndexQueue = apps.get_model("app", "IndexQueue")
+    status = IndexQueue.objects.aggregate(
+        queued=Count("id"),
+        failing=Count("id", filter=Q(attempts__gt=0)),
+        oldest=Min("queued_at"),
+    )
+    status["models"] = dict(
+        IndexQueue.objects.values_list("model")
+        .annotate(count=Count("id"))
+        .order_by("model")
+    )
+    oldest = status.pop("oldest")
+    status["lag"] = (timezone.now() - oldest).total_seconds() if oldest else 0
+    return status
@@ -0,0 +1,142 @@
+"""
+Keyword matching engine.
+
+The keywords are compiled once into a regular expression shaped like a trie,
+so matching a text tries the common prefixes of all the keywords together at
+every word start instead of each keyword separately. The compiled matcher is
+cached per process and rebuilt when the keyword version stamp, stored in the
+shared cache and changed whenever a Keyword is saved or deleted, differs from
+the one it was built for.
+"""
+import re
+import time
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.cache import cache
+
+VERSION_KEY = "keywords_version"
+# Seconds between checks of the version stamp set by other processes
+VERSION_CHECK_INTERVAL = 5
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+_matcher = None
+_checked_at = 0
+
+
+def normalize(text):
+    return WHITESPACE_RE.sub(" ", text.strip().lower())
+
+
+def trie_pattern(trie):
+    alternatives = []
+    for char, subtrie in sorted(trie.items()):
+        if char:
+            char_pattern = r"\s+" if char == " " else re.escape(char)
+            alternatives.append(char_pattern + trie_pattern(subtrie))
+    if not alternatives:
+        return ""
+    if len(alternatives) == 1 and "" not in trie:
+        return alternatives[0]
+    pattern = "(?:" + "|".join(alternatives) + ")"
+    # A keyword ends here, the longer ones are tried first
+    return pattern + "?" if "" in trie else pattern
+
+
+class KeywordMatcher:
+    def __init__(self, keywords, version=None):
+        """
+        :param keywords: the keyword values, or a {value: id} dict
+        """
+        if not isinstance(keywords, dict):
+            keywords = dict.fromkeys(keywords)
+        self.ids = {normalize(value): id for value, id in keywords.items() if value}
+        self.version = version
+
+        self.trie = {}
+        for value in self.ids:
+            node = self.trie
+            for char in value:
+                node = node.setdefault(char, {})
+            node[""] = value
+
+        self.regex = None
+        self.detect_regex = None
+        if self.ids:
+            pattern = trie_pattern(self.trie)
+            self.regex = re.compile(rf"(?<!\w)({pattern})(?!\w)", re.IGNORECASE)
+            # Tried at every word start, to find the keywords inside others too
+            self.detect_regex = re.compile(
+                rf"(?<!\w)(?=({pattern})(?!\w))", re.IGNORECASE
+            )
+
+    def find(self, text):
+        """
+        Return the set of keywords found in the text as whole words.
+        """
+        found = set()
+        if not self.detect_regex or not text:
+            return found
+        for match in self.detect_regex.finditer(str(text)):
+            # The match is the longest keyword starting here, the keywords
+            # which are its prefixes and end on a word boundary match too
+            matched = normalize(match.group(1))
+            node = self.trie
+            for i, char in enumerate(matched):
+                node = node.get(char)
+                if node is None:
+                    break
+                at_boundary = i + 1 == len(matched) or not (
+                    matched[i + 1].isalnum() or matched[i + 1] == "_"
+                )
+                if "" in node and at_boundary:
+                    found.add(node[""])
+        return found
+
+    def mark(self, text):
+        """
+        Return the text with the keywords wrapped in <mark> tags.
+        """
+        text = text or ""
+        if not self.regex:
+            return text
+        return self.regex.sub(r"<mark>\1</mark>", text)
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def keyword_matcher():
+    """
+    Return the matcher for the current keywords, building it only when the
+    keywords changed since it was last built.
+    """
+    global _matcher, _checked_at
+    now = time.monotonic()
+    if _matcher is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _matcher
+
+    version = current_version()
+    if _matcher is None or _matcher.version != version:
+        Keyword = apps.get_model("app", "Keyword")
+        _matcher = KeywordMatcher(
+            dict(Keyword.objects.values_list("value", "id")), version
+        )
+    _checked_at = now
+    return _matcher
+
+
+def invalidate_keywords(*args, **kwargs):
+    """
+    Change the keyword version stamp, so every process rebuilds its matcher.
+    Connected to the Keyword post_save and post_delete signals.
+    """
+    global _matcher
+    cache.set(VERSION_KEY, uuid4().hex, None)
+    _matcher = None
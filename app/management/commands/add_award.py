@@ -32,6 +32,7 @@ class Command(BaseCommand, BaseParamsUI):
             source='UNGM'
         )
 
+        requester = get_request_class(public=True)
         for tender in expired_tenders:
             award = Award.objects.filter(
                 tender__reference=tender.reference
@@ -39,14 +40,14 @@ class Command(BaseCommand, BaseParamsUI):
 
             if not award:
                 try:
-                    contract_id = self.get_contract_id(tender.reference)
+                    contract_id = self.get_contract_id(
+                        tender.reference, requester)
                 except TypeError:
                     logger.warning(f'No award was found for the corresponding tender reference ({ tender.reference })')
                     continue
 
-                request_cls = get_request_class(public=True)
                 url = '/'.join((WINNERS_ENDPOINT_URI, contract_id))
-                html_data = request_cls.get_request(url)
+                html_data = requester.get_request(url)
 
                 try:
                     award_fields = self.parse_award(html_data)
@@ -62,15 +63,14 @@ class Command(BaseCommand, BaseParamsUI):
             return ''
 
     @staticmethod
-    def get_contract_id(reference):
+    def get_contract_id(reference, requester=None):
         if len(reference) < 3:
             logger.error('The search text must be at least 3 characters long.')
             return
 
-        requester = get_request_class(public=True)
+        requester = requester or get_request_class(public=True)
 
-        payload = PAYLOAD['awards']
-        payload['Reference'] = reference
+        payload = dict(PAYLOAD['awards'], Reference=reference)
         for i in range(0, 3):
             resp = requester.post_request(
                 WINNERS_ENDPOINT_URI,
@@ -3,6 +3,7 @@ from sentry_sdk import capture_exception
 
 from app.models import TenderDocument
 from app.parsers.ungm import UNGMWorker
+from app.parsers.ungm_fetcher import UNGMFetcher
 
 
 class Command(BaseCommand):
@@ -10,12 +11,16 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
 
-        tender_docs = TenderDocument.objects.all()
+        # Only the columns which exist when the 0033 migration runs the command
+        tender_docs = TenderDocument.objects.only(
+            "id", "name", "download_url", "tender", "document"
+        )
 
+        fetcher = UNGMFetcher()
         for doc in tender_docs:
             if not doc.document:
                 self.stdout.write(self.style.SUCCESS("Downloading document %s" % doc.name))
                 try:
-                    UNGMWorker.download_document(doc)
+                    UNGMWorker.download_document(doc, fetcher)
                 except Exception as e:
                     capture_exception(e)
@@ -134,6 +134,7 @@ class BaseNotifyCommand(BaseCommand, BaseParamsUI):
             )
             w = UNGMWorker()
             changed_ungm_tenders, _ = w.parse_tenders(ungm_tenders)
+            self.stdout.write(self.style.SUCCESS(w.fetch_summary()))
 
         changed_iucn_tenders = []
         if iucn_tenders.exists():
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from app.extraction import extract_documents
+from app.management.commands.base.params import BaseParamsUI
+from app.models import TenderDocument
+
+
+class Command(BaseCommand, BaseParamsUI):
+    help = "Extracts and stores the text of the tender documents missing it"
+
+    @staticmethod
+    def get_parameters():
+        return [
+            {
+                "name": "all",
+                "display": "All documents",
+                "type": "checkbox",
+            },
+            {
+                "name": "workers",
+                "display": "Workers",
+                "type": "text",
+            },
+        ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Check the stored text of every document, the files changed "
+            "since their text was stored are extracted again",
+        )
+        parser.add_argument(
+            "--workers",
+            help="Documents extracted at once (default "
+            "DOCUMENT_EXTRACTION_WORKERS)",
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        documents = TenderDocument.objects.exclude(document="")
+        if not options["all"]:
+            documents = documents.filter(document_text__isnull=True)
+
+        total = documents.count()
+        workers = options["workers"]
+        extracted = extract_documents(
+            documents, workers=int(workers) if workers else None
+        )
+
+        msg = f"Stored the text of {extracted} out of {total} documents."
+        self.stdout.write(self.style.SUCCESS(msg))
+        return msg
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from app.indexing import drain_index_queue, index_queue_status
+from app.management.commands.base.params import BaseParamsUI
+
+
+class Command(BaseCommand, BaseParamsUI):
+    help = "Shows the objects waiting to be indexed in Elasticsearch"
+
+    @staticmethod
+    def get_parameters():
+        return [
+            {
+                "name": "drain",
+                "display": "Drain",
+                "type": "checkbox",
+            },
+        ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drain",
+            action="store_true",
+            help="Index the queued objects now",
+        )
+
+    def handle(self, *args, **options):
+        if options["drain"]:
+            self.stdout.write(drain_index_queue())
+
+        status = index_queue_status()
+        for model, count in status["models"].items():
+            self.stdout.write(f"{model}\t{count}")
+        msg = (
+            f"{status['queued']} object(s) waiting to be indexed, "
+            f"{status['failing']} failing, lag {status['lag']:.0f}s."
+        )
+        self.stdout.write(self.style.SUCCESS(msg))
+        return msg
@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 import json
 
 from app.models import CPVCode, TedCountry, UNSPSCCode
+from app.reference_data import invalidate_reference_data
 
 fixtures_dir = "./app/fixtures/"
 def add_cpv_codes():
@@ -78,3 +79,6 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("Successfully loaded data for TEDCountry model"))
             add_unspsc_codes()
             self.stdout.write(self.style.SUCCESS("Successfully loaded data for UNSPSCCode model"))
+
+        # Written in bulk, without the signals
+        invalidate_reference_data()
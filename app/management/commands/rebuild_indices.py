@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django_elasticsearch_dsl.registries import registry
+
+from app.index_rebuild import rebuild_indices
+from app.management.commands.base.params import BaseParamsUI
+
+
+class Command(BaseCommand, BaseParamsUI):
+    help = (
+        "Rebuilds the Elasticsearch indices in new versions and moves their "
+        "aliases to them, the searches use the current ones meanwhile"
+    )
+
+    @staticmethod
+    def get_parameters():
+        return [
+            {
+                "name": "index",
+                "display": "Index (all if empty)",
+                "type": "text",
+            },
+            {
+                "name": "threads",
+                "display": "Threads",
+                "type": "text",
+            },
+            {
+                "name": "keep",
+                "display": "Previous versions to keep",
+                "type": "text",
+            },
+        ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--index",
+            action="append",
+            help="Name of an index to rebuild, all of them by default",
+        )
+        parser.add_argument(
+            "--threads",
+            help="Parallel bulk requests (default INDEX_REBUILD_THREADS)",
+            type=int,
+        )
+        parser.add_argument(
+            "--chunk_size",
+            help="Objects per bulk request (default INDEX_REBUILD_CHUNK_SIZE)",
+            type=int,
+        )
+        parser.add_argument(
+            "--keep",
+            help="Previous versions of each index kept after the swap",
+            type=int,
+            default=0,
+        )
+
+    def handle(self, *args, **options):
+        documents = list(registry.get_documents())
+        if options["index"]:
+            documents = [
+                document
+                for document in documents
+                if document._index._name in options["index"]
+            ]
+            if not documents:
+                msg = f"No index named {', '.join(options['index'])}."
+                self.stdout.write(self.style.ERROR(msg))
+                return msg
+
+        rebuilt = rebuild_indices(
+            documents,
+            threads=int(options["threads"]) if options["threads"] else None,
+            chunk_size=options["chunk_size"],
+            keep=int(options["keep"] or 0),
+        )
+        for index_name, indexed in rebuilt:
+            self.stdout.write(f"{index_name}\t{indexed}")
+
+        msg = f"Rebuilt {len(rebuilt)} index(es)."
+        self.stdout.write(self.style.SUCCESS(msg))
+        return msg
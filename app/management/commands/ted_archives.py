@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from app.management.commands.base.params import BaseParamsUI
+from app.parsers.archive_store import ArchiveStore
+from app.parsers.ted import get_archives_path
+
+
+class Command(BaseCommand, BaseParamsUI):
+    help = "Lists or prunes the locally stored TED archives"
+
+    @staticmethod
+    def get_parameters():
+        return [
+            {
+                "name": "prune",
+                "display": "Prune",
+                "type": "checkbox",
+            },
+            {
+                "name": "max_size",
+                "display": "Max size (MB)",
+                "type": "text",
+            },
+        ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Remove the corrupted archives and evict the least recently "
+            "used ones",
+        )
+        parser.add_argument(
+            "--max_size",
+            help="Size in MB to evict down to (default TED_ARCHIVE_STORE_SIZE)",
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        store = ArchiveStore(get_archives_path())
+
+        if options["prune"]:
+            max_size = options["max_size"]
+            if max_size is not None:
+                max_size = int(max_size) * 1024 * 1024
+            for name in store.prune(max_size):
+                self.stdout.write(f"Removed {name}")
+
+        entries = store.entries()
+        for name, size, last_used in entries:
+            self.stdout.write(
+                f"{name}\t{size / (1024 * 1024):.1f} MB\t"
+                f"{last_used:%d/%m/%Y %H:%M}"
+            )
+        msg = (
+            f"{len(entries)} stored TED archive(s), "
+            f"{sum(size for _, size, _ in entries) / (1024 * 1024):.1f} MB."
+        )
+        self.stdout.write(self.style.SUCCESS(msg))
+        return msg
@@ -43,7 +43,10 @@ class Command(BaseCommand, BaseParamsUI):
             w = UNGMWorker()
             w.parse_latest_notices(last_date)
             tenders_imported = Tender.objects.count() - old_tender_count
-            success_msg = f'{tenders_imported} new UNGM tender(s) imported'
+            success_msg = (
+                f'{tenders_imported} new UNGM tender(s) imported, '
+                f'{w.fetch_summary()}'
+            )
             self.stdout.write(
                 self.style.SUCCESS(success_msg)
             )
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.6 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0049_tedreleasecalendar_alter_tender_source_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TEDRenewalLookup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notice_number', models.CharField(max_length=255, unique=True)),
+                ('duration', models.CharField(max_length=255, null=True)),
+                ('unit', models.CharField(max_length=255, null=True)),
+            ],
+            options={
+                'verbose_name': 'TED renewal lookup',
+                'verbose_name_plural': 'TED renewal lookups',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='tedreleasecalendar',
+            options={'ordering': ['-date'], 'verbose_name': 'TED release calendar', 'verbose_name_plural': 'TED release calendar'},
+        ),
+    ]
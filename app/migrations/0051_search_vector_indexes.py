@@ -0,0 +1,23 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:28
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0050_tedrenewallookup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tender',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'organization', 'notice_type', config='simple'), name='app_tender_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'contact_name', config='simple'), name='app_vendor_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0052_document_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexQueue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.IntegerField()),
+                ('queued_at', models.DateTimeField()),
+                ('changed_at', models.DateTimeField()),
+                ('available_at', models.DateTimeField()),
+                ('attempts', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='indexqueue',
+            index=models.Index(fields=['queued_at'], name='app_indexqu_queued__92279b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='indexqueue',
+            index=models.Index(fields=['available_at'], name='app_indexqu_availab_15b01a_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='indexqueue',
+            unique_together={('model', 'object_id')},
+        ),
+    ]
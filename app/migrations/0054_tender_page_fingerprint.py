@@ -0,0 +1,18 @@
+# Generated by Django 4.1.6 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0053_index_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tender',
+            name='page_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -1,21 +1,22 @@
-import logging
+import re
+from datetime import date
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMultiAlternatives
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.html import strip_tags
 from django.utils.functional import cached_property
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
 from django.contrib.auth.models import User
 
 from app.exceptions import NoRecipients
 from app.fields import LowerCharField
-
-import re
-
-from tika import parser
+from app.keywords import KeywordMatcher, keyword_matcher
 
 SOURCE_CHOICES = [
     ("UNGM", "UNGM"),
@@ -69,10 +70,13 @@ class Keyword(BaseTimedModel):
         return list(Keyword.objects.values_list("value", flat=True))
 
 
-def keywords_in(text):
+def keywords_in(text, keywords=None):
     """Returns a list with all the keywords found in the text content"""
-    keywords = Keyword.get_values_list()
-    return list(set(keywords) & set(re.split(r"\W+", str(text).lower())))
+    if keywords is None:
+        matcher = keyword_matcher()
+    else:
+        matcher = KeywordMatcher(keywords)
+    return list(matcher.find(text))
 
 
 class Tag(models.Model):
@@ -82,6 +86,78 @@ class Tag(models.Model):
         return "{}".format(self.name)
 
 
+def search_query(terms):
+    """
+    Return a full text query matching every word of the terms as a prefix, or
+    None when the terms have no words.
+    """
+    words = re.findall(r"\w+", terms)
+    if not words:
+        return None
+    return SearchQuery(
+        " & ".join(f"{word}:*" for word in words), config="simple", search_type="raw"
+    )
+
+
+class SearchQuerySet(models.QuerySet):
+    """
+    Full text search on the `search_fields`, backed by the GIN index on the
+    same search vector declared by the model.
+    """
+
+    search_fields = []
+
+    @classmethod
+    def search_vector(cls):
+        return SearchVector(*cls.search_fields, config="simple")
+
+    def search(self, terms):
+        """
+        Filter the objects matching the terms, ranked by relevance.
+        """
+        query = search_query(terms)
+        if query is None:
+            return self.none()
+        return (
+            self.annotate(search_vector=self.search_vector())
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(models.F("search_vector"), query))
+            .order_by("-search_rank", "id")
+        )
+
+
+class TenderQuerySet(SearchQuerySet):
+    """
+    A tender is closed once it has an award or its deadline passed before
+    today, and open otherwise.
+    """
+
+    search_fields = ["title", "organization", "notice_type"]
+
+    @staticmethod
+    def has_award():
+        return models.Exists(Award.objects.filter(tender=models.OuterRef("pk")))
+
+    def closed(self):
+        return self.filter(
+            models.Q(self.has_award()) | models.Q(deadline__lt=date.today())
+        )
+
+    def open(self):
+        return self.filter(
+            ~self.has_award(),
+            models.Q(deadline__isnull=True) | models.Q(deadline__gte=date.today()),
+        )
+
+    @staticmethod
+    def is_expired(now=None):
+        """Condition of the tenders whose deadline passed, up to `now`"""
+        return models.Q(deadline__lt=now or timezone.now())
+
+    def expired(self, now=None):
+        return self.filter(self.is_expired(now))
+
+
 class Tender(BaseTimedModel):
     reference = models.CharField(unique=True, max_length=255)
     notice_type = models.CharField(null=True, max_length=255)
@@ -93,6 +169,9 @@ class Tender(BaseTimedModel):
     has_keywords = models.BooleanField(default=False)
     notified = models.BooleanField(default=False)
     url = models.CharField(max_length=255)
+    # Validator or hash of the notice page when it was last parsed, see
+    # app.parsers.ungm_fetcher
+    page_fingerprint = models.CharField(max_length=255, blank=True, default="")
     hidden = models.BooleanField(default=False)
     source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
     unspsc_codes = models.CharField(max_length=1024, null=True, blank=True)
@@ -102,6 +181,15 @@ class Tender(BaseTimedModel):
     )
     keywords = models.ManyToManyField(Keyword, related_name="tenders", blank=True)
 
+    objects = TenderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                TenderQuerySet.search_vector(), name="app_tender_search_vector_idx"
+            ),
+        ]
+
     tags = models.ManyToManyField(Tag, blank=True)
     followers = models.ManyToManyField(
         User,
@@ -125,44 +213,40 @@ class Tender(BaseTimedModel):
 
     @cached_property
     def marked_keyword_title(self):
-        keywords = Keyword.get_values_list()
-        title = self.title or ""
-        if not keywords:
-            return title
-
-        regex = r"(" + r"|".join(keywords) + r")"
-        return re.sub(regex, r"<mark>\1</mark>", title, flags=re.IGNORECASE)
+        return keyword_matcher().mark(self.title)
 
     @cached_property
     def marked_keyword_description(self):
-        keywords = Keyword.get_values_list()
-        description = self.description or ""
-        if not keywords:
-            return description
-
-        regex = r"(" + r"|".join(keywords) + r")"
-        return re.sub(regex, r"<mark>\1</mark>", description, flags=re.IGNORECASE)
+        return keyword_matcher().mark(self.description)
 
     def find_keywords(self, fields):
         """
         Return queryset with all Keyword objects whose value was found in the
         text of any of the fields.
         """
-        found_keywords = []
+        return Keyword.objects.filter(id__in=self.find_keyword_ids(fields))
 
+    def find_keyword_ids(self, fields):
+        matcher = keyword_matcher()
+        found_keywords = set()
         for field in fields:
-            field_content = getattr(self, field)
-            found_keywords += keywords_in(field_content)
+            found_keywords.update(matcher.find(getattr(self, field)))
+        return [matcher.ids[value] for value in found_keywords]
 
-        return Keyword.objects.filter(value__in=found_keywords)
+    @cached_property
+    def followers_count(self):
+        return self.followers.count()
 
     def is_favorite_of(self, user):
         return self.followers.filter(id=user.id).exists()
 
     def save(self, *args, **kwargs):
-        keywords = list(self.find_keywords(fields))
+        keywords = self.find_keyword_ids(fields)
         if keywords:
             self.has_keywords = True
+        # The row may no longer match the page, which is parsed again on the
+        # next import (the imports save the tenders in bulk)
+        self.page_fingerprint = ""
         super().save(*args, **kwargs)
         self.keywords.set(keywords)
 
@@ -189,12 +273,25 @@ class Favorite(BaseTimedModel):
         )
 
 
+class VendorQuerySet(SearchQuerySet):
+    search_fields = ["name", "contact_name"]
+
+
 class Vendor(BaseTimedModel):
     name = models.CharField(null=False, blank=False, max_length=255)
     email = models.EmailField(null=True, blank=True)
     contact_name = models.CharField(null=True, blank=True, max_length=255)
     comment = models.TextField(null=True, blank=True)
 
+    objects = VendorQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                VendorQuerySet.search_vector(), name="app_vendor_search_vector_idx"
+            ),
+        ]
+
     def __str__(self):
         return "{}".format(self.name)
 
@@ -202,6 +299,36 @@ class Vendor(BaseTimedModel):
         return reverse("vendor_detail_view", kwargs={"pk": self.pk})
 
 
+class AwardQuerySet(models.QuerySet):
+    def search(self, terms):
+        """
+        Filter the awards whose tender or one of whose vendors match the
+        terms, ranked by the relevance of the tender.
+        """
+        query = search_query(terms)
+        if query is None:
+            return self.none()
+        vendor_awards = Award.vendors.through.objects.filter(
+            vendor__in=Vendor.objects.search(terms).values("id")
+        )
+        return (
+            self.filter(
+                models.Q(tender__in=Tender.objects.search(terms).values("id"))
+                | models.Q(id__in=vendor_awards.values("award_id"))
+            )
+            .annotate(
+                search_rank=SearchRank(
+                    SearchVector(
+                        *[f"tender__{f}" for f in TenderQuerySet.search_fields],
+                        config="simple",
+                    ),
+                    query,
+                )
+            )
+            .order_by("-search_rank", "id")
+        )
+
+
 class Award(BaseTimedModel):
     value = models.FloatField(null=True)
     currency = models.CharField(null=True, max_length=3)
@@ -213,12 +340,15 @@ class Award(BaseTimedModel):
     tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name="awards")
     vendors = models.ManyToManyField("Vendor", related_name="awards")
 
+    objects = AwardQuerySet.as_manager()
+
     def __str__(self):
         return "{} WON BY {}".format(self.tender.title, self.get_vendors)
 
     @property
     def get_vendors(self):
-        return ",".join(self.vendors.values_list("name", flat=True))
+        # Reads the prefetched vendors, see AwardDoc.get_queryset
+        return ",".join(vendor.name for vendor in self.vendors.all())
 
     get_vendors.fget.short_description = "Vendors names"
 
@@ -226,19 +356,33 @@ class Award(BaseTimedModel):
         return str(self.value)
 
 
+class DocumentText(BaseTimedModel):
+    """
+    Text extracted from a document file, shared by the documents with the
+    same file content. See app.extraction.
+    """
+    content_hash = models.CharField(primary_key=True, max_length=64)
+    text = models.TextField(null=True)
+
+
 class TenderDocument(BaseTimedModel):
     name = models.CharField(null=True, max_length=255)
     download_url = models.CharField(max_length=255)
     tender = models.ForeignKey(Tender, on_delete=models.CASCADE)
     document = models.FileField(upload_to="documents", max_length=300)
+    document_text = models.ForeignKey(
+        DocumentText,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="documents",
+    )
 
     def content(self):
-        try:
-            parsed = parser.from_file(self.document.path)
-            return parsed["content"]
-        except (ValueError, FileNotFoundError) as e:
-            logging.warning(e)
-            pass
+        """The stored text of the document, None until it is extracted"""
+        if self.document_text_id:
+            return self.document_text.text
+        return None
 
     class Meta:
         unique_together = (
@@ -356,3 +500,47 @@ class TEDReleaseCalendar(BaseTimedModel):
     @property
     def full_oj_s(self):
         return self.year + str(self.oj_s).zfill(5)
+
+
+class TEDRenewalLookup(BaseTimedModel):
+    """
+    The contract duration found for a TED notice by
+    `TEDParser.find_renewal_date`, keyed by OJ notice number. A lookup
+    without a duration is a negative result, retried once it is older than
+    TED_RENEWAL_LOOKUP_TTL days.
+    """
+
+    notice_number = models.CharField(max_length=255, unique=True)
+    duration = models.CharField(null=True, max_length=255)
+    unit = models.CharField(null=True, max_length=255)
+
+    class Meta:
+        verbose_name = "TED renewal lookup"
+        verbose_name_plural = "TED renewal lookups"
+
+    def __str__(self):
+        return "{}".format(self.notice_number)
+
+
+class IndexQueue(models.Model):
+    """
+    An object waiting to be indexed in Elasticsearch, see app.indexing
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.IntegerField()
+    # First change since the object was last indexed
+    queued_at = models.DateTimeField()
+    # Last change, an object changed while being indexed stays queued
+    changed_at = models.DateTimeField()
+    available_at = models.DateTimeField()
+    attempts = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("model", "object_id")
+        indexes = [
+            models.Index(fields=["queued_at"]),
+            models.Index(fields=["available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
@@ -0,0 +1,131 @@
+"""
+Local store of the downloaded TED daily archives.
+
+Archives are kept on disk under their OJ S number
+(`TEDReleaseCalendar.full_oj_s`) after being parsed, so that the next import
+or re-scrape of the same days reuses them instead of downloading them again.
+Each archive has a checksum file written when it is added, which is checked
+before the archive is reused. The least recently used archives are evicted
+once the store grows over the TED_ARCHIVE_STORE_SIZE setting.
+"""
+import logging
+import os
+from datetime import datetime
+
+from django.conf import settings
+
+from app.parsers.downloader import PARTIAL_SUFFIX
+from app.utils import file_digest
+
+CHECKSUM_SUFFIX = ".sha256"
+
+
+class ArchiveStore:
+    def __init__(self, path, max_size=None):
+        self.path = path
+        if max_size is None:
+            max_size = settings.TED_ARCHIVE_STORE_SIZE * 1024 * 1024
+        self.max_size = max_size
+
+    def file_path(self, name):
+        return os.path.join(self.path, name)
+
+    def checksum_path(self, name):
+        return self.file_path(name) + CHECKSUM_SUFFIX
+
+    def add(self, name):
+        """
+        Record the checksum of a downloaded archive and return its path.
+        """
+        file_path = self.file_path(name)
+        with open(self.checksum_path(name), "w") as f:
+            f.write(f"{file_digest(file_path)} {os.path.getsize(file_path)}")
+        return file_path
+
+    def get(self, name):
+        """
+        Return the path of the stored archive, or None when it is not stored
+        or fails the integrity check, in which case it is removed.
+        """
+        file_path = self.file_path(name)
+        if not os.path.isfile(file_path):
+            return None
+        if not self.verify(name):
+            logging.warning(f"Stored archive {name} is corrupted, removing it.")
+            self.remove(name)
+            return None
+        # The modification time orders the archives for eviction
+        os.utime(file_path)
+        return file_path
+
+    def verify(self, name):
+        try:
+            with open(self.checksum_path(name), "r") as f:
+                digest, size = f.read().split()
+            file_path = self.file_path(name)
+            return os.path.getsize(file_path) == int(size) and (
+                file_digest(file_path) == digest
+            )
+        except (OSError, ValueError):
+            return False
+
+    def remove(self, name):
+        for file_path in (self.file_path(name), self.checksum_path(name)):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        """
+        Return (name, size, last used) tuples for the stored archives, least
+        recently used first. Anything else left in the folder, like a
+        directory, is not an archive and is skipped.
+        """
+        if not os.path.isdir(self.path):
+            return []
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith((CHECKSUM_SUFFIX, PARTIAL_SUFFIX)):
+                continue
+            file_path = self.file_path(name)
+            if not os.path.isfile(file_path):
+                continue
+            stat = os.stat(file_path)
+            entries.append(
+                (name, stat.st_size, datetime.fromtimestamp(stat.st_mtime))
+            )
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_size=None):
+        """
+        Remove the least recently used archives until the store fits in
+        `max_size` bytes, and return the names of the removed archives.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        removed = []
+        for name, size, _ in entries:
+            if total_size <= max_size:
+                break
+            self.remove(name)
+            total_size -= size
+            removed.append(name)
+        return removed
+
+    def prune(self, max_size=None):
+        """
+        Remove the archives failing the integrity check, then evict down to
+        `max_size` bytes. Return the names of the removed archives.
+        """
+        removed = []
+        for name, _, _ in self.entries():
+            if not self.verify(name):
+                self.remove(name)
+                removed.append(name)
+        return removed + self.evict(max_size)
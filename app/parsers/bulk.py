@@ -0,0 +1,123 @@
+"""
+Batched persistence for the parsers.
+
+`save_tenders` creates or updates a chunk of parsed tenders with a handful of
+queries, instead of the `filter().first()` + `update_or_create` + `save()`
+round trips per tender, and queues the chunk for indexing in Elasticsearch
+(see app/indexing.py).
+"""
+from itertools import islice
+
+from django.utils import timezone
+
+from app.indexing import queue_index
+from app.models import Tender, fields
+
+CHUNK_SIZE = 500
+
+
+def chunked(iterable, size=CHUNK_SIZE):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def attr_changes(tender_dict, old_tender):
+    """
+    Return the (old value, new value) pairs of the attributes of the tender
+    dict that differ from the old tender.
+    """
+    changes = {}
+    for attr, value in tender_dict.items():
+        old_value = getattr(old_tender, str(attr), None)
+        if str(value) != str(old_value):
+            changes.update({attr: (old_value, value)})
+    return changes
+
+
+def save_tenders(items):
+    """
+    Create or update the tenders of a chunk of (tender dict, defaults) pairs,
+    the defaults being the values written to the row.
+
+    Return a (tender, created, attr_changes) tuple for every pair, in order,
+    the same as calling `update_or_create` for each of them after loading the
+    old row: a reference seen earlier in the chunk is an update of the tender
+    written for it.
+    """
+    references = set(tender_dict["reference"] for tender_dict, _ in items)
+    existing = {
+        tender.reference: tender
+        for tender in Tender.objects.filter(reference__in=references)
+    }
+
+    tenders = {}
+    update_fields = set()
+    results = []
+    for tender_dict, defaults in items:
+        reference = tender_dict["reference"]
+        tender = tenders.get(reference) or existing.get(reference)
+        created = tender is None
+        changes = attr_changes(tender_dict, tender)
+
+        if created:
+            tender = Tender(**defaults)
+        else:
+            for attr, value in defaults.items():
+                setattr(tender, attr, value)
+        tenders[reference] = tender
+        update_fields.update(defaults)
+        results.append((tender, created, changes))
+
+    # Same as Tender.save
+    tender_keywords = {}
+    for reference, tender in tenders.items():
+        keyword_ids = tender.find_keyword_ids(fields)
+        if keyword_ids:
+            tender.has_keywords = True
+        tender_keywords[reference] = keyword_ids
+    update_fields.add("has_keywords")
+
+    new_tenders = [t for r, t in tenders.items() if r not in existing]
+    old_tenders = [t for r, t in tenders.items() if r in existing]
+    if new_tenders:
+        # Tenders added by a concurrent import in the meantime are updated
+        Tender.objects.bulk_create(
+            new_tenders,
+            update_conflicts=True,
+            unique_fields=["reference"],
+            update_fields=sorted(update_fields | {"updated_at"}),
+        )
+        # The primary keys are not set by bulk_create when updating conflicts
+        ids = dict(
+            Tender.objects.filter(
+                reference__in=[t.reference for t in new_tenders]
+            ).values_list("reference", "id")
+        )
+        for tender in new_tenders:
+            tender.id = ids[tender.reference]
+    if old_tenders:
+        now = timezone.now()
+        for tender in old_tenders:
+            tender.updated_at = now
+        Tender.objects.bulk_update(
+            old_tenders, sorted(update_fields | {"updated_at"})
+        )
+
+    through = Tender.keywords.through
+    through.objects.filter(tender__in=tenders.values()).delete()
+    through.objects.bulk_create(
+        [
+            through(tender_id=tenders[reference].id, keyword_id=keyword_id)
+            for reference, keyword_ids in tender_keywords.items()
+            for keyword_id in keyword_ids
+        ]
+    )
+
+    # Saved without signals
+    queue_index(Tender, [tender.id for tender in tenders.values()])
+
+    return results
@@ -0,0 +1,165 @@
+"""
+Concurrent download of TED archives.
+
+`ArchiveDownloader` fetches several archives at once over one pooled session,
+streams each of them to disk in chunks and resumes a download from its
+partial file. The requests made to the server are spaced out by a shared
+`TokenBucket` instead of a random sleep before every request.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHUNK_SIZE = 1024 * 1024
+PARTIAL_SUFFIX = ".part"
+
+
+class TokenBucket:
+    """
+    Allow `rate` requests per second on average, with bursts of up to
+    `capacity` requests, across all the threads sharing the bucket.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ArchiveDownloader:
+    def __init__(self, base_url, path, workers=None, rate=None, burst=None):
+        self.base_url = base_url
+        self.path = path
+        self.workers = max(workers or settings.TED_DOWNLOAD_WORKERS, 1)
+        self.bucket = TokenBucket(
+            rate or settings.TED_DOWNLOAD_RATE, burst or settings.TED_DOWNLOAD_BURST
+        )
+        self.timeout = settings.TED_DOWNLOAD_TIMEOUT
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=3, backoff_factor=2, status_forcelist=(429, 500, 502, 503, 504)
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.workers, max_retries=retry
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def download(self, name):
+        """
+        Download the archive to `path`/`name` and return the file path and the
+        number of bytes transferred.
+
+        The body is written to a partial file first and renamed once complete,
+        so an interrupted download is resumed with a range request.
+        """
+        file_path = os.path.join(self.path, name)
+        partial_path = file_path + PARTIAL_SUFFIX
+        offset = (
+            os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        )
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        self.bucket.acquire()
+        url = urljoin(self.base_url, name)
+        with self.session.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if offset and response.status_code == 416:
+                # The partial file already holds the whole archive
+                os.replace(partial_path, file_path)
+                return file_path, 0
+            response.raise_for_status()
+            if response.status_code != 206:
+                # The server ignored the range, start over
+                offset = 0
+
+            transferred = 0
+            with open(partial_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    transferred += len(chunk)
+
+            # The length is only known for bodies which are not decoded
+            expected = response.headers.get("Content-Length")
+            encoded = response.headers.get("Content-Encoding")
+            if expected and not encoded and transferred != int(expected):
+                # Keep the partial file for the next attempt to resume
+                raise IOError(
+                    f"Incomplete download, {transferred} of {expected} bytes"
+                )
+
+        os.replace(partial_path, file_path)
+        return file_path, transferred
+
+    def download_all(self, names):
+        """
+        Download the archives concurrently and return the paths of the ones
+        downloaded successfully, in the order of the names. Failed downloads
+        are logged and skipped.
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+        os.makedirs(self.path, exist_ok=True)
+
+        start = time.monotonic()
+        total_bytes = 0
+        file_paths = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.timed_download, name) for name in names]
+            for name, future in zip(names, futures):
+                try:
+                    file_path, transferred, elapsed = future.result()
+                except Exception as e:
+                    logging.error(f"Downloading {name} failed: {e}")
+                    continue
+                total_bytes += transferred
+                file_paths.append(file_path)
+                logging.warning(
+                    f"Downloaded {name}: {format_throughput(transferred, elapsed)}"
+                )
+
+        logging.warning(
+            f"Downloaded {len(file_paths)} out of {len(names)} archives: "
+            f"{format_throughput(total_bytes, time.monotonic() - start)}"
+        )
+        return file_paths
+
+    def timed_download(self, name):
+        start = time.monotonic()
+        file_path, transferred = self.download(name)
+        return file_path, transferred, time.monotonic() - start
+
+
+def format_throughput(transferred, elapsed):
+    megabytes = transferred / (1024 * 1024)
+    return (
+        f"{megabytes:.1f} MB in {elapsed:.1f}s "
+        f"({megabytes / max(elapsed, 0.001):.2f} MB/s)"
+    )
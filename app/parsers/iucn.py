@@ -22,6 +22,7 @@ from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFSyntaxError
 
 from app.models import Tender, Award, Vendor, WorkerLog, TenderDocument
+from app.parsers.bulk import save_tenders
 from app.utils import transform_vendor_name
 
 
@@ -232,22 +233,10 @@ class IUCNWorker:
 
     @staticmethod
     def save_tender(tender_dict, doc_links) :
-        old_tender = Tender.objects.filter(
-            reference=tender_dict['reference']).first()
-        new_tender, created = Tender.objects.update_or_create(
-            reference=tender_dict['reference'],
-            defaults=tender_dict,
-        )
-
-        if old_tender and old_tender.notified:
-            new_tender.notified = True
-            new_tender.save()
-
-        attr_changes = {}
-        for attr, value in [(k, v) for (k, v) in tender_dict.items()]:
-            old_value = getattr(old_tender, str(attr), None)
-            if str(value) != str(old_value):
-                attr_changes.update({attr: (old_value, value)})
+        # The notified flag of an existing tender is kept, as it is not part
+        # of the written fields
+        [(new_tender, created, attr_changes)] = save_tenders(
+            [(tender_dict, tender_dict)])
 
         new_docs = []
         tender_doc = None
@@ -1,29 +1,38 @@
 import csv
 import io
 import logging
+import multiprocessing
 import os
 import tarfile
 import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from random import randint
 from typing import List, Tuple
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup, element, PageElement
+from bs4 import BeautifulSoup, element
 from datetime import date, datetime, timedelta
 from django.conf import settings
 from ftplib import error_perm, FTP
+from django.db.models import Q
 from django.db.models.functions import ExtractYear
+from django.utils import timezone
 from django.utils.timezone import make_aware
 
 from app.exceptions import CPVCodesNotFound, TEDCountriesNotFound
+from app.parsers.archive_store import ArchiveStore
+from app.parsers.bulk import chunked, save_tenders
+from app.parsers.downloader import ArchiveDownloader
+from app.parsers.ted_lxml import LxmlNotice, NoticeHeader
+from app.reference_data import reference_data
 from app.models import (
     TEDReleaseCalendar,
+    TEDRenewalLookup,
     WorkerLog,
     Tender,
     Award,
-    CPVCode,
-    TedCountry,
     Vendor,
 )
 from dateutil.relativedelta import relativedelta
@@ -42,43 +51,64 @@ def quit_or_close(ftp):
 
 
 class TEDWorker:
-    archives = []
-
     def __init__(self, last_ted_update=None):
         self.path = get_archives_path()
         if not last_ted_update:
             last_ted_update = date.today()
         self.last_ted_update = last_ted_update
+        self.archives = []
+        # The tenders to update from each archive, when only some are scraped
+        self.archive_tenders = {}
 
         self.get_archive_url = urljoin(
             "https://" + settings.TED_URL, settings.TED_DAILY
         )
+        self.downloader = ArchiveDownloader(self.get_archive_url, self.path)
+        self.store = ArchiveStore(self.path)
 
     def download_tender_archive(self, tenders):
-        tender_count = tenders.count()
-        downloaded = 0
+        """
+        Download the archives the tenders were published in, once for every
+        publication date, and remember which tenders each archive updates.
+        """
+        tenders_by_date = defaultdict(list)
+        for tender in tenders:
+            if tender.published:
+                tenders_by_date[tender.published].append(tender)
+        if not tenders_by_date:
+            return
+
         years_set = set(
             TEDReleaseCalendar.objects.annotate(year=ExtractYear("date"))
             .order_by()
             .values_list("year", flat=True)
             .distinct()
         )
-        for tender in tenders:
+        years = sorted(set(d.year for d in tenders_by_date) - years_set)
+        if years:
+            self.update_release_calendar(years)
 
-            if tender.published.year not in years_set:
-                self.update_release_calendar([tender.published.year])
+        calendar = {}
+        for archive in TEDReleaseCalendar.objects.filter(
+            date__in=list(tenders_by_date)
+        ):
+            calendar.setdefault(archive.date, archive)
 
-            archive = TEDReleaseCalendar.objects.filter(date=tender.published).first()
+        archives = {}
+        archive_tenders = defaultdict(list)
+        for published, date_tenders in tenders_by_date.items():
+            archive = calendar.get(published)
             if archive:
-                try:
-                    self.download_archive(archive)
-                    downloaded += 1
-                    logging.warning(
-                        f"Downloaded {downloaded} out of "
-                        f"{tender_count} tender archives."
-                    )
-                except Exception as e:
-                    logging.error(e, exc_info=True)
+                archives[archive.full_oj_s] = archive
+                archive_tenders[archive.full_oj_s] += date_tenders
+
+        logging.warning(
+            f"Downloading {len(archives)} archives for "
+            f"{sum(len(t) for t in tenders_by_date.values())} tenders."
+        )
+        for file_path in self.download_archives(archives.values()):
+            name = os.path.basename(file_path)
+            self.archive_tenders[file_path] = archive_tenders[name]
 
     def download_latest_archives(self):
         """
@@ -108,8 +138,7 @@ class TEDWorker:
             TEDReleaseCalendar.objects.order_by("date").filter(date__in=dates).all()
         )
 
-        for archive in daly_archives:
-            self.download_archive(archive)
+        self.download_archives(daly_archives)
 
     def download_daily_archives(self):
         years_set = set(
@@ -126,17 +155,30 @@ class TEDWorker:
             self.download_archive(archive)
 
     def download_archive(self, archive):
+        self.download_archives([archive])
 
-        if not os.path.exists(self.path):
-            os.makedirs(self.path)
-        file_path = os.path.join(self.path, archive.full_oj_s)
-        url = urljoin(self.get_archive_url, archive.full_oj_s)
-        with open(file_path, "wb") as f:
-            time.sleep(randint(2, 5))
-            response = requests.get(url)
-            print(response.status_code, file_path)
-            f.write(response.content)
-        self.archives.append(file_path)
+    def download_archives(self, archives):
+        """
+        Download the archives of the release calendar entries concurrently,
+        reusing the ones in the local store, and add them to the archives to
+        parse.
+        """
+        stored = {
+            name: self.store.get(name)
+            for name in dict.fromkeys(archive.full_oj_s for archive in archives)
+        }
+        missing = [name for name, file_path in stored.items() if not file_path]
+        if len(missing) < len(stored):
+            logging.warning(
+                f"Reusing {len(stored) - len(missing)} stored archives."
+            )
+        for file_path in self.downloader.download_all(missing):
+            name = os.path.basename(file_path)
+            stored[name] = self.store.add(name)
+
+        file_paths = [file_path for file_path in stored.values() if file_path]
+        self.archives.extend(p for p in file_paths if p not in self.archives)
+        return file_paths
 
     def parse_notices(
         self, tenders=None, set_notified=False
@@ -144,19 +186,19 @@ class TEDWorker:
         """
         Parse an archive file, extract all tender data from it and use it to
         update existing tenders or create new ones.
+
+        An archive downloaded for some of the tenders is only parsed for them.
         """
         if tenders is None:
             tenders = []
         all_updated_tenders = []
-        folders = []
         total_created_tenders = 0
         for archive_path in self.archives:
-            folder_name = self.extract_data(archive_path, self.path)
+            folder_name = self.archive_folder_name(archive_path)
             if folder_name:
-                folders.append(folder_name)
-                p = TEDParser(self.path, [folder_name])
+                p = TEDParser(archives=[archive_path])
                 updated_tenders, num_created_tenders = p.parse_notices(
-                    tenders, set_notified
+                    self.archive_tenders.get(archive_path, tenders), set_notified
                 )
                 all_updated_tenders += updated_tenders
                 total_created_tenders += num_created_tenders
@@ -166,32 +208,24 @@ class TEDWorker:
                 )
                 logging.warning(f"Date {formatted_date} parsed successfully")
 
-        for archive_path in self.archives:
-            try:
-                if archive_path:
-                    os.remove(archive_path)
-            except OSError as e:
-                logging.warning(e)
-                pass
-
-        for folder in folders:
-            try:
-                if folder:
-                    os.rmdir(os.path.join(self.path, folder))
-            except OSError as e:
-                logging.warning(e)
-                pass
+        evicted = self.store.evict()
+        if evicted:
+            logging.warning(f"Evicted {len(evicted)} archives from the store.")
 
         return all_updated_tenders, total_created_tenders
 
     @staticmethod
-    def extract_data(archive_path, extract_path):
+    def archive_folder_name(archive_path):
+        """
+        Return the name of the folder the archive members live in, reading
+        only the header of the first member.
+        """
         try:
-            tf = tarfile.open(archive_path, "r:gz")
-            tf.extractall(extract_path)
-            # Return the name of the folder containing the extracted files
-            return tf.getnames()[0].split("/")[0]
-        except (EOFError, FileNotFoundError) as e:
+            with tarfile.open(archive_path, "r|gz") as tf:
+                member = tf.next()
+                if member:
+                    return member.name.split("/")[0]
+        except (EOFError, FileNotFoundError, tarfile.ReadError) as e:
             logging.warning(e)
 
         return
@@ -232,9 +266,10 @@ class TEDWorker:
 
 
 class TEDParser(object):
-    def __init__(self, path="", folder_names=[]):
-        self.CPV_CODES = [x.code for x in CPVCode.objects.all()]
-        self.TED_COUNTRIES = [x.name for x in TedCountry.objects.all()]
+    def __init__(self, path="", folder_names=[], archives=[]):
+        reference = reference_data()
+        self.CPV_CODES = reference.cpv_codes
+        self.TED_COUNTRIES = reference.ted_countries
 
         if not self.CPV_CODES:
             raise CPVCodesNotFound("CPV Codes not found.")
@@ -248,6 +283,10 @@ class TEDParser(object):
             for xml_file in os.listdir(os.path.join(path, folder))
         ]
         self.folders = [os.path.join(path, folder) for folder in folder_names]
+        self.archives = archives
+        # Number of rejected notices, by reason
+        self.rejected_notices = Counter()
+        self.renewal_lookups = RenewalLookups()
 
     def _parse_notice(
         self, content, tenders_to_update, xml_file, codes, set_notified
@@ -264,13 +303,16 @@ class TEDParser(object):
             # Update mode: we only care about updating the tenders on the list,
             # new tenders will not be created. Therefore, if the tender this
             # file is about is not in the list, the file is irrelevant.
-            try:
-                self.xml_files.remove(xml_file)
-                os.remove(xml_file)
-            except ValueError:
-                pass
             raise StopIteration
 
+        reason = self.prefilter_notice(content)
+        if reason:
+            self.rejected_notices[reason] += 1
+            raise StopIteration
+
+        if settings.TED_PARSER_ENGINE == "lxml":
+            return self._parse_notice_lxml(content, xml_file, codes, set_notified)
+
         soup = BeautifulSoup(content, "html.parser")
 
         cpv_elements = soup.find_all("cpv_code") or soup.find_all("original_cpv")
@@ -297,19 +339,8 @@ class TEDParser(object):
         else:
             auth_type = ""
 
-        accept_notice = (
-            cpv_codes & set(self.CPV_CODES)
-            and (doc_type in settings.TED_DOC_TYPES)
-            and country in self.TED_COUNTRIES
-            and (auth_type == settings.TED_AUTH_TYPE)
-        )
-
-        if not accept_notice:
-            try:
-                self.xml_files.remove(xml_file)
-                os.remove(xml_file)
-            except ValueError:
-                pass
+        if not self.accept_notice(cpv_codes, doc_type, country, auth_type):
+            self.rejected_notices["other"] += 1
             raise StopIteration
         else:
             codes[xml_file] = cpv_codes
@@ -415,51 +446,222 @@ class TEDParser(object):
 
         tender["source"] = "TED"
 
+        if tender["notice_type"] == "Contract notice":
+            try:
+                self.renewal_lookups.add(
+                    soup.find("no_doc_ojs").text, *self.contract_duration(soup)
+                )
+            except (AttributeError, KeyError):
+                pass
+
         awards = []
         if tender["notice_type"] == "Contract award":
-            self.update_contract_award_awards(awards, soup, set_notified)
+            self.update_contract_award_awards(
+                awards, soup, set_notified, self.lookup_renewal_date
+            )
 
         if tender["notice_type"] == "Contract award notice":
-            self.update_contract_award_notice_awards(awards, soup, set_notified)
+            self.update_contract_award_notice_awards(
+                awards, soup, set_notified, self.lookup_renewal_date
+            )
 
         return tender, awards
 
+    def _parse_notice_lxml(
+        self, content, xml_file, codes, set_notified
+    ) -> Tuple[dict, List[dict]]:
+        notice = LxmlNotice(content)
+
+        cpv_codes = notice.cpv_codes()
+        if not self.accept_notice(
+            cpv_codes, notice.doc_type(), notice.country(), notice.auth_type()
+        ):
+            self.rejected_notices["other"] += 1
+            raise StopIteration
+        else:
+            codes[xml_file] = cpv_codes
+
+        tender = notice.tender()
+
+        if tender["notice_type"] == "Contract notice":
+            try:
+                self.renewal_lookups.add(
+                    notice.notice_number(), *notice.contract_duration()
+                )
+            except (AttributeError, KeyError):
+                pass
+
+        awards = []
+        if tender["notice_type"] == "Contract award":
+            awards = notice.contract_award_awards(
+                set_notified, self.lookup_renewal_date
+            )
+
+        if tender["notice_type"] == "Contract award notice":
+            awards = notice.contract_award_notice_awards(
+                set_notified, self.lookup_renewal_date
+            )
+
+        return tender, awards
+
+    def prefilter_notice(self, content):
+        """
+        Check a notice against the same criteria as `accept_notice`, reading
+        only its header. Return the reason the notice is rejected, or None if
+        it has to be fully parsed.
+        """
+        header = NoticeHeader(content)
+        if header.doc_type is not None and (
+            header.doc_type not in settings.TED_DOC_TYPES
+        ):
+            return "doc_type"
+        if header.auth_type is not None and header.auth_type != settings.TED_AUTH_TYPE:
+            return "auth_type"
+        if header.country is not None and header.country not in self.TED_COUNTRIES:
+            return "country"
+        if header.cpv_codes is not None and not header.cpv_codes & self.CPV_CODES:
+            return "cpv_code"
+        return None
+
+    def accept_notice(self, cpv_codes, doc_type, country, auth_type):
+        return (
+            cpv_codes & self.CPV_CODES
+            and (doc_type in settings.TED_DOC_TYPES)
+            and country in self.TED_COUNTRIES
+            and (auth_type == settings.TED_AUTH_TYPE)
+        )
+
+    @staticmethod
+    def notice_reference(xml_file):
+        return os.path.basename(xml_file).replace("_", "-").replace(".xml", "")
+
     @staticmethod
     def file_in_tender_list(xml_file, tenders):
         tender_references = [t.reference for t in tenders]
-        return (
-            os.path.basename(xml_file).replace("_", "-").replace(".xml", "")
-            in tender_references
-        )
+        return TEDParser.notice_reference(xml_file) in tender_references
+
+    def iter_notices(self, tenders_to_update):
+        """
+        Yield a (file name, content) pair for every notice, first from the
+        extracted folders and then straight from the archive members.
+
+        In update mode, notices about tenders which are not on the list are
+        skipped by name, without reading their content.
+        """
+        references = None
+        if tenders_to_update:
+            references = {t.reference for t in tenders_to_update}
+
+        for xml_file in self.xml_files:
+            if references is None or self.notice_reference(xml_file) in references:
+                with open(xml_file, "r") as f:
+                    content = f.read()
+                yield xml_file, content
+            os.remove(xml_file)
+
+        for archive_path in self.archives:
+            yield from self.iter_archive_notices(archive_path, references)
+
+    def iter_archive_notices(self, archive_path, references=None):
+        """
+        Stream the members of a daily .tar.gz archive, without extracting it
+        to disk.
+        """
+        try:
+            with tarfile.open(archive_path, "r|gz") as tf:
+                for member in tf:
+                    if not member.isfile():
+                        continue
+                    if (
+                        references is not None
+                        and self.notice_reference(member.name) not in references
+                    ):
+                        continue
+                    # Decode like open(..., "r") would, with universal newlines
+                    data = io.BytesIO(tf.extractfile(member).read())
+                    with io.TextIOWrapper(data, encoding="utf-8") as f:
+                        content = f.read()
+                    yield member.name, content
+        except (EOFError, FileNotFoundError, tarfile.ReadError) as e:
+            logging.warning(e)
+
+    def parse_notice(self, xml_file, content, tenders, set_notified):
+        """
+        Return a (tender dict, award dicts, CPV codes) tuple for an accepted
+        notice, or None.
+        """
+        codes = {}
+        try:
+            tender_dict, awards = self._parse_notice(
+                content, tenders, xml_file, codes, set_notified
+            )
+        except StopIteration:
+            return None
+        return tender_dict, awards, codes.get(xml_file, [])
+
+    def iter_parsed_notices(self, tenders, set_notified):
+        """
+        Yield the parsed accepted notices, in archive order. When the
+        TED_PARSER_WORKERS setting is greater than 1, the notices are parsed
+        by a pool of processes, except in daemonic processes like the
+        Django-Q workers, which cannot start children of their own.
+        """
+        workers = settings.TED_PARSER_WORKERS
+        if workers > 1 and multiprocessing.current_process().daemon:
+            logging.warning(
+                "Parsing the TED notices in one process instead of "
+                f"{workers}: a daemonic process cannot start a pool"
+            )
+            workers = 1
+        if workers <= 1:
+            for xml_file, content in self.iter_notices(tenders):
+                parsed_notice = self.parse_notice(
+                    xml_file, content, tenders, set_notified
+                )
+                if parsed_notice:
+                    yield parsed_notice
+            return
+
+        # Forked workers inherit the parser, with its CPV codes and countries,
+        # once instead of receiving it with every notice.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_notice_worker,
+            initargs=(self, tenders, set_notified),
+        ) as executor:
+            # Keep a bounded number of notices in flight, collecting the
+            # results in submission order
+            pending = deque()
+            for notice in self.iter_notices(tenders):
+                pending.append(executor.submit(parse_notice_in_worker, notice))
+                if len(pending) >= workers * 4:
+                    yield from self.collect_parsed_notice(pending.popleft())
+            while pending:
+                yield from self.collect_parsed_notice(pending.popleft())
+
+    def collect_parsed_notice(self, future):
+        parsed_notice, rejected_notices, renewal_lookups = future.result()
+        self.rejected_notices.update(rejected_notices)
+        self.renewal_lookups.merge(*renewal_lookups)
+        if parsed_notice:
+            yield parsed_notice
 
     def parse_notices(
         self, tenders: List[dict], set_notified: bool
     ) -> Tuple[List[Tuple[dict, dict]], int]:
         changed_tenders = []
-        codes = {}
         num_created_tenders = 0
 
-        # self.xml_files[:] is used instead of self.xml_files because as we are
-        # iterating over the list, we"re deleting it"s entries if they doesn't
-        # match our criteria changing it would result in a failure of deleting
-        # all subsequent files when the iteration ends
-
-        for xml_file in self.xml_files[:]:
-            with open(xml_file, "r") as f:
-                try:
-                    tender_dict, awards = self._parse_notice(
-                        f.read(), tenders, xml_file, codes, set_notified
-                    )
-                except StopIteration:
-                    continue
-
-                created, attr_changes = self.save_tender(
-                    tender_dict, codes.get(xml_file, [])
-                )
-
+        for parsed_notices in chunked(self.iter_parsed_notices(tenders, set_notified)):
+            saved_tenders = self.save_tenders(parsed_notices)
+            self.renewal_lookups.save()
+            for (tender_dict, awards, _), (tender, created, attr_changes) in zip(
+                parsed_notices, saved_tenders
+            ):
                 if awards:
                     for award_dict in awards:
-                        self.save_award(tender_dict, award_dict)
+                        self.save_award(tender_dict, award_dict, tender)
 
                 if created:
                     num_created_tenders += 1
@@ -467,13 +669,27 @@ class TEDParser(object):
                 if not created and attr_changes:
                     changed_tenders.append((tender_dict, attr_changes))
 
-            os.remove(xml_file)
+        if self.renewal_lookups.stats:
+            stats = self.renewal_lookups.stats
+            logging.warning(
+                f"Renewal date lookups: {stats['hits']} hits, "
+                f"{stats['misses']} misses"
+            )
+
+        if self.rejected_notices:
+            logging.warning(
+                "Rejected notices: "
+                + ", ".join(
+                    f"{reason} {count}"
+                    for reason, count in self.rejected_notices.most_common()
+                )
+            )
 
         # Only the changed tender info is returned, the created ones are not
         return changed_tenders, num_created_tenders
 
     @staticmethod
-    def update_contract_award_awards(awards, soup, set_notified):
+    def update_contract_award_awards(awards, soup, set_notified, find_renewal_date):
         """
         Extract data from the soup and populate a dictionary representing an
         award, subsequently adding it to the list of awards received as
@@ -499,25 +715,25 @@ class TEDParser(object):
         try:
             previous_notice = soup.find("notice_number_oj").text
 
-            duration, unit = TEDParser.find_renewal_date(previous_notice)
+            duration, unit = find_renewal_date(previous_notice)
 
             renewal_date = None
 
             if unit.lower() == "year":
                 renewal_date = award["award_date"] + relativedelta(
-                    years=int(duration.text)
+                    years=int(duration)
                 )
             elif unit.lower() == "month":
                 renewal_date = award["award_date"] + relativedelta(
-                    months=int(duration.text)
+                    months=int(duration)
                 )
             elif unit.lower() == "week":
                 renewal_date = award["award_date"] + relativedelta(
-                    weeks=int(duration.text)
+                    weeks=int(duration)
                 )
             elif unit.lower() == "day":
                 renewal_date = award["award_date"] + relativedelta(
-                    days=int(duration.text)
+                    days=int(duration)
                 )
 
         except (AttributeError, TypeError, ValueError):
@@ -538,7 +754,9 @@ class TEDParser(object):
         awards.append(award)
 
     @staticmethod
-    def update_contract_award_notice_awards(awards, soup, set_notified):
+    def update_contract_award_notice_awards(
+        awards, soup, set_notified, find_renewal_date
+    ):
         sections = soup.find("form_section").find_all(lg="EN")
         if sections:
             section = sections[0]
@@ -546,7 +764,7 @@ class TEDParser(object):
             try:
                 previous_notice = section.find("notice_number_oj").text
 
-                duration, unit = TEDParser.find_renewal_date(previous_notice)
+                duration, unit = find_renewal_date(previous_notice)
 
             except (AttributeError, TypeError, ValueError):
                 duration = None
@@ -565,19 +783,19 @@ class TEDParser(object):
                     renewal_date = None
                     if unit.lower() == "year":
                         renewal_date = award_date + relativedelta(
-                            years=int(duration.text)
+                            years=int(duration)
                         )
                     elif unit.lower() == "month":
                         renewal_date = award_date + relativedelta(
-                            months=int(duration.text)
+                            months=int(duration)
                         )
                     elif unit.lower() == "week":
                         renewal_date = award_date + relativedelta(
-                            weeks=int(duration.text)
+                            weeks=int(duration)
                         )
                     elif unit.lower() == "day":
                         renewal_date = award_date + relativedelta(
-                            days=int(duration.text)
+                            days=int(duration)
                         )
                 except (AttributeError, TypeError, ValueError):
                     renewal_date = None
@@ -608,8 +826,22 @@ class TEDParser(object):
 
                     awards.append(award)
 
+    def lookup_renewal_date(self, previous_notice):
+        """
+        Same as `find_renewal_date`, answered from the renewal lookups when
+        the notice was looked up before or imported by us.
+        """
+        notice_number = previous_notice.strip()
+        lookup = self.renewal_lookups.get(notice_number)
+        if lookup:
+            return lookup
+
+        duration, unit = self.find_renewal_date(notice_number)
+        self.renewal_lookups.add(notice_number, duration, unit)
+        return duration, unit
+
     @staticmethod
-    def find_renewal_date(previous_notice: "str") -> (PageElement, str) or (None, None):
+    def find_renewal_date(previous_notice: "str") -> (str, str) or (None, None):
         """
         Calculate the renewal date of the award by finding the contract notice and parsing its XML file.
         After the duration of the contract and the information about contract renewal are extracted from the
@@ -640,42 +872,51 @@ class TEDParser(object):
                     previous_notice = contract_notice_soup.find("notice_number_oj").text
                     continue
 
-                contract_notice_sections = contract_notice_soup.find(
-                    "form_section"
-                ).find_all(lg="EN")
-                if contract_notice_sections:
-                    contract_notice_section = contract_notice_sections[0]
-                    duration = contract_notice_section.find("duration")
-                    renewal = contract_notice_section.find(
-                        "renewal"
-                    ) or contract_notice_section.find("recurrent_contract")
-                    if renewal:
-                        if duration:
-                            return duration, duration.attrs["type"]
-                        else:
-                            duration = contract_notice_section.find(
-                                "period_work_date_starting"
-                            )
-                            if duration:
-                                days = duration.find("days")
-                                if days:
-                                    return days, "day"
-                                weeks = duration.find("weeks")
-                                if weeks:
-                                    return weeks, "week"
-                                months = duration.find("months")
-                                if months:
-                                    return months, "month"
-                                years = duration.find("years")
-                                if years:
-                                    return years, "year"
+                return TEDParser.contract_duration(contract_notice_soup)
 
             return None, None
 
     @staticmethod
-    def save_award(tender_dict, award_dict) -> Award:
+    def contract_duration(soup) -> (str, str) or (None, None):
+        """
+        Return the duration and its unit from the soup of a renewable
+        contract notice.
+        """
+        contract_notice_sections = soup.find("form_section").find_all(lg="EN")
+        if contract_notice_sections:
+            contract_notice_section = contract_notice_sections[0]
+            duration = contract_notice_section.find("duration")
+            renewal = contract_notice_section.find(
+                "renewal"
+            ) or contract_notice_section.find("recurrent_contract")
+            if renewal:
+                if duration:
+                    return duration.text, duration.attrs["type"]
+                else:
+                    duration = contract_notice_section.find(
+                        "period_work_date_starting"
+                    )
+                    if duration:
+                        days = duration.find("days")
+                        if days:
+                            return days.text, "day"
+                        weeks = duration.find("weeks")
+                        if weeks:
+                            return weeks.text, "week"
+                        months = duration.find("months")
+                        if months:
+                            return months.text, "month"
+                        years = duration.find("years")
+                        if years:
+                            return years.text, "year"
+
+        return None, None
+
+    @staticmethod
+    def save_award(tender_dict, award_dict, tender_entry=None) -> Award:
         reference = tender_dict["reference"]
-        tender_entry = Tender.objects.filter(reference=reference).first()
+        if tender_entry is None:
+            tender_entry = Tender.objects.filter(reference=reference).first()
 
         if tender_entry:
             vendor_objects = []
@@ -701,19 +942,93 @@ class TEDParser(object):
 
     @staticmethod
     def save_tender(tender_dict, codes) -> Tuple[bool, dict]:
-        old_tender = Tender.objects.filter(reference=tender_dict["reference"]).first()
-        new_tender, created = Tender.objects.update_or_create(
-            reference=tender_dict["reference"],
-            defaults=dict(tender_dict, **{"cpv_codes": ", ".join(codes)}),
+        [(_, created, attr_changes)] = TEDParser.save_tenders(
+            [(tender_dict, [], codes)]
         )
-
-        attr_changes = {}
-        for attr, value in [(k, v) for (k, v) in tender_dict.items()]:
-            old_value = getattr(old_tender, str(attr), None)
-            if str(value) != str(old_value):
-                attr_changes.update({attr: (old_value, value)})
         return created, attr_changes
 
+    @staticmethod
+    def save_tenders(parsed_notices) -> List[Tuple[Tender, bool, dict]]:
+        return save_tenders(
+            [
+                (tender_dict, dict(tender_dict, **{"cpv_codes": ", ".join(codes)}))
+                for tender_dict, _, codes in parsed_notices
+            ]
+        )
+
+
+class RenewalLookups:
+    """
+    The renewal dates found by `TEDParser.find_renewal_date` or in imported
+    contract notices, loaded from TEDRenewalLookup once per parser. New
+    lookups are kept until saved in bulk.
+    """
+
+    def __init__(self):
+        expired = timezone.now() - timedelta(days=settings.TED_RENEWAL_LOOKUP_TTL)
+        self.lookups = {
+            notice_number: (duration, unit)
+            for notice_number, duration, unit in TEDRenewalLookup.objects.filter(
+                Q(duration__isnull=False) | Q(updated_at__gte=expired)
+            ).values_list("notice_number", "duration", "unit")
+        }
+        self.new_lookups = {}
+        self.stats = Counter()
+
+    def get(self, notice_number):
+        lookup = self.lookups.get(notice_number)
+        self.stats["hits" if lookup else "misses"] += 1
+        return lookup
+
+    def add(self, notice_number, duration, unit):
+        self.lookups[notice_number] = (duration, unit)
+        self.new_lookups[notice_number] = (duration, unit)
+
+    def merge(self, new_lookups, stats):
+        self.lookups.update(new_lookups)
+        self.new_lookups.update(new_lookups)
+        self.stats.update(stats)
+
+    def save(self):
+        if not self.new_lookups:
+            return
+        TEDRenewalLookup.objects.bulk_create(
+            [
+                TEDRenewalLookup(notice_number=notice_number, duration=duration, unit=unit)
+                for notice_number, (duration, unit) in self.new_lookups.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["notice_number"],
+            update_fields=["duration", "unit", "updated_at"],
+        )
+        self.new_lookups = {}
+
+
+# The parser, tenders and notified flag of a parallel parse, set in every
+# worker process by init_notice_worker
+notice_worker_args = None
+
+
+def init_notice_worker(parser, tenders, set_notified):
+    global notice_worker_args
+    notice_worker_args = parser, tenders, set_notified
+
+
+def parse_notice_in_worker(notice):
+    """
+    Parse a (file name, content) pair in a worker process. Return the parsed
+    notice, with the notices rejected and the renewal dates looked up while
+    parsing it, for the parent process to merge.
+    """
+    parser, tenders, set_notified = notice_worker_args
+    parser.rejected_notices = Counter()
+    parser.renewal_lookups.new_lookups = {}
+    parser.renewal_lookups.stats = Counter()
+    xml_file, content = notice
+    parsed_notice = parser.parse_notice(xml_file, content, tenders, set_notified)
+    renewal_lookups = parser.renewal_lookups.new_lookups, parser.renewal_lookups.stats
+    return parsed_notice, parser.rejected_notices, renewal_lookups
+
 
 def get_archives_path():
     return os.path.join(settings.FILES_DIR, "TED_archives")
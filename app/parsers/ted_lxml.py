@@ -0,0 +1,434 @@
+"""
+lxml engine for TED notices.
+
+`LxmlNotice` reads the same values as the BeautifulSoup lookups in
+`TEDParser._parse_notice`, using precompiled XPath expressions instead of
+building a soup and scanning it over and over. Selected with the
+TED_PARSER_ENGINE setting.
+
+`NoticeHeader` reads only what is needed to accept or reject a notice, so
+that most notices never reach the full parser.
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import cached_property, lru_cache
+
+from dateutil.relativedelta import relativedelta
+from django.utils.timezone import make_aware
+from lxml import etree
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+XML_PARSER = etree.XMLParser(
+    recover=True, resolve_entities=False, no_network=True, huge_tree=True
+)
+
+CODED_DATA_SECTION_END = "</CODED_DATA_SECTION>"
+# Match the same tags and attributes as soup.find_all("cpv_code")
+CPV_CODE_RE = re.compile(r"<cpv_code\b([^>]*)>", re.IGNORECASE)
+CODE_ATTRIBUTE_RE = re.compile(r"\bcode=\"([^\"]*)\"", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def compile_xpath(expression, namespace):
+    """
+    Compile an XPath expression once for every TED schema namespace, binding
+    the `t:` prefix to the namespace of the notice.
+    """
+    if namespace:
+        return etree.XPath(
+            expression, namespaces={"t": namespace}, smart_strings=False
+        )
+    return etree.XPath(expression.replace("t:", ""), smart_strings=False)
+
+
+CPV_CODE = "//t:CPV_CODE"
+ORIGINAL_CPV = "//t:ORIGINAL_CPV"
+TD_DOCUMENT_TYPE = "(//t:TD_DOCUMENT_TYPE)[1]"
+ISO_COUNTRY = "(//t:ISO_COUNTRY)[1]"
+AA_AUTHORITY_TYPE = "(//t:AA_AUTHORITY_TYPE)[1]"
+ML_TI_DOC_EN = "(//t:ML_TI_DOC[@LG='EN'])[1]"
+AA_NAME_EN = "(//t:AA_NAME[@LG='EN'])[1]"
+AA_NAME = "(//t:AA_NAME)[1]"
+DATE_PUB = "(//t:DATE_PUB)[1]"
+DT_DATE_FOR_SUBMISSION = "(//t:DT_DATE_FOR_SUBMISSION)[1]"
+FORM_SECTION = "(//t:FORM_SECTION)[1]"
+URI_DOC = "(//t:URI_DOC)[1]"
+CONTRACT_AWARD_DATE = "(//t:CONTRACT_AWARD_DATE)[1]"
+ECONOMIC_OPERATOR = "(//t:ECONOMIC_OPERATOR_NAME_ADDRESS)[1]"
+CONTACT_DATA = "(//t:CONTACT_DATA_WITHOUT_RESPONSIBLE_NAME_CHP)[1]"
+NOTICE_NUMBER_OJ = "(//t:NOTICE_NUMBER_OJ)[1]"
+VALUE_COST = "(//t:VALUE_COST)[1]"
+NO_DOC_OJS = "(//t:NO_DOC_OJS)[1]"
+
+# Relative to an element of the form section
+SECTION_EN = "(.//*[@LG='EN'])[1]"
+SHORT_DESCR = ".//t:SHORT_DESCR"
+TITLE = "(.//t:TITLE)[1]"
+VAL_ESTIMATED_TOTAL = "(.//t:VAL_ESTIMATED_TOTAL)[1]"
+LOT_MAX_NUMBER = "(.//t:LOT_MAX_NUMBER)[1]"
+SECTION_NOTICE_NUMBER_OJ = "(.//t:NOTICE_NUMBER_OJ)[1]"
+AWARDED_CONTRACT = ".//t:AWARDED_CONTRACT"
+DATE_CONCLUSION_CONTRACT = "(.//t:DATE_CONCLUSION_CONTRACT)[1]"
+VAL_TOTAL = "(.//t:VAL_TOTAL)[1]"
+CONTRACTOR = ".//t:CONTRACTOR"
+OFFICIALNAME = "(.//t:OFFICIALNAME)[1]"
+DURATION = "(.//t:DURATION)[1]"
+RENEWAL = "(.//t:RENEWAL)[1]"
+RECURRENT_CONTRACT = "(.//t:RECURRENT_CONTRACT)[1]"
+PERIOD_WORK_DATE_STARTING = "(.//t:PERIOD_WORK_DATE_STARTING)[1]"
+DURATION_UNITS = [
+    ("(.//t:DAYS)[1]", "day"),
+    ("(.//t:WEEKS)[1]", "week"),
+    ("(.//t:MONTHS)[1]", "month"),
+    ("(.//t:YEARS)[1]", "year"),
+]
+
+
+def text(node):
+    """
+    All the text inside the node, like BeautifulSoup's `Tag.text`, which
+    collapses whitespace-only strings to a single newline or space.
+    """
+    return "".join(
+        string
+        if string.strip(ASCII_SPACES)
+        else ("\n" if "\n" in string else " ")
+        for string in node.itertext()
+    )
+
+
+def local_name(node):
+    return etree.QName(node).localname
+
+
+def add_contract_duration(award_date, duration, unit):
+    """
+    Add the contract duration found by `TEDParser.find_renewal_date` to the
+    award date.
+    """
+    if unit.lower() == "year":
+        return award_date + relativedelta(years=int(duration))
+    elif unit.lower() == "month":
+        return award_date + relativedelta(months=int(duration))
+    elif unit.lower() == "week":
+        return award_date + relativedelta(weeks=int(duration))
+    elif unit.lower() == "day":
+        return award_date + relativedelta(days=int(duration))
+    return None
+
+
+class NoticeHeader:
+    """
+    The values `TEDParser.accept_notice` checks, read without parsing the whole
+    notice: the document type, country and authority type are parsed from
+    CODED_DATA_SECTION, which comes before the bulky translation and form
+    sections, and the CPV codes are only picked from the raw text when asked.
+
+    A value that cannot be found this way is None, meaning the notice has to
+    be fully parsed to decide.
+    """
+
+    def __init__(self, content):
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        self.content = content
+
+        self.doc_type = None
+        self.country = None
+        self.auth_type = None
+        self.original_cpv_codes = None
+
+        end = content.find(CODED_DATA_SECTION_END)
+        if end == -1:
+            return
+
+        parser = etree.XMLPullParser(
+            events=("end",), recover=True, resolve_entities=False, no_network=True
+        )
+        parser.feed(content[: end + len(CODED_DATA_SECTION_END)].encode("utf-8"))
+        self.original_cpv_codes = set()
+        for _, element in parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            name = local_name(element)
+            if name == "ORIGINAL_CPV":
+                self.original_cpv_codes.add(element.get("CODE"))
+            elif name == "TD_DOCUMENT_TYPE" and self.doc_type is None:
+                self.doc_type = text(element)
+            elif name == "ISO_COUNTRY" and self.country is None:
+                self.country = element.get("VALUE") or ""
+            elif name == "AA_AUTHORITY_TYPE" and self.auth_type is None:
+                self.auth_type = text(element)
+
+    @cached_property
+    def cpv_codes(self):
+        cpv_codes = set()
+        for attributes in CPV_CODE_RE.findall(self.content):
+            code = CODE_ATTRIBUTE_RE.search(attributes)
+            cpv_codes.add(code.group(1) if code else None)
+        return cpv_codes or self.original_cpv_codes
+
+
+class LxmlNotice:
+    def __init__(self, content):
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        self.root = etree.fromstring(content, XML_PARSER)
+        self.namespace = self.root.nsmap.get(None)
+
+    def find_all(self, expression, node=None):
+        xpath = compile_xpath(expression, self.namespace)
+        return xpath(self.root if node is None else node)
+
+    def find(self, expression, node=None):
+        result = self.find_all(expression, node)
+        return result[0] if result else None
+
+    def cpv_codes(self):
+        cpv_elements = self.find_all(CPV_CODE) or self.find_all(ORIGINAL_CPV)
+        return set([c.get("CODE") for c in cpv_elements])
+
+    def doc_type(self):
+        doc_type = self.find(TD_DOCUMENT_TYPE)
+        return text(doc_type) if doc_type is not None else ""
+
+    def country(self):
+        country = self.find(ISO_COUNTRY)
+        return country.get("VALUE") if country is not None else ""
+
+    def auth_type(self):
+        auth_type = self.find(AA_AUTHORITY_TYPE)
+        return text(auth_type) if auth_type is not None else ""
+
+    def english_section(self):
+        form_section = self.find(FORM_SECTION)
+        if form_section is None:
+            return None
+        return self.find(SECTION_EN, form_section)
+
+    def tender(self):
+        tender = dict()
+        tender["reference"] = self.root.get("DOC_ID") or ""
+        tender["notice_type"] = self.doc_type()
+
+        title = self.find(ML_TI_DOC_EN)
+        if title is not None:
+            parts = [text(e) for e in title if isinstance(e.tag, str)]
+            tender["title"] = "{0}-{1}: {2}".format(*parts)
+            tender["title"] = tender["title"][:255]
+        else:
+            tender["title"] = ""
+
+        organization = self.find(AA_NAME_EN)
+        if organization is None:
+            organization = self.find(AA_NAME)
+        tender["organization"] = text(organization) if organization is not None else ""
+
+        try:
+            published_str = text(self.find(DATE_PUB))
+            tender["published"] = datetime.strptime(published_str, "%Y%m%d").date()
+        except (AttributeError, ValueError):
+            tender["published"] = None
+
+        try:
+            deadline = text(self.find(DT_DATE_FOR_SUBMISSION))
+            tender["deadline"] = make_aware(datetime.strptime(deadline, "%Y%m%d %H:%M"))
+        except (AttributeError, ValueError):
+            tender["deadline"] = None
+
+        if tender["deadline"]:
+            time_now = datetime.now()
+            time_utc = datetime.utcnow()
+            add_hours = round(float((time_utc - time_now).total_seconds()) / 3600)
+            tender["deadline"] += timedelta(hours=add_hours)
+
+        section = self.english_section()
+        if section is not None:
+            tender["description"] = self.description(section)
+        else:
+            tender["description"] = ""
+
+        url = self.find(URI_DOC)
+        if url is not None:
+            tender["url"] = text(url).replace(url.get("LG"), "EN")
+        else:
+            tender["url"] = ""
+
+        tender["source"] = "TED"
+        return tender
+
+    def description(self, section):
+        descriptions = self.find_all(SHORT_DESCR, section)[:2]
+
+        title = self.find(TITLE, section)
+        title = "Title:\n\t" + text(title) + "\n\n" if title is not None else ""
+
+        estimated_total = self.find(VAL_ESTIMATED_TOTAL, section)
+        if estimated_total is not None:
+            estimated_total = (
+                "Estimated total: "
+                + text(estimated_total)
+                + " "
+                + str(estimated_total.attrib["CURRENCY"])
+                + "\n\n"
+            )
+        else:
+            estimated_total = ""
+
+        lots = self.find(LOT_MAX_NUMBER, section)
+        if lots is not None:
+            lots = (
+                "Tenders may be submitted for maximum number of lots: "
+                + text(lots)
+                + "\n\n"
+            )
+        else:
+            lots = ""
+
+        short_desc = ""
+        if len(descriptions) > 0:
+            short_desc = "Short Description:" + "\n\t" + text(descriptions[0]) + "\n\n"
+
+        procurement_desc = ""
+        if len(descriptions) > 1:
+            procurement_desc = "Description of the procurement:" + (
+                "\n\t" + text(descriptions[1])
+            )
+
+        return title + estimated_total + lots + short_desc + procurement_desc
+
+    def notice_number(self):
+        return text(self.find(NO_DOC_OJS))
+
+    def contract_duration(self):
+        """
+        Same as `TEDParser.contract_duration`, returns the duration and its
+        unit of a renewable contract notice.
+        """
+        if self.find(FORM_SECTION) is None:
+            raise AttributeError("No form section")
+
+        section = self.english_section()
+        if section is not None:
+            duration = self.find(DURATION, section)
+            renewal = self.find(RENEWAL, section)
+            if renewal is None:
+                renewal = self.find(RECURRENT_CONTRACT, section)
+            if renewal is not None:
+                if duration is not None:
+                    return text(duration), duration.attrib["TYPE"]
+                duration = self.find(PERIOD_WORK_DATE_STARTING, section)
+                if duration is not None:
+                    for expression, unit in DURATION_UNITS:
+                        value = self.find(expression, duration)
+                        if value is not None:
+                            return text(value), unit
+
+        return None, None
+
+    def contract_award_awards(self, set_notified, find_renewal_date):
+        """
+        Same as `TEDParser.update_contract_award_awards`, returns a list with
+        the award of a "Contract award" notice.
+        """
+        award = {}
+        award_date = self.find(CONTRACT_AWARD_DATE)
+        if award_date is not None:
+            fields = {}
+            for c in award_date:
+                if not isinstance(c.tag, str):
+                    continue
+                try:
+                    if text(c).endswith("."):
+                        fields[local_name(c).lower()] = int(text(c).replace(".", ""))
+                    else:
+                        fields[local_name(c).lower()] = int(text(c))
+                except ValueError:
+                    pass
+            award["award_date"] = date(**fields)
+
+        vendor = self.find(ECONOMIC_OPERATOR)
+        if vendor is None:
+            vendor = self.find(CONTACT_DATA)
+
+        try:
+            previous_notice = text(self.find(NOTICE_NUMBER_OJ))
+            duration, unit = find_renewal_date(previous_notice)
+            renewal_date = add_contract_duration(award["award_date"], duration, unit)
+        except (AttributeError, TypeError, ValueError):
+            renewal_date = None
+
+        award["renewal_date"] = renewal_date
+
+        if vendor is not None:
+            officialname = self.find(OFFICIALNAME, vendor)
+            award["vendor"] = text(officialname) if officialname is not None else None
+        value = self.find(VALUE_COST)
+        if value is not None:
+            award["value"] = value.get("FMTVAL")
+            award["currency"] = value.getparent().get("CURRENCY")
+
+        award["notified"] = set_notified
+        award["renewal_notified"] = False
+
+        return [award]
+
+    def contract_award_notice_awards(self, set_notified, find_renewal_date):
+        """
+        Same as `TEDParser.update_contract_award_notice_awards`, returns the
+        list of awards of a "Contract award notice".
+        """
+        awards = []
+        section = self.english_section()
+        if section is None:
+            return awards
+
+        try:
+            previous_notice = text(self.find(SECTION_NOTICE_NUMBER_OJ, section))
+            duration, unit = find_renewal_date(previous_notice)
+        except (AttributeError, TypeError, ValueError):
+            duration = None
+            unit = None
+
+        for awarded_contract in self.find_all(AWARDED_CONTRACT, section):
+            try:
+                date_conclusion_contract = text(
+                    self.find(DATE_CONCLUSION_CONTRACT, awarded_contract)
+                )
+                award_date = datetime.strptime(date_conclusion_contract, "%Y-%m-%d")
+            except (AttributeError, TypeError, ValueError):
+                award_date = date.today()
+
+            try:
+                renewal_date = add_contract_duration(award_date, duration, unit)
+            except (AttributeError, TypeError, ValueError):
+                renewal_date = None
+
+            try:
+                val_total = self.find(VAL_TOTAL, awarded_contract)
+                contract_value = float(text(val_total))
+                currency_currency = val_total.get("CURRENCY")
+            except (AttributeError, TypeError, ValueError):
+                contract_value = 0
+                currency_currency = "N/A"
+
+            contractors = self.find_all(CONTRACTOR, awarded_contract)
+            if contractors:
+                award = {
+                    "vendors": [],
+                    "award_date": award_date,
+                    "renewal_date": renewal_date,
+                    "value": contract_value,
+                    "currency": currency_currency,
+                    "notified": set_notified,
+                    "renewal_notified": False,
+                }
+                for contractor in contractors:
+                    officialname = self.find(OFFICIALNAME, contractor)
+                    if officialname is not None:
+                        award["vendors"].append(text(officialname))
+
+                awards.append(award)
+
+        return awards
@@ -1,9 +1,5 @@
 import logging
 import re
-from random import randint
-from time import sleep
-
-import requests
 
 from datetime import date, datetime, timedelta
 from tempfile import TemporaryFile
@@ -13,20 +9,26 @@ from django.core.files import File
 from django.utils.timezone import make_aware
 
 from app.exceptions import UNSPCCodesNotFound
-from app.models import UNSPSCCode, WorkerLog, Tender, TenderDocument
+from app.models import Tender, TenderDocument, WorkerLog
+from app.parsers.bulk import chunked, save_tenders
+from app.parsers.ungm_fetcher import UNGMFetcher
+from app.reference_data import reference_data
 from app.server_requests import get_request_class
 from scratch import settings
 
 
 class UNGMWorker:
-    requester = get_request_class(public=True)
+    def __init__(self):
+        self.requester = get_request_class(public=True)
+        self.fetcher = UNGMFetcher()
 
     def parse_tenders(self, tenders):
         """
         Args:
             tenders: QuerySet
         """
-        return UNGMWorker.update_ungm_tenders(self.parsed_tenders(tenders))
+        return UNGMWorker.update_ungm_tenders(
+            self.parsed_tenders(tenders), self.fetcher)
 
     def parse_latest_notices(self, last_date):
         last_date = last_date.strftime('%d-%b-%Y')
@@ -41,13 +43,21 @@ class UNGMWorker:
             if not len(extracted_tenders):
                 break
             ungm_tenders, added_tenders = UNGMWorker.update_ungm_tenders(
-                self.parsed_tenders(extracted_tenders))
+                self.parsed_tenders(extracted_tenders), self.fetcher)
             tenders_count += added_tenders
 
         WorkerLog.objects.create(
             update=date.today(), source='UNGM', tenders_count=tenders_count)
         return
 
+    def fetch_summary(self):
+        stats = self.fetcher.stats
+        return (
+            f"{stats['changed']} notice page(s) changed, "
+            f"{stats['unchanged']} unchanged and skipped, "
+            f"{stats['failed']} failed"
+        )
+
     @staticmethod
     def parse_date(date_string, date_format):
         try:
@@ -83,14 +93,14 @@ class UNGMWorker:
         return tenders_list
 
     @staticmethod
-    def parse_ungm_notice(html, url, codes):
+    def parse_ungm_notice(html, url, registry=None):
         """
         Args:
             html: A string containing the HTML returned when accessing `url`
             url: A string containing the URL where details about a specific
                 tender can be found.
-            codes: A list of UNSPSC codes. In principle it should be
-                UNSPSCCode.objects.all().
+            registry: The ReferenceData mapping the UNSPSC codes, the one
+                of the process by default.
         Returns:
             A dictionary representing a tender and its documents, or None if
             the tender is invalid.
@@ -106,10 +116,8 @@ class UNGMWorker:
             description = ''
         nodes = UNGMWorker.find_by_class(soup, "nodeName", "span")
         scraped_nodes = [parent.find_all("span")[0].text for parent in nodes[1:]]
-        unspsc_codes = [
-            code.id for code in codes
-            if code.id_ungm in scraped_nodes
-        ]
+        unspsc_codes = (registry or reference_data()).unspsc_codes_of(
+            scraped_nodes)
         notice_type = UNGMWorker.find_by_class(soup, "status-tag", "span", True)
         title = UNGMWorker.find_by_class(soup, "title", "span", True)
         organization = UNGMWorker.find_by_class(
@@ -167,18 +175,36 @@ class UNGMWorker:
         return tender_item
     
     def parsed_tenders(self, tenders):
-        codes = UNSPSCCode.objects.all()
-        if not codes:
+        """
+        Yield the parsed tenders as their pages are fetched, concurrently.
+        The pages which did not change since the tender was saved are
+        skipped.
+        """
+        # Read once, the pages are parsed in the fetcher threads
+        registry = reference_data()
+        if not registry.unspsc_ids:
             raise UNSPCCodesNotFound("UNSPC Codes not found.")
+        urls = []
+        references = []
         for tender in tenders:
             try:
-                url = tender.url
+                url, reference = tender.url, tender.reference
             except AttributeError:
-                url = tender['url']
-            html = self.requester.get_request(url)
-            parsed_tender = self.parse_ungm_notice(html, url, codes)
-            if parsed_tender:
-                yield parsed_tender
+                url, reference = tender['url'], tender['reference']
+            if url:
+                urls.append(url)
+                references.append(reference)
+        fingerprints = dict(
+            Tender.objects.filter(reference__in=references)
+            .exclude(page_fingerprint='')
+            .values_list('url', 'page_fingerprint')
+        )
+        for parsed_tender, fingerprint in self.fetcher.fetch_all(
+                urls,
+                lambda html, url: self.parse_ungm_notice(html, url, registry),
+                fingerprints):
+            parsed_tender['fingerprint'] = fingerprint
+            yield parsed_tender
 
     @staticmethod
     def find_by_span(soup, span):
@@ -200,61 +226,63 @@ class UNGMWorker:
             return None
 
     @staticmethod
-    def update_ungm_tenders(parsed_tenders):
+    def update_ungm_tenders(parsed_tenders, fetcher=None):
         changed_tenders = []
         new_tenders = 0
-        for item in parsed_tenders:
-            reference = item['tender'].get('reference')
-            old_tender = Tender.objects.filter(reference=reference).first()
-            new_tender, created = Tender.objects.update_or_create(
-                reference=reference, defaults=dict(item['tender']))
-
-            if created:
-                new_tenders += 1
-            attr_changes = {}
-            if old_tender:
-                for attr, value in [(k, v) for (k, v) in item['tender'].items()]:
-                    old_value = getattr(old_tender, str(attr), None)
-                    if str(value) != str(old_value):
-                        attr_changes.update({attr: (old_value, value)})
-
-            new_docs = []
-            tender_doc = None
-            for doc in item['documents']:
-                try:
-                    tender_doc = TenderDocument.objects.get(
-                        tender=new_tender, name=doc['name'])
-
-                    for k, v in doc.items():
-                        old_value = getattr(tender_doc, k)
-
-                        if str(old_value) != str(doc[k]):
-                            setattr(tender_doc, k, v)
-
-                    tender_doc.save()
-                except TenderDocument.DoesNotExist:
-                    tender_doc = TenderDocument.objects.create(
-                        tender=new_tender, **doc)
-                    new_docs.append(doc)
-                finally:
-                    UNGMWorker.download_document(tender_doc)
-
-            if not created and (attr_changes or new_docs):
-                changed_tenders.append((item['tender'], attr_changes, new_docs))
+        for items in chunked(parsed_tenders):
+            saved_tenders = save_tenders([
+                (
+                    item['tender'],
+                    dict(item['tender'],
+                         page_fingerprint=item.get('fingerprint', '')),
+                )
+                for item in items
+            ])
+            for item, (new_tender, created, attr_changes) in zip(
+                    items, saved_tenders):
+                if created:
+                    new_tenders += 1
+                    attr_changes = {}
+
+                new_docs = UNGMWorker.update_documents(
+                    new_tender, item, fetcher)
+
+                if not created and (attr_changes or new_docs):
+                    changed_tenders.append(
+                        (item['tender'], attr_changes, new_docs))
 
         return changed_tenders, new_tenders
 
     @staticmethod
-    def download_document(tender_doc):
+    def update_documents(new_tender, item, fetcher=None):
+        new_docs = []
+        tender_doc = None
+        for doc in item['documents']:
+            try:
+                tender_doc = TenderDocument.objects.get(
+                    tender=new_tender, name=doc['name'])
+
+                for k, v in doc.items():
+                    old_value = getattr(tender_doc, k)
+
+                    if str(old_value) != str(doc[k]):
+                        setattr(tender_doc, k, v)
+
+                tender_doc.save()
+            except TenderDocument.DoesNotExist:
+                tender_doc = TenderDocument.objects.create(
+                    tender=new_tender, **doc)
+                new_docs.append(doc)
+            finally:
+                UNGMWorker.download_document(tender_doc, fetcher)
+
+        return new_docs
+
+    @staticmethod
+    def download_document(tender_doc, fetcher=None):
+        fetcher = fetcher or UNGMFetcher()
         with TemporaryFile() as content:
-            headers = {
-                'User-Agent': 'Mozilla/5.0'
-            }
-            sleep(randint(2, 4))
-            response = requests.get(tender_doc.download_url, headers=headers, stream=True)
-            if response.status_code == 200:
-                for chunk in response.iter_content(chunk_size=4096):
-                    content.write(chunk)
+            if fetcher.download(tender_doc.download_url, content):
                 content.seek(0)
                 tender_doc.document.save(
                     tender_doc.name, File(content), save=True)
@@ -0,0 +1,207 @@
+"""
+Concurrent fetch of the UNGM notice pages.
+
+`UNGMFetcher` requests the notice detail pages from a pool of threads over one
+pooled session and yields them as they arrive, so the tenders parsed first are
+saved while the others are still being fetched. The requests made to a host
+are limited to UNGM_FETCH_PER_HOST at once and spaced out by a `TokenBucket`,
+instead of a random sleep before every request. Failed requests are retried
+with an exponential backoff by the session.
+
+Each page fetched gets a fingerprint: its ETag or Last-Modified header when
+the server sends them, which make the next request conditional, otherwise a
+hash of the main region of the page. A page whose fingerprint did not change
+is not parsed, see `fetch_all`.
+"""
+import hashlib
+import logging
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.parsers.downloader import TokenBucket
+
+CHUNK_SIZE = 64 * 1024
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36"
+}
+# The content of a notice page, without the navigation and the scripts whose
+# tokens change with every request
+MAIN_REGION = re.compile(rb"<main\b.*</main>", re.S)
+
+
+def page_fingerprint(response):
+    """
+    Return the validator of the response, or the hash of the main region of
+    its body.
+    """
+    if response.headers.get("ETag"):
+        return f"etag:{response.headers['ETag']}"
+    if response.headers.get("Last-Modified"):
+        return f"modified:{response.headers['Last-Modified']}"
+    content = response.content
+    if isinstance(content, str):
+        content = content.encode()
+    region = MAIN_REGION.search(content)
+    return "sha256:" + hashlib.sha256(region.group() if region else content).hexdigest()
+
+
+def conditional_headers(fingerprint):
+    kind, _, value = (fingerprint or "").partition(":")
+    if kind == "etag":
+        return {"If-None-Match": value}
+    if kind == "modified":
+        return {"If-Modified-Since": value}
+    return {}
+
+
+class HostLimiter:
+    """
+    Allow `concurrency` requests at once to a host, at `rate` requests per
+    second on average.
+    """
+
+    def __init__(self, concurrency, rate, burst):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        self.bucket.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.semaphore.release()
+
+
+class UNGMFetcher:
+    def __init__(self, workers=None, per_host=None, rate=None, burst=None, timeout=None):
+        self.workers = max(workers or settings.UNGM_FETCH_WORKERS, 1)
+        self.per_host = max(per_host or settings.UNGM_FETCH_PER_HOST, 1)
+        self.rate = rate or settings.UNGM_FETCH_RATE
+        self.burst = burst or settings.UNGM_FETCH_BURST
+        self.timeout = timeout or settings.UNGM_FETCH_TIMEOUT
+        self.limiters = {}
+        self.lock = threading.Lock()
+        # Pages "changed" (and parsed), "unchanged" and "failed"
+        self.stats = Counter()
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        retry = Retry(
+            total=3, backoff_factor=2, status_forcelist=(429, 500, 502, 503, 504)
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.workers, max_retries=retry
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def limiter(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.limiters:
+                self.limiters[host] = HostLimiter(self.per_host, self.rate, self.burst)
+            return self.limiters[host]
+
+    def get(self, url, **kwargs):
+        with self.limiter(url):
+            return self.session.get(url, timeout=self.timeout, **kwargs)
+
+    def count(self, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
+
+    def fetch_page(self, url, fingerprint=None):
+        """
+        Return the response of the page, made conditional by the fingerprint
+        of the previous fetch, or None when it could not be fetched.
+        """
+        try:
+            response = self.get(url, headers=conditional_headers(fingerprint))
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Fetching {url} failed: {e}")
+            return None
+        if response.status_code not in (200, 304):
+            logging.warning(f"Fetching {url} failed with status {response.status_code}")
+            return None
+        return response
+
+    def download(self, url, file):
+        """
+        Write the body of the url to the file in chunks, return whether it was
+        downloaded.
+        """
+        try:
+            with self.get(url, stream=True) as response:
+                if response.status_code != 200:
+                    logging.warning(
+                        f"Downloading {url} failed with status {response.status_code}"
+                    )
+                    return False
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    file.write(chunk)
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Downloading {url} failed: {e}")
+            return False
+        return True
+
+    def fetch_all(self, urls, parse, fingerprints=None):
+        """
+        Fetch the pages concurrently and yield `(parse(page, url),
+        fingerprint)` for each page fetched, in the order they arrive.
+
+        :param fingerprints: {url: fingerprint} of the previous fetches, the
+            pages which did not change since are skipped without parsing
+
+        The pages which could not be fetched or parsed are logged and skipped.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+        fingerprints = fingerprints or {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    self.fetch_and_parse, url, parse, fingerprints.get(url)
+                ): url
+                for url in urls
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.count("failed")
+                    logging.error(f"Parsing {futures[future]} failed: {e}")
+                    continue
+                if result is not None:
+                    yield result
+
+    def fetch_and_parse(self, url, parse, fingerprint=None):
+        response = self.fetch_page(url, fingerprint)
+        if response is None:
+            self.count("failed")
+            return None
+        if response.status_code == 304:
+            self.count("unchanged")
+            return None
+        new_fingerprint = page_fingerprint(response)
+        if new_fingerprint == fingerprint:
+            self.count("unchanged")
+            return None
+        result = parse(response.content, url)
+        self.count("changed")
+        if result is None:
+            return None
+        return result, new_fingerprint
+
+    def close(self):
+        self.session.close()
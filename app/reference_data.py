@@ -0,0 +1,114 @@
+"""
+Registry of the reference tables the parsers filter and map the notices with:
+the UNSPSC codes, the CPV codes and the TED countries.
+
+The tables are loaded once per process into frozen structures. Like the
+keyword matcher (see app/keywords.py), the registry is reloaded when the
+version stamp stored in the shared cache, changed whenever one of the tables
+is saved or deleted and by the `load_initial_data` command, differs from the
+one it was loaded for. Tests can replace it with `override_reference_data`.
+"""
+import time
+from contextlib import contextmanager
+from types import MappingProxyType
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.cache import cache
+
+VERSION_KEY = "reference_data_version"
+# Seconds between checks of the version stamp set by other processes
+VERSION_CHECK_INTERVAL = 5
+
+_data = None
+_checked_at = 0
+_override = None
+
+
+class ReferenceData:
+    def __init__(self, unspsc_codes=(), cpv_codes=(), ted_countries=(), version=None):
+        """
+        :param unspsc_codes: (id, UNGM id) pairs of the UNSPSC codes
+        """
+        self.unspsc_ids = tuple(sorted(id for id, _ in unspsc_codes))
+        by_ungm_id = {}
+        for id, ungm_id in unspsc_codes:
+            by_ungm_id.setdefault(ungm_id, []).append(id)
+        self.unspsc_by_ungm_id = MappingProxyType(
+            {ungm_id: tuple(sorted(ids)) for ungm_id, ids in by_ungm_id.items()}
+        )
+        self.cpv_codes = frozenset(cpv_codes)
+        self.ted_countries = frozenset(ted_countries)
+        self.version = version
+
+    @classmethod
+    def load(cls, version=None):
+        UNSPSCCode = apps.get_model("app", "UNSPSCCode")
+        CPVCode = apps.get_model("app", "CPVCode")
+        TedCountry = apps.get_model("app", "TedCountry")
+        return cls(
+            unspsc_codes=UNSPSCCode.objects.values_list("id", "id_ungm"),
+            cpv_codes=CPVCode.objects.values_list("code", flat=True),
+            ted_countries=TedCountry.objects.values_list("name", flat=True),
+            version=version,
+        )
+
+    def unspsc_codes_of(self, ungm_ids):
+        """
+        Return the sorted ids of the UNSPSC codes with the given UNGM ids.
+        """
+        return sorted(
+            id
+            for ungm_id in set(ungm_ids)
+            for id in self.unspsc_by_ungm_id.get(ungm_id, ())
+        )
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def reference_data():
+    """
+    Return the reference data, loading it only when the tables changed since
+    it was last loaded.
+    """
+    global _data, _checked_at
+    if _override is not None:
+        return _override
+    now = time.monotonic()
+    if _data is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _data
+
+    version = current_version()
+    if _data is None or _data.version != version:
+        _data = ReferenceData.load(version)
+    _checked_at = now
+    return _data
+
+
+def invalidate_reference_data(*args, **kwargs):
+    """
+    Change the version stamp, so every process reloads the reference data.
+    Connected to the post_save and post_delete signals of the tables.
+    """
+    global _data
+    cache.set(VERSION_KEY, uuid4().hex, None)
+    _data = None
+
+
+@contextmanager
+def override_reference_data(data):
+    """
+    Use the given `ReferenceData` instead of the tables, in tests.
+    """
+    global _override
+    previous, _override = _override, data
+    try:
+        yield data
+    finally:
+        _override = previous
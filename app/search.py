@@ -0,0 +1,191 @@
+"""
+Full text search of the tenders, the tender documents and the awards.
+
+The three searches are sent to Elasticsearch in one multi search request.
+The matches are highlighted by Elasticsearch and the results are built from
+the highlights and the short fields of the indexed `_source`, so a search
+makes no database query. The descriptions and the document contents, which
+can be long, are not fetched: their highlight always has a fragment, see
+`FRAGMENT`. Each kind of result is paginated separately with `search_after`,
+the sort values of the last hit of a page being the position of the next
+one.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from elasticsearch_dsl import MultiSearch
+from elasticsearch_dsl import Q as elasticQ
+
+from app.documents import AwardDoc, TenderDoc, TenderDocumentDoc
+
+
+class Section:
+    """
+    One kind of result: the searched document, fields and highlighted
+    fields, and the fields of the `_source` a result is built from with the
+    highlights.
+    """
+
+    def __init__(self, name, doc, fields, highlight, source):
+        self.name = name
+        self.doc = doc
+        self.fields = fields
+        self.highlight = highlight
+        self.source = source
+
+    def search(self, terms, after=None, size=None):
+        search = (
+            self.doc.search()
+            .query(elasticQ("multi_match", query=terms, fields=self.fields))
+            .source(self.source)
+            .sort({"_score": "desc"}, {"id": "asc"})
+            .highlight_options(
+                pre_tags=["<mark>"], post_tags=["</mark>"], encoder="html"
+            )
+            .extra(size=size or settings.SEARCH_PAGE_SIZE, track_total_hits=True)
+        )
+        for field, options in self.highlight.items():
+            search = search.highlight(field, **options)
+        if after:
+            search = search.extra(search_after=after)
+        return search
+
+    def result(self, hit):
+        """
+        Return the source and highlighted fields of the hit, highlighted
+        where they matched and escaped otherwise.
+        """
+        highlight = getattr(hit.meta, "highlight", {})
+        result = {"id": int(hit.meta.id)}
+        for field in dict.fromkeys([*self.source, *self.highlight]):
+            if field in highlight:
+                value = " … ".join(highlight[field])
+            else:
+                value = getattr(hit, field, None)
+                value = escape("" if value is None else value)
+            result[field] = mark_safe(value)
+        return result
+
+
+# The whole title and a fragment of the longer texts
+WHOLE = {"number_of_fragments": 0}
+FRAGMENT = {"fragment_size": 300, "number_of_fragments": 1, "no_match_size": 300}
+
+SECTIONS = [
+    Section(
+        "tenders",
+        TenderDoc,
+        fields=[
+            "title",
+            "organization",
+            "source",
+            "reference",
+            "unspsc_codes",
+            "cpv_codes",
+            "description",
+        ],
+        highlight={"title": WHOLE, "description": FRAGMENT},
+        source=["title", "organization", "source"],
+    ),
+    Section(
+        "documents",
+        TenderDocumentDoc,
+        fields=["name", "content"],
+        highlight={"name": WHOLE, "content": FRAGMENT},
+        source=["name", "tender_id", "tender_title"],
+    ),
+    Section(
+        "awards",
+        AwardDoc,
+        fields=["vendors_name", "tender_title", "currency", "value"],
+        highlight={"vendors_name": WHOLE, "tender_title": WHOLE, "currency": WHOLE},
+        source=["vendors_name", "tender_title", "currency", "value"],
+    ),
+]
+
+
+def encode_position(sort):
+    return json.dumps(list(sort), separators=(",", ":"))
+
+
+def decode_position(value):
+    """
+    Return the search_after sort values encoded in a page link, the score and
+    the id of the last hit, or None when they are missing or malformed.
+    """
+    try:
+        position = json.loads(value)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(position, list) or len(position) != 2:
+        return None
+    score, id = position
+    # bool is a subclass of int
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        return None
+    if isinstance(id, bool) or not isinstance(id, int):
+        return None
+    return position
+
+
+class Timer:
+    """
+    Time the stages of a search, in milliseconds.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.started_at = time.perf_counter()
+
+    def stage(self, name):
+        now = time.perf_counter()
+        self.timings[name] = (now - self.started_at) * 1000
+        self.started_at = now
+
+    def server_timing(self):
+        return ", ".join(
+            f"{name};dur={duration:.1f}" for name, duration in self.timings.items()
+        )
+
+
+def search(terms, positions=None, size=None):
+    """
+    Search all the sections in one request and return the results of each
+    section, with the timings of the stages of the search.
+
+    :param positions: {section name: search_after sort values} of the pages
+        to return, the first page of the other sections is returned
+    """
+    positions = positions or {}
+    size = size or settings.SEARCH_PAGE_SIZE
+    timer = Timer()
+
+    multi_search = MultiSearch()
+    for section in SECTIONS:
+        multi_search = multi_search.add(
+            section.search(terms, positions.get(section.name), size)
+        )
+    timer.stage("build")
+
+    responses = multi_search.execute()
+    timer.stage("elasticsearch")
+
+    results = {}
+    for section, response in zip(SECTIONS, responses):
+        hits = list(response.hits)
+        results[section.name] = {
+            "results": [section.result(hit) for hit in hits],
+            "total": response.hits.total.value,
+            "next": (
+                encode_position(hits[-1].meta.sort) if len(hits) == size else None
+            ),
+        }
+        timer.timings[f"es_{section.name}"] = response.took
+    timer.stage("hydrate")
+
+    logging.debug(f"Search for {terms!r}: {timer.server_timing()}")
+    return results, timer
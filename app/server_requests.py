@@ -5,11 +5,12 @@ import json
 import urllib3
 from datetime import datetime
 from random import randint
-from time import sleep
+from time import monotonic, sleep
 
+from django.conf import settings
 from urllib3.exceptions import NewConnectionError
 
-from app.models import UNSPSCCode
+from app.reference_data import reference_data
 
 LIVE_ENDPOINT_URI = 'https://www.ungm.org'
 TENDERS_ENDPOINT_URI = 'https://www.ungm.org/Public/Notice'
@@ -77,9 +78,6 @@ GET_HEADERS = {
 }
 
 
-UNSPSC_CODES = UNSPSCCode.objects.values_list("id", flat=True)
-
-
 class RequestsFailedError(Exception):
     def __init__(self, message="Requests to get UNGM tenders html failed"):
         self.message = message
@@ -118,18 +116,43 @@ class Requester(object):
 
 
 class UNGMrequester(Requester):
+    """
+    UNGM client owning one session. The cookies the searches need are
+    received from a GET of the listing page once, and again only after
+    UNGM_COOKIES_TTL seconds or when a search is refused. The payloads and
+    headers are built for each request, the module constants are not
+    modified.
+    """
     TENDERS_ENDPOINT_URI = TENDERS_ENDPOINT_URI
     WINNERS_ENDPOINT_URI = WINNERS_ENDPOINT_URI
 
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.headers.update(GET_HEADERS)
+        self.session.cookies.set('UNGM.UserPreferredLanguage', 'en')
+        self.cookies_at = None
+        self.timeout = settings.UNGM_FETCH_TIMEOUT
+
+    def get_request(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logging.warning(e)
+            return None
+
+        if response.status_code == 200:
+            return response.content
+        return None
+
     def get_data(self, url, last_date, index):
         category = 'tenders' if 'Notice' in url else 'awards'
-        payload = PAYLOAD[category]
+        payload = dict(PAYLOAD[category])
         if category == 'tenders':
             today = datetime.now().strftime('%d-%b-%Y')
             payload['DeadlineFrom'] = payload['PublishedTo'] = today
             payload['PublishedFrom'] = last_date
             payload['PageIndex'] = index
-        payload['UNSPSCs'] = list(UNSPSC_CODES)
+        payload['UNSPSCs'] = list(reference_data().unspsc_ids)
         return json.dumps(payload)
 
     def request(self, url, last_date, index):
@@ -138,43 +161,47 @@ class UNGMrequester(Requester):
                 url, url + '/Search', self.get_data(url, last_date, index))
             if html:
                 return html
+            # Start the next attempt with new cookies
+            self.cookies_at = None
             sleep(randint(10, 15))
         raise RequestsFailedError
 
-    def post_request(
-            self, get_url, post_url, data, headers=POST_HEADERS, content_type=None):
+    def cookies_expired(self):
+        return (
+            self.cookies_at is None
+            or monotonic() - self.cookies_at > settings.UNGM_COOKIES_TTL
+        )
+
+    def refresh_cookies(self, get_url):
+        """ Receive the session cookies from a GET of the listing page """
+        self.session.get(get_url, timeout=self.timeout)
+        self.cookies_at = monotonic()
+
+    def post_request(self, get_url, post_url, data, content_type=None):
         """
-        AJAX-like POST request. Does a GET initially to receive cookies that
-        are used to the subsequent POST request.
+        AJAX-like POST request, with the cookies received from a GET of
+        `get_url` when the session has none or they expired.
 
         Returns HTML, NOT Response object.
         """
-        try:
-            resp = requests.get(get_url, headers=GET_HEADERS)
-        except requests.exceptions.ConnectionError as e:
-            logging.warning(e)
-            return None
-
-        cookies = dict(resp.cookies)
-        cookies.update({'UNGM.UserPreferredLanguage': 'en'})
-        headers.update({
-            'Cookie': '; '.join(
-                ['{0}={1}'.format(k, v) for k, v in cookies.items()]),
-            'Referer': get_url,
-            'Content-Length': str(len(data)),
-        })
+        headers = dict(POST_HEADERS, Referer=get_url)
         if content_type:
-            headers.update({'Content-Type': content_type})
+            headers['Content-Type'] = content_type
 
         try:
-            sleep(randint(2, 5))
-            resp = requests.post(post_url, data=data, cookies=cookies,
-                                 headers=headers)
-        except requests.exceptions.ConnectionError as e:
+            if self.cookies_expired():
+                self.refresh_cookies(get_url)
+            resp = self.session.post(
+                post_url, data=data, headers=headers, timeout=self.timeout)
+            if resp.status_code in (401, 403):
+                # The cookies were revoked before they expired
+                self.refresh_cookies(get_url)
+                resp = self.session.post(
+                    post_url, data=data, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
             logging.warning(e)
             return None
 
-
         if resp.status_code == 200:
             return resp.content
 
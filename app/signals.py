@@ -1,13 +1,139 @@
-from django_q.tasks import async_task
+import logging
+import re
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+from uuid import uuid4
 
-from app.models import Tender
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+from django_q.models import Schedule
+from django_q.tasks import schedule
 
+from app.keywords import KeywordMatcher
+from app.models import Keyword, Task, Tender, fields
+from app.indexing import queue_index
+from app.parsers.bulk import CHUNK_SIZE, chunked
+from app.stats import invalidate_stats
 
-def update_all_tenders():
-    tenders = Tender.objects.all()
-    for tender in tenders:
-        tender.save()
+REINDEX_SCHEDULE = "reindex_keywords"
+# The keywords the tenders were last matched against
+SNAPSHOT_KEY = "keywords_reindex_snapshot"
 
 
 def set_keywords(sender, instance, **kwargs):
-    async_task(update_all_tenders)
+    """
+    Schedule a keyword reindex KEYWORD_REINDEX_DELAY seconds from now, unless
+    one is already waiting, so a burst of keyword edits is reindexed once.
+    """
+    if Schedule.objects.filter(name=REINDEX_SCHEDULE).exists():
+        return
+    try:
+        schedule(
+            "app.signals.reindex_keywords",
+            name=REINDEX_SCHEDULE,
+            schedule_type=Schedule.ONCE,
+            next_run=timezone.now() + timedelta(seconds=settings.KEYWORD_REINDEX_DELAY),
+        )
+    except IntegrityError:
+        # Scheduled by a concurrent edit
+        pass
+
+
+def search_term(value):
+    """
+    Return the longest word of the keyword, which is in the text of every
+    tender the keyword can match.
+    """
+    return max(re.findall(r"\w+", value), key=len, default=value)
+
+
+def reindex_keywords():
+    """
+    Match again the tenders which contain a keyword added, changed or removed
+    since the last reindex, and update their keywords in bulk.
+    """
+    keywords = dict(Keyword.objects.values_list("value", "id"))
+    snapshot = cache.get(SNAPSHOT_KEY)
+
+    tenders = Tender.objects.order_by()
+    if snapshot is None:
+        changed = "all"
+    else:
+        changed_values = set(keywords.items()) ^ set(snapshot.items())
+        terms = sorted(set(search_term(value) for value, _ in changed_values))
+        if not terms:
+            cache.set(SNAPSHOT_KEY, keywords, None)
+            return "Keywords unchanged"
+        changed = ", ".join(terms)
+        tenders = tenders.filter(
+            reduce(
+                or_,
+                (
+                    Q(title__icontains=term) | Q(description__icontains=term)
+                    for term in terms
+                ),
+            )
+        )
+
+    task = Task.objects.create(
+        id=uuid4().hex,
+        args=REINDEX_SCHEDULE,
+        kwargs=f"keywords: {changed}"[:255],
+        started=timezone.now(),
+    )
+    total = tenders.count()
+    processed = updated = 0
+    matcher = KeywordMatcher(keywords)
+    through = Tender.keywords.through
+
+    rows = tenders.values_list("id", *fields).iterator(chunk_size=CHUNK_SIZE)
+    for chunk in chunked(rows):
+        ids = [row[0] for row in chunk]
+        old_keywords = {tender_id: set() for tender_id in ids}
+        for tender_id, keyword_id in through.objects.filter(
+            tender_id__in=ids
+        ).values_list("tender_id", "keyword_id"):
+            old_keywords[tender_id].add(keyword_id)
+
+        new_keywords = {}
+        for tender_id, *texts in chunk:
+            found = set()
+            for text in texts:
+                found.update(matcher.find(text))
+            keyword_ids = set(matcher.ids[value] for value in found)
+            if keyword_ids != old_keywords[tender_id]:
+                new_keywords[tender_id] = keyword_ids
+
+        if new_keywords:
+            through.objects.filter(tender_id__in=new_keywords).delete()
+            through.objects.bulk_create(
+                [
+                    through(tender_id=tender_id, keyword_id=keyword_id)
+                    for tender_id, keyword_ids in new_keywords.items()
+                    for keyword_id in keyword_ids
+                ]
+            )
+            # Same as Tender.save, has_keywords is only ever set
+            Tender.objects.filter(
+                id__in=[t for t, keyword_ids in new_keywords.items() if keyword_ids]
+            ).update(has_keywords=True)
+            queue_index(Tender, new_keywords, related=False)
+
+        processed += len(chunk)
+        updated += len(new_keywords)
+        task.output = f"Matched {processed} of {total} tenders, {updated} updated"
+        task.save(update_fields=["output", "updated_at"])
+
+    cache.set(SNAPSHOT_KEY, keywords, None)
+    if updated:
+        invalidate_stats()
+
+    task.stopped = timezone.now()
+    task.status = "success"
+    task.save()
+    logging.warning(task.output)
+    return task.output
@@ -414,7 +414,8 @@ function initDataTables() {
       { "width": "8%", "targets": 4 },
       { "width": "8%", "targets": 5 },
     ],
-    "order": [[5, "desc"]],  // Published
+    // Search results are ranked by relevance
+    "order": searchTerm ? [] : [[5, "desc"]],  // Published
     "pageLength": 10,
     "lengthChange": false,
     "search": {
@@ -498,7 +499,7 @@ function initDataTables() {
   };
 
   const vendorOptions = {
-    "order": [[ 0, "asc" ]],
+    "order": searchTerm ? [] : [[ 0, "asc" ]],
     "pageLength": 50,
     "lengthChange": false,
     "search": {
@@ -555,6 +556,16 @@ function initDataTables() {
   const tableIds = `#tenders_table, #tenders_table_archive,
   #contract_awards_table, #vendors_table, #tender_detail_table`;
 
+  // Send back the cursor of the last page, so the server seeks to the next
+  // page instead of skipping the previous ones
+  $(tableIds).on('xhr.dt', function (e, settings, json) {
+    settings.listingCursor = json ? json.cursor : null;
+  }).on('preXhr.dt', function (e, settings, data) {
+    if (settings.listingCursor) {
+      data.cursor = settings.listingCursor;
+    }
+  });
+
   $(tableIds).each(function(){
     $(this).DataTable(tableOptions[$(this).attr("id")]);
   })
@@ -593,9 +604,38 @@ function activateHover() {
   });
 }
 
+function initFacetSelect(select) {
+  // The options are looked up by prefix as the user types, only the selected
+  // one is part of the page
+  const url = select.data('facet-url');
+  if (!url) {
+    select.select2();
+    return;
+  }
+  select.select2({
+    allowClear: true,
+    placeholder: select.find('option[value=""]').text(),
+    ajax: {
+      url: url,
+      dataType: 'json',
+      delay: 250,
+      data: function (params) {
+        return { term: params.term || '', page: params.page || 1 };
+      },
+      processResults: function (data) {
+        data.results.forEach(option => {
+          option.text = option.text + ' (' + option.count + ')';
+        });
+        return data;
+      }
+    }
+  });
+}
+
 $(document).ready(function () {
-  $('#id_vendor').select2();
-  $('#id_organization').select2();
+  $('#id_vendor, #id_organization').each(function () {
+    initFacetSelect($(this));
+  });
   $('#id_tags').select2();
   initDataTables();
 
@@ -0,0 +1,73 @@
+"""
+Tender statistics shown on the homepage.
+
+All the tender counts are computed with one aggregate query and cached for
+HOMEPAGE_STATS_TTL seconds. The cache is cleared whenever a tender or an
+award is saved or deleted and when an import finishes (every import ends by
+saving a WorkerLog), and the counts are computed again once the day they were
+computed for is over.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+STATS_KEY = "homepage_stats"
+SOURCES = ("UNGM", "IUCN", "TED")
+
+
+def compute_stats(today, now):
+    Tender = apps.get_model("app", "Tender")
+    Award = apps.get_model("app", "Award")
+
+    deadline_gte = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    deadline_lt = deadline_gte + timedelta(days=1)
+    deadline_today = Q(deadline__gte=deadline_gte, deadline__lt=deadline_lt)
+
+    counts = {
+        "keyword_tenders": Count("id", filter=Q(has_keywords=True)),
+        "expired_tenders": Count("id", filter=Tender.objects.is_expired(now)),
+    }
+    for source in SOURCES:
+        prefix = source.lower()
+        counts[f"{prefix}_tenders"] = Count("id", filter=Q(source=source))
+        counts[f"{prefix}_published_today"] = Count(
+            "id", filter=Q(source=source, published=today)
+        )
+        counts[f"{prefix}_deadline_today"] = Count(
+            "id", filter=deadline_today & Q(source=source)
+        )
+
+    stats = Tender.objects.order_by().aggregate(**counts)
+    stats["awards"] = Award.objects.count()
+    return stats
+
+
+def homepage_stats():
+    """
+    Return the tender counts of the homepage, from the cache when they were
+    computed today.
+    """
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    # The deadlines are counted by UTC day and the publication dates by local
+    # day, the counts are stale once either of them changes
+    day = (today, now.date())
+
+    cached = cache.get(STATS_KEY)
+    if cached and cached["day"] == day:
+        return cached["stats"]
+
+    stats = compute_stats(today, now)
+    cache.set(STATS_KEY, {"day": day, "stats": stats}, settings.HOMEPAGE_STATS_TTL)
+    return stats
+
+
+def invalidate_stats(*args, **kwargs):
+    """
+    Clear the cached counts. Connected to the Tender and Award post_save and
+    post_delete signals and to the WorkerLog post_save signal.
+    """
+    cache.delete(STATS_KEY)
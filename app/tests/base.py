@@ -1,8 +1,18 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.db.models import signals
 
+from app.keywords import invalidate_keywords
+from app.reference_data import invalidate_reference_data
+
 
 class BaseTestCase(TestCase):
     def setUp(self):
         signals.post_save.disconnect(sender='app.Keyword', dispatch_uid='keyword_save')
         signals.post_delete.disconnect(sender='app.Keyword', dispatch_uid='keyword_delete')
+        # Cached listing counts of the previous tests
+        cache.clear()
+        # Keywords and reference tables of the previous tests are rolled back
+        # without signals
+        invalidate_keywords()
+        invalidate_reference_data()
@@ -0,0 +1,51 @@
+from app.factories import KeywordFactory, TenderFactory
+from app.keywords import keyword_matcher
+from app.models import Tender
+from app.parsers.bulk import save_tenders
+from app.tests.base import BaseTestCase
+
+
+class BulkSaveTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(BulkSaveTestCase, self).setUp()
+        self.keyword = KeywordFactory(value='python')
+
+    def tender_dict(self, reference, **kwargs):
+        return dict({
+            'reference': reference,
+            'title': 'Title',
+            'description': 'Description',
+            'organization': 'UNOPS',
+            'url': 'http://test.com/' + reference,
+            'source': 'UNGM',
+        }, **kwargs)
+
+    def test_save_tenders(self):
+        old_tender = TenderFactory(
+            reference='OLD', title='Old title', notified=True)
+        items = [
+            self.tender_dict('NEW', title='Python developer'),
+            self.tender_dict('OLD', title='New title'),
+            self.tender_dict('NEW', title='Python developer', description='Other'),
+        ]
+
+        keyword_matcher()
+        with self.assertNumQueries(6):
+            results = save_tenders([(item, item) for item in items])
+
+        self.assertEqual([created for _, created, _ in results], [True, False, False])
+        self.assertEqual(results[1][2]['title'], ('Old title', 'New title'))
+        self.assertEqual(results[2][2], {'description': ('Description', 'Other')})
+
+        new_tender = Tender.objects.get(reference='NEW')
+        self.assertEqual(new_tender.description, 'Other')
+        self.assertTrue(new_tender.has_keywords)
+        self.assertEqual(list(new_tender.keywords.all()), [self.keyword])
+        self.assertEqual(results[0][0].id, new_tender.id)
+
+        old_tender.refresh_from_db()
+        self.assertEqual(old_tender.title, 'New title')
+        self.assertTrue(old_tender.notified)
+        self.assertFalse(old_tender.has_keywords)
+        self.assertEqual(Tender.objects.count(), 2)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import requests
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+
+from app.documents import TenderDocumentDoc
+from app.extraction import extract_document_text
+from app.factories import TenderDocumentFactory, TenderFactory
+from app.models import DocumentText
+from app.tests.base import BaseTestCase
+
+
+class DocumentTextTestCase(BaseTestCase):
+    def setUp(self):
+        super(DocumentTextTestCase, self).setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        parser_patcher = patch('app.extraction.parser.from_file')
+        self.from_file = parser_patcher.start()
+        self.from_file.return_value = {'status': 200, 'content': 'Terms of reference'}
+        self.addCleanup(parser_patcher.stop)
+
+    def document(self, content=b'%PDF terms', **kwargs):
+        document = TenderDocumentFactory(tender=TenderFactory(), **kwargs)
+        document.document.save(document.name, ContentFile(content), save=True)
+        return document
+
+    def test_extraction_queued_on_save(self):
+        with patch('app.extraction.async_task') as async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                document = self.document()
+        async_task.assert_called_once_with(
+            'app.extraction.extract_document_text', document.id)
+
+    def test_text_stored_once_per_content(self):
+        first = self.document()
+        second = self.document()
+        extract_document_text(first.id)
+        extract_document_text(second.id)
+
+        self.assertEqual(self.from_file.call_count, 1)
+        self.assertEqual(DocumentText.objects.count(), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.content(), 'Terms of reference')
+
+    def test_indexer_reads_stored_text(self):
+        document = self.document()
+        extract_document_text(document.id)
+        self.from_file.reset_mock()
+
+        queryset = TenderDocumentDoc().get_queryset().filter(id=document.id)
+        with self.assertNumQueries(1):
+            contents = [doc.content() for doc in queryset]
+        self.assertEqual(contents, ['Terms of reference'])
+        self.from_file.assert_not_called()
+
+    def test_changed_file_extracted_again(self):
+        document = self.document()
+        extract_document_text(document.id)
+
+        self.from_file.return_value = {'status': 200, 'content': 'Amended terms'}
+        document.document.save(document.name, ContentFile(b'%PDF amended'), save=True)
+        document.refresh_from_db()
+        self.assertIsNone(document.content())
+
+        extract_document_text(document.id)
+        document.refresh_from_db()
+        self.assertEqual(document.content(), 'Amended terms')
+        self.assertEqual(DocumentText.objects.count(), 2)
+        self.assertTrue(os.path.exists(document.document.path))
+
+    def test_failed_extraction_retried(self):
+        document = self.document()
+        for failure in (
+            {'side_effect': requests.exceptions.ConnectionError('Tika is down')},
+            {'return_value': {'status': 503, 'content': None}},
+        ):
+            self.from_file.configure_mock(**failure)
+            self.assertIsNone(extract_document_text(document.id))
+            self.from_file.side_effect = None
+            document.refresh_from_db()
+            self.assertIsNone(document.document_text_id)
+            self.assertEqual(DocumentText.objects.count(), 0)
+
+        self.from_file.return_value = {'status': 200, 'content': 'Terms of reference'}
+        extract_document_text(document.id)
+        document.refresh_from_db()
+        self.assertEqual(document.content(), 'Terms of reference')
+
+    def test_refused_document_not_retried(self):
+        document = self.document()
+        self.from_file.return_value = {'status': 422, 'content': None}
+        extract_document_text(document.id)
+
+        document.refresh_from_db()
+        self.assertIsNotNone(document.document_text_id)
+        self.assertIsNone(document.content())
+        self.assertEqual(DocumentText.objects.count(), 1)
@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from app.facets import facet_lookup, facet_options
+from app.factories import AwardFactory, TagsFactory, TenderFactory, VendorFactory
+from app.forms import AwardsFilter, TendersFilter
+from app.tests.base import BaseTestCase
+
+
+class FacetsTestCase(BaseTestCase):
+    def setUp(self):
+        super(FacetsTestCase, self).setUp()
+        for organization in ('UNDP', 'UNDP', 'UNEP', 'UNOPS', None):
+            TenderFactory(organization=organization, notice_type='Contract notice')
+        TenderFactory(organization='World Bank', notice_type='Award notice')
+
+    def test_options_counts(self):
+        self.assertEqual(
+            facet_options('organization'),
+            [('UNDP', 2), ('UNEP', 1), ('UNOPS', 1), ('World Bank', 1)]
+        )
+        self.assertEqual(
+            facet_options('notice_type'),
+            [('Award notice', 1), ('Contract notice', 5)]
+        )
+
+    def test_options_cached(self):
+        facet_options('organization')
+        with self.assertNumQueries(0):
+            facet_options('organization')
+
+    def test_options_invalidated_on_save(self):
+        facet_options('organization')
+        TenderFactory(organization='UNICEF')
+        self.assertIn(('UNICEF', 1), facet_options('organization'))
+
+    def test_options_invalidated_on_m2m_change(self):
+        tag = TagsFactory(name='energy')
+        self.assertIn(('energy', 0), facet_options('tag'))
+
+        TenderFactory().tags.add(tag)
+        self.assertIn(('energy', 1), facet_options('tag'))
+
+        award = AwardFactory()
+        award.vendors.add(VendorFactory(name='Acme'))
+        self.assertEqual(facet_options('vendor'), [('Acme', 1)])
+
+    def test_lookup_prefix(self):
+        options, more = facet_lookup('organization', 'une')
+        self.assertEqual(options, [('UNEP', 1)])
+        self.assertFalse(more)
+
+        options, more = facet_lookup('organization', 'UN', limit=2)
+        self.assertEqual(options, [('UNDP', 2), ('UNEP', 1)])
+        self.assertTrue(more)
+
+        options, more = facet_lookup('organization', 'UN', limit=2, offset=2)
+        self.assertEqual(options, [('UNOPS', 1)])
+        self.assertFalse(more)
+
+    def test_forms_embed_selected_options(self):
+        form = TendersFilter(initial={'organization': 'UNEP'})
+        self.assertEqual(
+            form.fields['organization'].choices,
+            [('', 'All organizations'), ('UNEP', 'UNEP')]
+        )
+        self.assertEqual(len(form.fields['type'].choices), 3)
+
+        form = AwardsFilter()
+        self.assertEqual(form.fields['vendor'].choices, [('', 'All vendors')])
+        self.assertIn(
+            reverse('facet_ajax_view', kwargs={'name': 'vendor'}),
+            str(form['vendor'])
+        )
+
+
+class FacetAjaxViewTests(BaseTestCase):
+    def setUp(self):
+        super(FacetAjaxViewTests, self).setUp()
+        user = User.objects.create(username='test_user')
+        user.set_password('12345')
+        user.save()
+        logged_in = self.client.login(username='test_user', password='12345')
+        self.assertEqual(logged_in, True)
+
+    def test_facet_ajax_view(self):
+        TenderFactory(organization='UNDP')
+        TenderFactory(organization='UNEP')
+        TenderFactory(organization='World Bank')
+
+        url = reverse('facet_ajax_view', kwargs={'name': 'organization'})
+        response = self.client.get(url, {'term': 'un'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'results': [
+                {'id': 'UNDP', 'text': 'UNDP', 'count': 1},
+                {'id': 'UNEP', 'text': 'UNEP', 'count': 1},
+            ],
+            'pagination': {'more': False},
+        })
+
+    def test_facet_ajax_view_unknown_facet(self):
+        url = reverse('facet_ajax_view', kwargs={'name': 'unknown'})
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,89 @@
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from app.factories import AwardFactory, TenderFactory
+from app.models import Tender, WorkerLog
+from app.stats import STATS_KEY
+from app.tests.base import BaseTestCase
+
+
+class HomepageViewTests(BaseTestCase):
+    def setUp(self):
+        super(HomepageViewTests, self).setUp()
+        user = User.objects.create(username='test_user')
+        user.set_password('12345')
+        user.save()
+        self.user = user
+        logged_in = self.client.login(username='test_user', password='12345')
+        self.assertEqual(logged_in, True)
+
+    def test_homepage_counts(self):
+        now = datetime.now(timezone.utc)
+        today_noon = now.replace(hour=12, minute=0, second=0, microsecond=0)
+        TenderFactory(source='UNGM', published=date.today(), deadline=today_noon)
+        TenderFactory(
+            source='UNGM', published=date.today() - timedelta(days=3),
+            deadline=now - timedelta(days=3), has_keywords=True)
+        ted = TenderFactory(
+            source='TED', published=date.today(), deadline=now + timedelta(days=3))
+        TenderFactory(
+            source='IUCN', published=date.today() - timedelta(days=1), deadline=None)
+        AwardFactory(tender=ted)
+        ted.followers.add(self.user)
+
+        context = self.client.get(reverse('homepage_view')).context
+        self.assertEqual(context['ungm_tenders'], 2)
+        self.assertEqual(context['ted_tenders'], 1)
+        self.assertEqual(context['iucn_tenders'], 1)
+        self.assertEqual(context['ungm_published_today'], 1)
+        self.assertEqual(context['ted_published_today'], 1)
+        self.assertEqual(context['iucn_published_today'], 0)
+        self.assertEqual(context['ungm_deadline_today'], 1)
+        self.assertEqual(context['ted_deadline_today'], 0)
+        self.assertEqual(context['keyword_tenders'], 1)
+        self.assertEqual(context['awards'], 1)
+        self.assertEqual(context['favorite_tenders'], 1)
+        self.assertGreaterEqual(context['expired_tenders'], 1)
+        # The tenders of the archive
+        self.assertEqual(context['expired_tenders'], Tender.objects.expired().count())
+
+    def test_homepage_counts_without_tenders(self):
+        context = self.client.get(reverse('homepage_view')).context
+        self.assertEqual(context['awards'], 0)
+        self.assertEqual(context['ted_tenders'], 0)
+
+    def test_homepage_counts_cached(self):
+        TenderFactory(source='TED')
+        self.client.get(reverse('homepage_view'))
+
+        # Session, user and favorite tenders
+        with self.assertNumQueries(3):
+            context = self.client.get(reverse('homepage_view')).context
+        self.assertEqual(context['ted_tenders'], 1)
+
+        TenderFactory(source='TED')
+        context = self.client.get(reverse('homepage_view')).context
+        self.assertEqual(context['ted_tenders'], 2)
+
+    def test_homepage_counts_invalidated_by_import(self):
+        TenderFactory(source='TED')
+        self.client.get(reverse('homepage_view'))
+
+        WorkerLog.objects.create(source='TED', update=date.today(), tenders_count=1)
+        with self.assertNumQueries(5):
+            self.client.get(reverse('homepage_view'))
+
+    def test_homepage_counts_recomputed_next_day(self):
+        TenderFactory(source='TED', published=date.today())
+        self.client.get(reverse('homepage_view'))
+
+        # Counts cached before midnight
+        cached = cache.get(STATS_KEY)
+        yesterday = date.today() - timedelta(days=1)
+        cache.set(STATS_KEY, {'day': (yesterday, yesterday), 'stats': cached['stats']})
+        with self.assertNumQueries(5):
+            context = self.client.get(reverse('homepage_view')).context
+        self.assertEqual(context['ted_published_today'], 1)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.utils import timezone
+from django_q.models import Schedule
+
+from app.factories import AwardFactory, TenderDocumentFactory, TenderFactory, VendorFactory
+from app.indexing import DRAIN_SCHEDULE, drain_index_queue, index_queue_status
+from app.models import IndexQueue
+from app.tests.base import BaseTestCase
+
+
+def queued():
+    return set(IndexQueue.objects.values_list('model', 'object_id'))
+
+
+@override_settings(ELASTICSEARCH_DSL_AUTOSYNC=True)
+class IndexQueueTestCase(BaseTestCase):
+    def setUp(self):
+        super(IndexQueueTestCase, self).setUp()
+        bulk_patcher = patch('app.indexing.bulk', return_value=(0, []))
+        self.bulk = bulk_patcher.start()
+        self.addCleanup(bulk_patcher.stop)
+
+    def test_saves_queued(self):
+        tender = TenderFactory()
+        award = AwardFactory(tender=tender)
+        self.assertEqual(queued(), {('app.tender', tender.id), ('app.award', award.id)})
+        self.assertTrue(Schedule.objects.filter(name=DRAIN_SCHEDULE).exists())
+        self.bulk.assert_not_called()
+
+    def test_related_changes_queued(self):
+        tender = TenderFactory()
+        award = AwardFactory(tender=tender)
+        document = TenderDocumentFactory(tender=tender)
+        vendor = VendorFactory()
+        IndexQueue.objects.all().delete()
+
+        tender.title = 'Renamed'
+        tender.save()
+        self.assertEqual(queued(), {
+            ('app.tender', tender.id),
+            ('app.award', award.id),
+            ('app.tenderdocument', document.id),
+        })
+
+        IndexQueue.objects.all().delete()
+        award.vendors.add(vendor)
+        self.assertEqual(queued(), {('app.award', award.id)})
+
+        IndexQueue.objects.all().delete()
+        vendor.name = 'Renamed vendor'
+        vendor.save()
+        self.assertEqual(queued(), {('app.award', award.id)})
+
+    def test_drain(self):
+        kept = TenderFactory()
+        deleted = TenderFactory()
+        deleted_id = deleted.id
+        deleted.delete()
+
+        self.assertEqual(drain_index_queue(), 'Indexed 2 objects, 0 failed')
+        actions = list(self.bulk.call_args[0][1])
+        self.assertEqual(
+            sorted((action['_op_type'], int(action['_id'])) for action in actions),
+            sorted([('index', kept.id), ('delete', deleted_id)])
+        )
+        self.assertEqual(queued(), set())
+        self.assertEqual(index_queue_status()['lag'], 0)
+
+    def test_drain_batches(self):
+        for i in range(3):
+            TenderFactory()
+        drain_index_queue(batch_size=2)
+        self.assertEqual(self.bulk.call_count, 2)
+        self.assertEqual(queued(), set())
+
+    def test_drain_failure_retried(self):
+        failing = TenderFactory()
+        TenderFactory()
+        self.bulk.return_value = (1, [{'index': {
+            '_index': 'tenders', '_id': str(failing.id), 'status': 400,
+            'error': {'type': 'mapper_parsing_exception'},
+        }}])
+
+        self.assertEqual(drain_index_queue(), 'Indexed 1 objects, 1 failed')
+        item = IndexQueue.objects.get()
+        self.assertEqual((item.model, item.object_id), ('app.tender', failing.id))
+        self.assertEqual(item.attempts, 1)
+        self.assertGreater(item.available_at, timezone.now())
+        self.assertEqual(index_queue_status()['failing'], 1)
+
+    def test_changed_while_indexing_stays_queued(self):
+        tender = TenderFactory()
+
+        def change_tender(*args, **kwargs):
+            IndexQueue.objects.update(changed_at=timezone.now() + timedelta(seconds=1))
+            return 1, []
+
+        self.bulk.side_effect = change_tender
+        drain_index_queue()
+        self.assertEqual(queued(), {('app.tender', tender.id)})
+
+    @override_settings(ELASTICSEARCH_DSL_AUTOSYNC=False)
+    def test_autosync_disabled(self):
+        TenderFactory()
+        self.assertEqual(queued(), set())
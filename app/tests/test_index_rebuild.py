@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from app.documents import AwardDoc, TenderDoc
+from app.factories import AwardFactory, TenderFactory, VendorFactory
+from app.index_rebuild import REBUILD_RUNNING_KEY, rebuild_index, rebuild_indices
+from app.indexing import drain_index_queue
+from app.models import IndexQueue
+from app.tests.base import BaseTestCase
+
+
+class IndexRebuildTestCase(BaseTestCase):
+    def setUp(self):
+        super(IndexRebuildTestCase, self).setUp()
+        self.client = MagicMock()
+        self.client.indices.exists.return_value = False
+        self.actions = []
+        bulk_patcher = patch('app.index_rebuild.parallel_bulk', side_effect=self.parallel_bulk)
+        bulk_patcher.start()
+        self.addCleanup(bulk_patcher.stop)
+
+    def parallel_bulk(self, client, actions, **kwargs):
+        for action in actions:
+            self.actions.append(action)
+            yield True, {}
+
+    def alias_actions(self):
+        (call,) = self.client.indices.update_aliases.call_args_list
+        return call.kwargs['body']['actions']
+
+    def test_rebuild(self):
+        tenders = TenderFactory.create_batch(3)
+        self.client.indices.get.return_value = {
+            'tenders_20200101000000': {}, 'tenders_20210101000000': {},
+        }
+
+        index_name, indexed = rebuild_index(TenderDoc, client=self.client)
+
+        self.assertTrue(index_name.startswith('tenders_'))
+        self.assertEqual(indexed, 3)
+        self.assertEqual({action['_index'] for action in self.actions}, {index_name})
+        self.assertEqual(
+            {action['_id'] for action in self.actions}, {tender.id for tender in tenders})
+
+        create = self.client.indices.create.call_args.kwargs
+        self.assertEqual(create['index'], index_name)
+        self.assertEqual(create['body']['settings']['refresh_interval'], '-1')
+        self.assertEqual(create['body']['settings']['number_of_replicas'], 0)
+        self.assertIn('mappings', create['body'])
+        restored = self.client.indices.put_settings.call_args.kwargs['body']['index']
+        self.assertIsNone(restored['refresh_interval'])
+
+        self.assertEqual(self.alias_actions(), [
+            {'remove': {'index': 'tenders_20210101000000', 'alias': 'tenders'}},
+            {'remove': {'index': 'tenders_20200101000000', 'alias': 'tenders'}},
+            {'add': {'index': index_name, 'alias': 'tenders'}},
+        ])
+        deleted = [call.kwargs['index'] for call in self.client.indices.delete.call_args_list]
+        self.assertEqual(deleted, ['tenders_20200101000000', 'tenders_20210101000000'])
+
+    def test_keep_previous_version(self):
+        self.client.indices.get.return_value = {
+            'tenders_20200101000000': {}, 'tenders_20210101000000': {},
+        }
+        rebuild_index(TenderDoc, client=self.client, keep=1)
+        deleted = [call.kwargs['index'] for call in self.client.indices.delete.call_args_list]
+        self.assertEqual(deleted, ['tenders_20200101000000'])
+
+    def test_index_replaced_by_alias(self):
+        self.client.indices.get.return_value = {}
+        self.client.indices.exists.return_value = True
+        self.client.indices.exists_alias.return_value = False
+
+        index_name, _ = rebuild_index(TenderDoc, client=self.client)
+
+        self.assertEqual(self.alias_actions(), [
+            {'remove_index': {'index': 'tenders'}},
+            {'add': {'index': index_name, 'alias': 'tenders'}},
+        ])
+
+    def test_awards_without_query_per_award(self):
+        vendors = VendorFactory.create_batch(2)
+        for award in AwardFactory.create_batch(5):
+            award.vendors.set(vendors)
+        self.client.indices.get.return_value = {}
+
+        # The awards with their tenders, then their vendors
+        with self.assertNumQueries(2):
+            _, indexed = rebuild_index(AwardDoc, client=self.client)
+
+        self.assertEqual(indexed, 5)
+        expected = ','.join(vendor.name for vendor in vendors)
+        self.assertTrue(all(
+            sorted(action['_source']['vendors_name'].split(',')) == sorted(expected.split(','))
+            for action in self.actions
+        ))
+
+    @override_settings(ELASTICSEARCH_DSL_AUTOSYNC=True)
+    def test_queue_drained_after_rebuild(self):
+        def drain_during_rebuild(*args, **kwargs):
+            self.assertEqual(drain_index_queue(), 'Waiting for the rebuild of the indices')
+            return {}
+
+        TenderFactory()
+        self.client.indices.get.side_effect = drain_during_rebuild
+
+        with patch('app.indexing.bulk', return_value=(0, [])) as bulk:
+            rebuild_indices([TenderDoc], client=self.client)
+            bulk.assert_not_called()
+            self.assertFalse(cache.get(REBUILD_RUNNING_KEY))
+            self.assertEqual(IndexQueue.objects.count(), 1)
+
+            drain_index_queue()
+            bulk.assert_called_once()
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django_q.models import Schedule
+
+from app.factories import KeywordFactory, TenderFactory
+from app.models import Keyword, Task, Tender
+from app.signals import SNAPSHOT_KEY, reindex_keywords, set_keywords
+from app.tests.base import BaseTestCase
+
+
+class KeywordReindexTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(KeywordReindexTestCase, self).setUp()
+        cache.delete(SNAPSHOT_KEY)
+
+    def test_set_keywords_debounced(self):
+        keyword = KeywordFactory(value='python')
+        set_keywords(Keyword, keyword)
+        set_keywords(Keyword, keyword)
+        self.assertEqual(
+            list(Schedule.objects.values_list('func', flat=True)),
+            ['app.signals.reindex_keywords'],
+        )
+
+    @patch('app.signals.queue_index')
+    def test_reindex_changed_keywords(self, mock_queue_index):
+        python = KeywordFactory(value='python')
+        python_tender = TenderFactory(title='Python developer')
+        data_tender = TenderFactory(title='Data science consultancy')
+        TenderFactory(title='Office supplies')
+        reindex_keywords()
+        self.assertEqual(list(python_tender.keywords.all()), [python])
+
+        # Edited with the signals disconnected, found through the snapshot
+        data_science = KeywordFactory(value='data science')
+        python.delete()
+        mock_queue_index.reset_mock()
+        reindex_keywords()
+
+        self.assertEqual(list(python_tender.keywords.all()), [])
+        self.assertEqual(list(data_tender.keywords.all()), [data_science])
+        data_tender.refresh_from_db()
+        self.assertTrue(data_tender.has_keywords)
+        # The links to the deleted keyword are already gone
+        model, ids = mock_queue_index.call_args[0]
+        self.assertEqual((model, list(ids)), (Tender, [data_tender.id]))
+
+        task = Task.objects.filter(kwargs='keywords: python, science').get()
+        self.assertEqual(task.status, 'success')
+        self.assertEqual(task.output, 'Matched 2 of 2 tenders, 1 updated')
+
+        self.assertEqual(reindex_keywords(), 'Keywords unchanged')
+        self.assertFalse(Tender.objects.filter(keywords__value='python').exists())
@@ -0,0 +1,41 @@
+from app.factories import KeywordFactory, TenderFactory
+from app.keywords import KeywordMatcher, keyword_matcher
+from app.models import Keyword, keywords_in
+from app.tests.base import BaseTestCase
+
+
+class KeywordMatcherTestCase(BaseTestCase):
+
+    def test_find_whole_words(self):
+        matcher = KeywordMatcher(['python', 'data', 'data science', 'c++'])
+        self.assertEqual(
+            matcher.find('Python developers for DATA\n science, not pythonic'),
+            {'python', 'data', 'data science'},
+        )
+        self.assertEqual(matcher.find('Data sciences and C++'), {'data', 'c++'})
+        self.assertEqual(matcher.find('metadata'), set())
+        self.assertEqual(matcher.find(None), set())
+        self.assertEqual(KeywordMatcher([]).find('python'), set())
+
+    def test_mark(self):
+        matcher = KeywordMatcher(['python', 'data science'])
+        self.assertEqual(
+            matcher.mark('Python and data science, pythonic'),
+            '<mark>Python</mark> and <mark>data science</mark>, pythonic',
+        )
+        self.assertEqual(KeywordMatcher([]).mark(None), '')
+
+    def test_matcher_cached_until_keywords_change(self):
+        KeywordFactory(value='python')
+        # Built when the tender is saved
+        tender = TenderFactory(title='Python and Django')
+        with self.assertNumQueries(0):
+            self.assertEqual(keywords_in(tender.title), ['python'])
+            self.assertEqual(
+                tender.marked_keyword_title, '<mark>Python</mark> and Django'
+            )
+
+        KeywordFactory(value='django')
+        self.assertEqual(keyword_matcher().find(tender.title), {'python', 'django'})
+        Keyword.objects.filter(value='python').delete()
+        self.assertEqual(keyword_matcher().find(tender.title), {'django'})
@@ -18,6 +18,17 @@ from app.tests.base import BaseTestCase
 from app.utils import emails_to_notify
 
 
+def notice_page(url, **kwargs):
+    """
+    The saved UNGM notice page of the url.
+    """
+    response = MagicMock(headers={})
+    response.status_code = 200
+    with open(f"app/tests/parser_files/{url.rsplit('/', 1)[1]}.html", 'r') as f:
+        response.content = f.read()
+    return response
+
+
 class SendMailTest(BaseTestCase):
     def setUp(self):
         super(SendMailTest, self).setUp()
@@ -153,33 +164,12 @@ class SendMailTest(BaseTestCase):
         self.assertEqual(award_list[1]['href'], award_tender_url2)
         self.assertEqual(award_list[2]['href'], award_tender_url3)
 
-    @patch('app.server_requests.requests')
-    def test_mailing_favorites(self, mock_requests):
-
-        with open('app/tests/parser_files/94909.html', 'r') as f:
-            mock_response1 = MagicMock()
-            mock_response1.status_code = 200
-            mock_response1.content = f.read()
-
-
-        with open('app/tests/parser_files/94920.html', 'r') as f:
-            mock_response2 = MagicMock()
-            mock_response2.status_code = 200
-            mock_response2.content = f.read()
-
-        with open('app/tests/parser_files/92850.html', 'r') as f:
-            mock_response3 = MagicMock()
-            mock_response3.status_code = 200
-            mock_response3.content = f.read()
-
-        mock_requests.get.side_effect = [mock_response1, ]
-
+    @patch('app.parsers.ungm_fetcher.UNGMFetcher.get', side_effect=notice_page)
+    def test_mailing_favorites(self, mock_get):
         original_tender1_organization = self.tender1.organization
         management.call_command('notify_favorites')
         self.assertEqual(len(mail.outbox), 1)
 
-        mock_requests.get.side_effect = [mock_response1, ]
-
         self.tender1 = Tender.objects.get(reference=self.tender1.reference)
         self.tender1.organization = 'CHANGE1'
         self.tender1.save()
@@ -187,8 +177,6 @@ class SendMailTest(BaseTestCase):
         management.call_command('notify_favorites')
         self.assertEqual(len(mail.outbox), 2)
 
-        mock_requests.get.side_effect = [mock_response1, ]
-
         self.tender3 = Tender.objects.get(reference=self.tender3.reference)
         self.tender3.organization = 'CHANGE2'
         self.tender3.save()
@@ -204,27 +192,8 @@ class SendMailTest(BaseTestCase):
         self.assertEqual(self.tender1.organization in message, True)
         self.assertEqual(self.tender3.organization in message, False)
 
-    @patch('app.server_requests.requests')
-    def test_mailing_favorites_digest(self, mock_requests):
-
-        with open('app/tests/parser_files/94909.html', 'r') as f:
-            mock_response1 = MagicMock()
-            mock_response1.status_code = 200
-            mock_response1.content = f.read()
-
-
-        with open('app/tests/parser_files/94920.html', 'r') as f:
-            mock_response2 = MagicMock()
-            mock_response2.status_code = 200
-            mock_response2.content = f.read()
-
-        with open('app/tests/parser_files/92850.html', 'r') as f:
-            mock_response3 = MagicMock()
-            mock_response3.status_code = 200
-            mock_response3.content = f.read()
-
-        mock_requests.get.side_effect = [mock_response3, mock_response1, mock_response2 ]
-
+    @patch('app.parsers.ungm_fetcher.UNGMFetcher.get', side_effect=notice_page)
+    def test_mailing_favorites_digest(self, mock_get):
         self.tender2 = Tender.objects.get(reference=self.tender2.reference)
         self.tender2.organization = 'CHANGE2'
         self.tender2.followers.add(self.user)
@@ -245,7 +214,6 @@ class SendMailTest(BaseTestCase):
         management.call_command('notify_favorites', digest=True)
         self.assertEqual(len(mail.outbox), 1)
 
-
         alt_body = mail.outbox[0].alternatives[0][0]
         print(alt_body)
         soup = BeautifulSoup(alt_body, 'html.parser')
@@ -267,40 +235,17 @@ class SendMailTest(BaseTestCase):
         self.assertEqual(tender_list[1]['href'], tender_1_url)
         self.assertEqual(tender_list[2]['href'], tender_2_url)
 
-    @patch('app.server_requests.requests')
-    def test_mailing_keywords(self, mock_requests):
-
-        with open('app/tests/parser_files/94909.html', 'r') as f:
-            mock_response1 = MagicMock()
-            mock_response1.status_code = 200
-            mock_response1.content = f.read()
-
-
-        with open('app/tests/parser_files/94920.html', 'r') as f:
-            mock_response2 = MagicMock()
-            mock_response2.status_code = 200
-            mock_response2.content = f.read()
-
-        with open('app/tests/parser_files/92850.html', 'r') as f:
-            mock_response3 = MagicMock()
-            mock_response3.status_code = 200
-            mock_response3.content = f.read()
-
-        mock_requests.get.side_effect = [mock_response3, mock_response1, mock_response2]
-
+    @patch('app.parsers.ungm_fetcher.UNGMFetcher.get', side_effect=notice_page)
+    def test_mailing_keywords(self, mock_get):
         management.call_command('notify_keywords')
         self.assertEqual(len(mail.outbox), 1)
 
-        mock_requests.get.side_effect = [mock_response1, mock_response2]
-
         self.tender2.organization = 'CHANGE1'
         self.tender2.save()
 
         management.call_command('notify_keywords')
         self.assertEqual(len(mail.outbox), 2)
 
-        mock_requests.get.side_effect = [mock_response1, mock_response2]
-
         self.tender3.organization = 'CHANGE2'
         self.tender3.save()
 
@@ -312,27 +257,8 @@ class SendMailTest(BaseTestCase):
         self.assertEqual(self.tender2.organization in message, False)
         self.assertEqual(self.tender3.organization in message, False)
 
-    @patch('app.server_requests.requests')
-    def test_mailing_keywords_digest(self, mock_requests):
-
-        with open('app/tests/parser_files/94909.html', 'r') as f:
-            mock_response1 = MagicMock()
-            mock_response1.status_code = 200
-            mock_response1.content = f.read()
-
-
-        with open('app/tests/parser_files/94920.html', 'r') as f:
-            mock_response2 = MagicMock()
-            mock_response2.status_code = 200
-            mock_response2.content = f.read()
-
-        with open('app/tests/parser_files/92850.html', 'r') as f:
-            mock_response3 = MagicMock()
-            mock_response3.status_code = 200
-            mock_response3.content = f.read()
-
-        mock_requests.get.side_effect = [mock_response3, mock_response1, mock_response2]
-
+    @patch('app.parsers.ungm_fetcher.UNGMFetcher.get', side_effect=notice_page)
+    def test_mailing_keywords_digest(self, mock_get):
         self.tender1 = Tender.objects.get(reference=self.tender1.reference)
         self.tender1.title = 'test_title1 python'
         self.tender1.save()
@@ -1,10 +1,12 @@
 import os
+from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.core.files import File
 from django.core.management import call_command
 from django.urls import reverse
 
+from app.extraction import extract_document_text
 from app.factories import KeywordFactory, TenderFactory, TenderDocumentFactory
 from app.tests.base import BaseTestCase
 
@@ -27,6 +29,7 @@ class SearchTestCase(BaseTestCase):
 
         with open('app/tests/parser_files/Test_search.pdf', 'rb') as g:
             self.tender_document.document.save(self.tender_document.name, File(g), save=True)
+        extract_document_text(self.tender_document.id)
 
         with open(os.devnull, 'w') as f:
             call_command('search_index', '--rebuild', '-f', stdout=f)
@@ -42,3 +45,121 @@ class SearchTestCase(BaseTestCase):
         response = self.client.get(url, follow=True)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Tender_1')
+
+
+def es_response(hits):
+    return {
+        'took': 2,
+        'timed_out': False,
+        'hits': {
+            'total': {'value': len(hits), 'relation': 'eq'},
+            'hits': hits,
+        },
+    }
+
+
+class SearchViewTestCase(BaseTestCase):
+    def setUp(self):
+        super(SearchViewTestCase, self).setUp()
+
+        user = User.objects.create(username='test_user')
+        user.set_password('12345')
+        user.save()
+        logged_in = self.client.login(username='test_user', password='12345')
+        self.assertEqual(logged_in, True)
+
+        self.client_patcher = patch('elasticsearch_dsl.search.get_connection')
+        self.es = self.client_patcher.start().return_value
+        self.addCleanup(self.client_patcher.stop)
+
+    def test_search_single_request(self):
+        self.es.msearch.return_value = {'responses': [
+            es_response([{
+                '_index': 'tenders', '_id': '5', '_score': 2.0, 'sort': [2.0, 5],
+                '_source': {'title': 'Solar panels', 'organization': 'UNDP', 'source': 'UNGM'},
+                'highlight': {
+                    'title': ['<mark>Solar</mark> panels'],
+                    # Encoded by Elasticsearch
+                    'description': ['&lt;b&gt;Install&lt;/b&gt; solar panels'],
+                },
+            }]),
+            es_response([{
+                '_index': 'tender_documents', '_id': '3', '_score': 1.0, 'sort': [1.0, 3],
+                '_source': {'name': 'terms.pdf', 'tender_id': 7, 'tender_title': 'Solar farm'},
+                'highlight': {'content': ['<mark>Solar</mark> farm terms']},
+            }]),
+            es_response([]),
+        ]}
+
+        url = reverse('search_results', kwargs={'pk': 'solar'})
+        with self.assertNumQueries(2):  # Session and user
+            response = self.client.get(url)
+
+        self.assertEqual(self.es.msearch.call_count, 1)
+        body = self.es.msearch.call_args.kwargs['body']
+        self.assertEqual(
+            [header['index'] for header in body[::2]],
+            [['tenders'], ['tender_documents'], ['awards']]
+        )
+        self.assertEqual(body[1]['highlight']['pre_tags'], ['<mark>'])
+        self.assertNotIn('description', body[1]['_source'])
+        self.assertNotIn('content', body[3]['_source'])
+
+        self.assertContains(response, '<mark>Solar</mark> panels')
+        self.assertContains(response, '&lt;b&gt;Install&lt;/b&gt; solar panels')
+        self.assertContains(response, reverse('tender_detail_view', kwargs={'pk': 5}))
+        self.assertContains(response, reverse('tender_detail_view', kwargs={'pk': 7}))
+        self.assertContains(response, 'terms.pdf: <mark>Solar</mark> farm terms')
+        self.assertIn('elasticsearch;dur=', response['Server-Timing'])
+        self.assertIn('es_tenders;dur=2', response['Server-Timing'])
+
+    def test_search_after(self):
+        tender_hit = {
+            '_index': 'tenders', '_id': '5', '_score': 2.0, 'sort': [2.0, 5],
+            '_source': {'title': 'Solar panels'},
+        }
+        self.es.msearch.return_value = {'responses': [
+            es_response([tender_hit]), es_response([]), es_response([]),
+        ]}
+
+        url = reverse('search_results', kwargs={'pk': 'solar'})
+        with self.settings(SEARCH_PAGE_SIZE=1):
+            response = self.client.get(url)
+            next_url = response.context['tenders']['next_url']
+            self.assertIsNone(response.context['awards']['next'])
+
+            response = self.client.get(url + next_url)
+        body = self.es.msearch.call_args.kwargs['body']
+        self.assertEqual(body[1]['search_after'], [2.0, 5])
+        self.assertEqual(body[1]['size'], 1)
+        self.assertNotIn('search_after', body[5])
+        self.assertEqual(response.context['tenders']['first_url'], '?')
+
+    def test_falsy_values_kept(self):
+        self.es.msearch.return_value = {'responses': [
+            es_response([]), es_response([]),
+            es_response([{
+                '_index': 'awards', '_id': '4', '_score': 1.0, 'sort': [1.0, 4],
+                '_source': {
+                    'vendors_name': 'Solar Ltd', 'tender_title': 'Solar farm',
+                    'currency': 'USD', 'value': 0,
+                },
+            }]),
+        ]}
+
+        url = reverse('search_results', kwargs={'pk': 'solar'})
+        response = self.client.get(url)
+        (award,) = response.context['awards']['results']
+        self.assertEqual(award['value'], '0')
+
+    def test_malformed_search_after(self):
+        self.es.msearch.return_value = {'responses': [
+            es_response([]), es_response([]), es_response([]),
+        ]}
+
+        url = reverse('search_results', kwargs={'pk': 'solar'})
+        for position in ('[{},"x"]', '[2.0,"5"]', '[true,5]', '[2.0,5,1]', 'x'):
+            response = self.client.get(url, {'tenders_after': position})
+            self.assertEqual(response.status_code, 200)
+            body = self.es.msearch.call_args.kwargs['body']
+            self.assertNotIn('search_after', body[1])
@@ -0,0 +1,83 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from app.parsers.archive_store import ArchiveStore
+from app.tests.base import BaseTestCase
+
+
+class ArchiveStoreTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(ArchiveStoreTestCase, self).setUp()
+        self.files_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.files_dir.name, 'TED_archives')
+        os.makedirs(self.path)
+        self.store = ArchiveStore(self.path, max_size=20)
+
+    def tearDown(self):
+        self.files_dir.cleanup()
+        super(ArchiveStoreTestCase, self).tearDown()
+
+    def add(self, name, content, mtime):
+        with open(os.path.join(self.path, name), 'wb') as f:
+            f.write(content)
+        file_path = self.store.add(name)
+        os.utime(file_path, (mtime, mtime))
+        return file_path
+
+    def test_get_verifies_archive(self):
+        file_path = self.add('201900198', b'archive', 1)
+        self.assertEqual(self.store.get('201900198'), file_path)
+        self.assertGreater(os.path.getmtime(file_path), 1)
+        self.assertIsNone(self.store.get('201900199'))
+
+        with open(file_path, 'wb') as f:
+            f.write(b'corrupt')
+        self.assertIsNone(self.store.get('201900198'))
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_evict_least_recently_used(self):
+        self.add('201900198', b'0123456789', 3)
+        self.add('201900199', b'0123456789', 1)
+        self.add('201900200', b'0123456789', 2)
+        with open(os.path.join(self.path, '201900201.part'), 'wb') as f:
+            f.write(b'0123456789')
+
+        self.assertEqual(self.store.evict(), ['201900199'])
+        self.assertEqual(
+            [name for name, _, _ in self.store.entries()],
+            ['201900200', '201900198'],
+        )
+
+    def test_leftover_directory_skipped(self):
+        self.add('201900198', b'0123456789', 1)
+        self.add('201900199', b'0123456789', 2)
+        os.makedirs(os.path.join(self.path, '201900200', 'extracted'))
+
+        self.assertIsNone(self.store.get('201900200'))
+        self.assertEqual(
+            [name for name, _, _ in self.store.entries()],
+            ['201900198', '201900199'],
+        )
+        self.assertEqual(self.store.prune(max_size=0), ['201900198', '201900199'])
+        self.assertEqual(os.listdir(self.path), ['201900200'])
+
+    def test_ted_archives_command(self):
+        self.add('201900198', b'0123456789', 1)
+        self.add('201900199', b'0123456789', 2)
+        with open(os.path.join(self.path, '201900199'), 'wb') as f:
+            f.write(b'corrupt')
+
+        out = StringIO()
+        with override_settings(FILES_DIR=self.files_dir.name):
+            call_command('ted_archives', stdout=out)
+            self.assertIn('2 stored TED archive(s)', out.getvalue())
+            call_command('ted_archives', prune=True, max_size=0, stdout=out)
+
+        self.assertIn('Removed 201900199', out.getvalue())
+        self.assertIn('Removed 201900198', out.getvalue())
+        self.assertEqual(os.listdir(self.path), [])
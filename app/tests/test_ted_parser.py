@@ -1,3 +1,6 @@
+import os
+import tarfile
+import tempfile
 from datetime import date, datetime, timedelta
 from multiprocessing import Process
 from unittest.mock import patch, MagicMock
@@ -6,9 +9,10 @@ from dateutil.relativedelta import relativedelta
 from django.test import override_settings
 from django.utils.timezone import make_aware
 
-from app.factories import CPVCodeFactory, TedCountryFactory
-from app.models import Award, Tender
-from app.parsers.ted import TEDParser, process_daily_archive
+from app.factories import CPVCodeFactory, TedCountryFactory, TenderFactory
+from app.models import Award, TEDReleaseCalendar, TEDRenewalLookup, Tender
+from app.parsers.downloader import ArchiveDownloader
+from app.parsers.ted import TEDParser, TEDWorker, process_daily_archive
 from app.tests.base import BaseTestCase
 
 
@@ -237,6 +241,85 @@ class TedParserTestCase(BaseTestCase):
             self.assertEqual(awards[0]['award_date'], date.today())
             self.assertEqual(awards[0]['renewal_date'], date.today() + relativedelta(months=64))
 
+    @staticmethod
+    def make_archive(directory, notices):
+        archive_path = os.path.join(directory, '201905500')
+        with tarfile.open(archive_path, 'w:gz') as tf:
+            for name, notice_file in notices:
+                tf.add(notice_file, arcname='20190319_055/' + name)
+        return archive_path
+
+    @patch('app.parsers.ted.requests')
+    def test_ted_parse_archive_stream(self, mock_requests):
+        with open('app/tests/parser_files/contract_notice_nonrenewable.xml', 'r') as g:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.content = g.read()
+
+        mock_requests.get.return_value = mock_response
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = self.make_archive(directory, [
+                ('125860_2019.xml', 'app/tests/parser_files/base_ted_notice.xml'),
+            ])
+            parser = TEDParser(archives=[archive_path])
+            changed_tenders, created = parser.parse_notices([], False)
+
+            self.assertEqual(os.listdir(directory), ['201905500'])
+
+        self.assertEqual(created, 1)
+        self.assertEqual(changed_tenders, [])
+        self.assertTrue(Tender.objects.filter(reference='125860-2019').exists())
+
+    @patch('app.parsers.ted.TEDParser._parse_notice')
+    def test_ted_parse_archive_stream_update_mode(self, mock_parse_notice):
+        tender = TenderFactory(reference='125861-2019', source='TED')
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = self.make_archive(directory, [
+                ('125860_2019.xml', 'app/tests/parser_files/base_ted_notice.xml'),
+            ])
+            parser = TEDParser(archives=[archive_path])
+            changed_tenders, created = parser.parse_notices([tender], False)
+
+        mock_parse_notice.assert_not_called()
+        self.assertEqual(created, 0)
+        self.assertEqual(changed_tenders, [])
+
+    @patch('app.parsers.ted.time')
+    @patch('app.parsers.ted.requests')
+    def test_ted_parser_engines_match(self, mock_requests, _):
+        with open('app/tests/parser_files/contract_notice.xml', 'r') as g:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.content = g.read()
+
+        mock_requests.get.return_value = mock_response
+        notice_files = [
+            'base_ted_notice.xml',
+            'ted_notice_all_empty.xml',
+            'ted_notice_award_all_empty.xml',
+            'ted_notice_award_date.xml',
+            'ted_notice_contract_award.xml',
+            'ted_notice_date.xml',
+            'ted_notice_full.xml',
+            'ted_notice_many_awards.xml',
+        ]
+        for notice_file in notice_files:
+            with open('app/tests/parser_files/' + notice_file, 'r') as f:
+                content = f.read()
+
+            results = {}
+            for engine in ('bs4', 'lxml'):
+                with self.subTest(notice_file=notice_file, engine=engine):
+                    with override_settings(TED_PARSER_ENGINE=engine):
+                        parser = TEDParser('', [])
+                        codes = {}
+                        results[engine] = parser._parse_notice(
+                            content, [], notice_file, codes, False
+                        ), codes
+
+            with self.subTest(notice_file=notice_file):
+                self.assertEqual(results['bs4'], results['lxml'])
+
     def test_multiple_update_ted_ftp_retry(self):
         def run_process_daily_archive():
             process_daily_archive(date(day=13, month=10, year=2019))
@@ -249,3 +332,247 @@ class TedParserTestCase(BaseTestCase):
 
         join = [p.join() for p in processes]
         assert len([p for p in join if p]) == 0
+
+    def test_ted_prefilter_notice(self):
+        with open('app/tests/parser_files/base_ted_notice.xml', 'r') as f:
+            content = f.read()
+
+        self.assertIsNone(self.parser.prefilter_notice(content))
+
+        rejected = [
+            ('doc_type', content.replace(
+                '>Contract award notice<', '>Prior information notice<'
+            )),
+            ('auth_type', content.replace(
+                '>European Institution/Agency or International Organisation<',
+                '>Ministry or any other national or federal authority<'
+            )),
+            ('country', content.replace(
+                '<ISO_COUNTRY VALUE="BE"/>', '<ISO_COUNTRY VALUE="FR"/>'
+            )),
+            ('cpv_code', content.replace('CODE="44115800"', 'CODE="03000000"')),
+        ]
+        for reason, notice in rejected:
+            with self.subTest(reason=reason):
+                self.assertEqual(self.parser.prefilter_notice(notice), reason)
+                with self.assertRaises(StopIteration):
+                    self.parser._parse_notice(notice, [], 'test', {}, False)
+
+        self.assertEqual(
+            self.parser.rejected_notices,
+            {'doc_type': 1, 'auth_type': 1, 'country': 1, 'cpv_code': 1},
+        )
+
+    @patch('app.parsers.ted.time')
+    @patch('app.parsers.ted.requests')
+    def test_ted_parse_archive_parallel(self, mock_requests, _):
+        with open('app/tests/parser_files/contract_notice.xml', 'r') as g:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.content = g.read()
+
+        mock_requests.get.return_value = mock_response
+        notice_files = [
+            'base_ted_notice.xml',
+            'ted_notice_all_empty.xml',
+            'ted_notice_contract_award.xml',
+            'ted_notice_full.xml',
+            'ted_notice_many_awards.xml',
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = self.make_archive(directory, [
+                ('{}_2019.xml'.format(i), 'app/tests/parser_files/' + notice_file)
+                for i, notice_file in enumerate(notice_files)
+            ])
+
+            results = {}
+            for workers in (1, 2):
+                with override_settings(TED_PARSER_WORKERS=workers):
+                    parser = TEDParser(archives=[archive_path])
+                    results[workers] = (
+                        list(parser.iter_parsed_notices([], False)),
+                        parser.rejected_notices,
+                    )
+            self.assertEqual(len(results[1][0]), len(notice_files))
+            self.assertEqual(results[1], results[2])
+
+            with override_settings(TED_PARSER_WORKERS=2):
+                parser = TEDParser(archives=[archive_path])
+                _, created = parser.parse_notices([], False)
+
+        self.assertEqual(created, 3)
+        self.assertTrue(Tender.objects.filter(reference='386555-2014').exists())
+
+    @patch('app.parsers.ted.ProcessPoolExecutor')
+    def test_ted_parse_archive_in_daemon_process(self, executor):
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = self.make_archive(directory, [
+                ('0_2019.xml', 'app/tests/parser_files/ted_notice_all_empty.xml'),
+            ])
+            parser = TEDParser(archives=[archive_path])
+            with override_settings(TED_PARSER_WORKERS=2), \
+                    patch('app.parsers.ted.multiprocessing.current_process') as process, \
+                    self.assertLogs(level='WARNING') as logs:
+                process.return_value.daemon = True
+                parsed_notices = list(parser.iter_parsed_notices([], False))
+
+        executor.assert_not_called()
+        self.assertEqual(len(parsed_notices), 1)
+        self.assertIn('daemonic process', logs.output[0])
+
+    @patch('app.parsers.ted.time')
+    @patch('app.parsers.ted.requests')
+    def test_ted_renewal_lookups(self, mock_requests, _):
+        with open('app/tests/parser_files/contract_notice.xml', 'r') as g:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.content = g.read()
+
+        mock_requests.get.return_value = mock_response
+        notice_number = '2022/S 166-470275'
+        self.assertEqual(self.parser.lookup_renewal_date(notice_number), ('64', 'MONTH'))
+        self.assertEqual(self.parser.lookup_renewal_date(notice_number), ('64', 'MONTH'))
+        self.assertEqual(mock_requests.get.call_count, 1)
+        self.assertEqual(self.parser.renewal_lookups.stats, {'hits': 1, 'misses': 1})
+
+        mock_response.status_code = 404
+        self.assertEqual(self.parser.lookup_renewal_date('2022/S 001-000001'), (None, None))
+        self.parser.renewal_lookups.save()
+        self.assertEqual(TEDRenewalLookup.objects.count(), 2)
+
+        parser = TEDParser('', [])
+        self.assertEqual(parser.lookup_renewal_date(notice_number), ('64', 'MONTH'))
+        self.assertEqual(parser.lookup_renewal_date('2022/S 001-000001'), (None, None))
+        self.assertEqual(mock_requests.get.call_count, 2)
+
+        # Negative results are looked up again once expired
+        TEDRenewalLookup.objects.filter(duration__isnull=True).update(
+            updated_at=make_aware(datetime.now() - timedelta(days=30))
+        )
+        parser = TEDParser('', [])
+        self.assertEqual(parser.lookup_renewal_date(notice_number), ('64', 'MONTH'))
+        self.assertEqual(parser.lookup_renewal_date('2022/S 001-000001'), (None, None))
+        self.assertEqual(mock_requests.get.call_count, 3)
+
+    @patch('app.parsers.ted.requests')
+    def test_ted_renewal_lookups_imported_notice(self, mock_requests):
+        CPVCodeFactory(code=30000000)
+        with open('app/tests/parser_files/contract_notice_nonrenewable.xml', 'r') as f:
+            contract_notice = f.read()
+        with open('app/tests/parser_files/base_ted_notice.xml', 'r') as f:
+            award_notice = f.read()
+
+        for engine in ('bs4', 'lxml'):
+            with self.subTest(engine=engine):
+                with override_settings(
+                    TED_PARSER_ENGINE=engine,
+                    TED_DOC_TYPES=['Contract notice', 'Contract award notice'],
+                ):
+                    parser = TEDParser('', [])
+                    parser._parse_notice(contract_notice, [], 'notice', {}, False)
+                    self.assertEqual(
+                        parser.renewal_lookups.new_lookups,
+                        {'2018/S 223-509275': (None, None)},
+                    )
+                    _, awards = parser._parse_notice(award_notice, [], 'award', {}, False)
+                    self.assertEqual(awards[0]['renewal_date'], None)
+
+        mock_requests.get.assert_not_called()
+
+    def test_ted_download_archives(self):
+        with tempfile.TemporaryDirectory() as path:
+            downloader = ArchiveDownloader('https://ted.test/daily/', path, 2, 100)
+            downloader.session = MagicMock()
+            with open(os.path.join(path, 'B.tar.gz.part'), 'wb') as f:
+                f.write(b'partial ')
+
+            def get(url, headers, **kwargs):
+                response = MagicMock(headers={})
+                if url.endswith('missing.tar.gz'):
+                    response.raise_for_status.side_effect = Exception('404')
+                elif headers:
+                    self.assertEqual(headers, {'Range': 'bytes=8-'})
+                    response.status_code = 206
+                    response.iter_content.return_value = [b'content']
+                else:
+                    response.status_code = 200
+                    response.iter_content.return_value = [b'full ', b'content']
+                response.__enter__.return_value = response
+                return response
+
+            downloader.session.get.side_effect = get
+            file_paths = downloader.download_all(
+                ['A.tar.gz', 'missing.tar.gz', 'B.tar.gz', 'A.tar.gz']
+            )
+
+            self.assertEqual(file_paths, [
+                os.path.join(path, 'A.tar.gz'), os.path.join(path, 'B.tar.gz')
+            ])
+            self.assertEqual(downloader.session.get.call_count, 3)
+            with open(file_paths[0], 'rb') as f:
+                self.assertEqual(f.read(), b'full content')
+            with open(file_paths[1], 'rb') as f:
+                self.assertEqual(f.read(), b'partial content')
+            self.assertEqual(sorted(os.listdir(path)), ['A.tar.gz', 'B.tar.gz'])
+
+    def test_ted_download_tender_archive(self):
+        first_day, second_day = date(2019, 10, 14), date(2019, 10, 15)
+        TEDReleaseCalendar.objects.create(oj_s=198, date=first_day)
+        TEDReleaseCalendar.objects.create(oj_s=199, date=second_day)
+        first_tenders = [
+            TenderFactory(source='TED', published=first_day) for _ in range(3)
+        ]
+        second_tender = TenderFactory(source='TED', published=second_day)
+
+        with tempfile.TemporaryDirectory() as files_dir, override_settings(
+            FILES_DIR=files_dir
+        ):
+            worker = TEDWorker()
+            worker.downloader = MagicMock()
+            worker.downloader.download_all.side_effect = (
+                lambda names: self.fake_download(worker.path, names)
+            )
+            tenders = Tender.objects.order_by('id')
+            with self.assertNumQueries(3):
+                worker.download_tender_archive(tenders)
+
+            worker.downloader.download_all.assert_called_once_with(
+                ['201900198', '201900199']
+            )
+            first_path = os.path.join(worker.path, '201900198')
+            second_path = os.path.join(worker.path, '201900199')
+            self.assertEqual(worker.archives, [first_path, second_path])
+            self.assertEqual(worker.archive_tenders, {
+                first_path: first_tenders, second_path: [second_tender],
+            })
+            self.assertEqual(TEDWorker().archives, [])
+
+    @staticmethod
+    def fake_download(path, names):
+        os.makedirs(path, exist_ok=True)
+        file_paths = []
+        for name in names:
+            file_paths.append(os.path.join(path, name))
+            with open(file_paths[-1], 'wb') as f:
+                f.write(name.encode())
+        return file_paths
+
+    def test_ted_download_archives_reuses_stored_archives(self):
+        calendar = TEDReleaseCalendar.objects.create(oj_s=198, date=date(2019, 10, 14))
+        with tempfile.TemporaryDirectory() as files_dir, override_settings(
+            FILES_DIR=files_dir, TED_ARCHIVE_STORE_SIZE=1
+        ):
+            worker = TEDWorker()
+            worker.downloader = MagicMock()
+            worker.downloader.download_all.side_effect = (
+                lambda names: self.fake_download(worker.path, names)
+            )
+            worker.download_archive(calendar)
+            worker.parse_notices()
+            self.assertTrue(os.path.exists(worker.archives[0]))
+
+            worker = TEDWorker()
+            worker.downloader = MagicMock()
+            worker.download_archive(calendar)
+            worker.downloader.download_all.assert_called_once_with([])
+            self.assertEqual(worker.archives, [os.path.join(worker.path, '201900198')])
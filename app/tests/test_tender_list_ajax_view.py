@@ -1,9 +1,12 @@
 import json
 
+from datetime import timedelta
+
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
 
-from app.factories import TenderFactory, KeywordFactory, AwardFactory
+from app.factories import TenderFactory, KeywordFactory, AwardFactory, TagsFactory
 from app.tests.base import BaseTestCase
 
 from django.utils.http import urlencode
@@ -103,3 +106,116 @@ class TendersListAjaxViewTests(BaseTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context), 2)
         self.assertEqual(response.context[0]['tender'], tender2)
+
+    def test_list_ajax_view_query_count(self):
+        KeywordFactory(value='python')
+        other_user = User.objects.create(username='other_user')
+        for i in range(10):
+            tender = TenderFactory(title=f'Tender {i} python')
+            tender.tags.add(TagsFactory(name=f"tag{i}"))
+            tender.followers.add(self.user, other_user)
+            AwardFactory(tender=tender)
+
+        def get_page(length):
+            query_kwargs = {"start": '0', "draw": '1', "length": length}
+            url = '{}?{}'.format(
+                reverse('tenders_list_ajax_view'), urlencode(query_kwargs))
+            return self.client.get(url).json()['data']
+
+        # Session, user, table size estimate, count, page, tags, keywords,
+        # awards, favorites and followers counts
+        with self.assertNumQueries(10):
+            get_page('2')
+        with self.assertNumQueries(10):
+            data = get_page('10')
+
+        self.assertEqual(len(data), 10)
+        self.assertIn('bi-star-fill', data[0]['notice_type'])
+        self.assertIn('<sub>2</sub>', data[0]['notice_type'])
+        self.assertIn('python', data[0]['notice_type'])
+        self.assertEqual(len(data[0]['awards']), 1)
+        self.assertTrue(data[0]['tags'])
+
+    def test_list_ajax_view_status_filter(self):
+        now = timezone.now()
+        awarded = TenderFactory(deadline=now + timedelta(days=3))
+        AwardFactory(tender=awarded)
+        AwardFactory(tender=awarded)
+        expired = TenderFactory(deadline=now - timedelta(days=3))
+        no_deadline = TenderFactory(deadline=None)
+        upcoming = TenderFactory(deadline=now + timedelta(days=3))
+
+        def get_ids(status):
+            query_kwargs = {
+                "start": '0', "draw": '1', "length": '10', "status": status,
+            }
+            url = '{}?{}'.format(
+                reverse('tenders_list_ajax_view'), urlencode(query_kwargs))
+            return sorted(row['id'] for row in self.client.get(url).json()['data'])
+
+        self.assertEqual(get_ids('open'), [no_deadline.id, upcoming.id])
+        with self.assertNumQueries(9):
+            self.assertEqual(get_ids('closed'), [awarded.id, expired.id])
+
+    def test_list_ajax_view_search(self):
+        best = TenderFactory(title='Cloud hosting', organization='Cloud Agency', source='TED')
+        TenderFactory(title='Cloud hosting services', source='UNGM')
+        other = TenderFactory(title='Clouds and hosting of the cloud platform', source='TED')
+        TenderFactory(title='Office supplies', source='TED')
+
+        query_kwargs = {
+            "start": '0', "draw": '1', "length": '10',
+            "search[value]": 'cloud host', "source": 'TED',
+        }
+        url = '{}?{}'.format(
+            reverse('tenders_list_ajax_view'), urlencode(query_kwargs))
+        data = self.client.get(url).json()['data']
+        self.assertEqual([row['id'] for row in data], [best.id, other.id])
+
+    def test_list_ajax_view_next_page_cursor(self):
+        now = timezone.now()
+        for i in range(7):
+            deadline = None if i % 3 == 0 else now + timedelta(days=i % 2)
+            TenderFactory(title=f'Tender {i}', deadline=deadline)
+
+        def get_page(start, cursor=None):
+            query_kwargs = {
+                "start": start, "draw": '1', "length": '3',
+                "order[0][column]": '4', "order[0][dir]": 'desc',
+            }
+            if cursor:
+                query_kwargs['cursor'] = cursor
+            url = '{}?{}'.format(
+                reverse('tenders_list_ajax_view'), urlencode(query_kwargs))
+            return self.client.get(url).json()
+
+        pages = [get_page('0')]
+        for start in ('3', '6'):
+            with self.assertNumQueries(10) as queries:
+                pages.append(get_page(start, pages[-1]['cursor']))
+            self.assertFalse(
+                any('OFFSET' in query['sql'] for query in queries.captured_queries))
+            self.assertEqual(pages[-1]['data'], get_page(start)['data'])
+
+        ids = [row['id'] for page in pages for row in page['data']]
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+        self.assertEqual(pages[-1]['recordsTotal'], 7)
+
+    def test_list_ajax_view_ignores_stale_cursor(self):
+        for i in range(4):
+            TenderFactory(title=f'Tender {i}')
+
+        def get_page(start, cursor=None, **filters):
+            query_kwargs = {"start": start, "draw": '1', "length": '2', **filters}
+            if cursor:
+                query_kwargs['cursor'] = cursor
+            url = '{}?{}'.format(
+                reverse('tenders_list_ajax_view'), urlencode(query_kwargs))
+            return self.client.get(url).json()
+
+        cursor = get_page('0', source='UNGM')['cursor']
+        self.assertEqual(
+            get_page('2', cursor)['data'], get_page('2')['data'])
+        self.assertEqual(
+            get_page('2', 'tampered')['data'], get_page('2')['data'])
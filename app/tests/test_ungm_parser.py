@@ -1,11 +1,18 @@
+import threading
+import time
 from datetime import timedelta, date
+from unittest.mock import MagicMock, patch
 
 from django.conf import settings
 from django.utils.datetime_safe import datetime
 from django.utils.timezone import make_aware
 
-from app.models import UNSPSCCode
+from app.factories import UNSPCCodeFactory
+from app.models import Tender
 from app.parsers.ungm import UNGMWorker
+from app.parsers.ungm_fetcher import UNGMFetcher
+from app.reference_data import ReferenceData, override_reference_data, reference_data
+from app.server_requests import PAYLOAD, TENDERS_ENDPOINT_URI, UNGMrequester
 from app.management.commands.add_award import Command
 from app.tests.base import BaseTestCase
 
@@ -17,7 +24,7 @@ class UngmParserTestCase(BaseTestCase):
         self.worker = UNGMWorker()
         self.award = Command()
         self.url = 'wwww.parser_test.com'
-        self.unspsc_codes = UNSPSCCode.objects.all()
+        self.registry = reference_data()
 
         expected_deadline = make_aware(datetime.strptime('15-Sep-2019 16:45', '%d-%b-%Y %H:%M'))
         time_now = datetime.now()
@@ -32,7 +39,7 @@ class UngmParserTestCase(BaseTestCase):
             html_string = f.read()
 
         tender = self.worker.parse_ungm_notice(html_string, self.url,
-                                               self.unspsc_codes)
+                                               self.registry)
 
         expected_published = datetime.strptime('04-Sep-2019', '%d-%b-%Y').date()
         self.assertEqual(tender['tender']['reference'], 'LRFQ-2019-9151917')
@@ -71,7 +78,7 @@ class UngmParserTestCase(BaseTestCase):
         with open('app/tests/parser_files/ungm_notice_all_empty.html', 'r') as f:
             html_string = f.read()
         tender = self.worker.parse_ungm_notice(html_string, self.url,
-                                               self.unspsc_codes)
+                                               self.registry)
 
         self.assertEqual(tender['tender']['title'], '')
         self.assertEqual(tender['tender']['source'], 'UNGM')
@@ -83,7 +90,7 @@ class UngmParserTestCase(BaseTestCase):
         with open('app/tests/parser_files/ungm_notice_date.html', 'r') as f:
             html_string = f.read()
         tender = self.worker.parse_ungm_notice(html_string, self.url,
-                                               self.unspsc_codes)
+                                               self.registry)
 
         self.assertEqual(tender['tender']['published'], date.today())
         self.assertEqual(tender['tender']['deadline'], None)
@@ -116,3 +123,116 @@ class UngmParserTestCase(BaseTestCase):
 
         award = self.award.parse_award(html_string)
         self.assertEqual(award['award_date'], datetime.now().date())
+
+    def test_ungm_parsed_tenders_fetched_concurrently(self):
+        with open('app/tests/parser_files/base_ungm_notice.html', 'r') as f:
+            html_string = f.read()
+        UNSPCCodeFactory()
+        self.worker.fetcher = UNGMFetcher(workers=4, per_host=2, rate=1000, burst=10)
+        self.worker.fetcher.session = MagicMock()
+        lock = threading.Lock()
+        running = []
+        concurrency = []
+
+        def get(url, **kwargs):
+            with lock:
+                running.append(url)
+                concurrency.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(url)
+            response = MagicMock(content=html_string, headers={})
+            response.status_code = 404 if url.endswith('missing') else 200
+            return response
+
+        self.worker.fetcher.session.get.side_effect = get
+        urls = [f'https://www.ungm.org/Public/Notice/{i}' for i in range(6)]
+        tenders = [
+            {'url': url, 'reference': ''}
+            for url in urls + [urls[0], 'https://www.ungm.org/missing']
+        ]
+
+        parsed = list(self.worker.parsed_tenders(tenders))
+
+        self.assertEqual(sorted(tender['tender']['url'] for tender in parsed), urls)
+        self.assertEqual(self.worker.fetcher.session.get.call_count, 7)
+        self.assertEqual(max(concurrency), 2)
+
+    def test_ungm_search_cookies_reused(self):
+        requester = UNGMrequester()
+        requester.session = MagicMock()
+        requester.session.post.return_value = MagicMock(status_code=200, content='page')
+        payload = dict(PAYLOAD['tenders'])
+
+        for index in range(3):
+            self.assertEqual(requester.request_tenders_list('01-Sep-2019', index), 'page')
+
+        requester.session.get.assert_called_once_with(
+            TENDERS_ENDPOINT_URI, timeout=requester.timeout)
+        self.assertEqual(requester.session.post.call_count, 3)
+        self.assertEqual(PAYLOAD['tenders'], payload)
+
+        requester.session.post.side_effect = [
+            MagicMock(status_code=403), MagicMock(status_code=200, content='page'),
+        ]
+        self.assertEqual(requester.request_tenders_list('01-Sep-2019', 3), 'page')
+        self.assertEqual(requester.session.get.call_count, 2)
+
+    def test_ungm_unchanged_pages_skipped(self):
+        UNSPCCodeFactory()
+        pages = {}
+        for name, headers in (('base_ungm_notice', {}), ('94909', {'ETag': '"v1"'})):
+            with open(f'app/tests/parser_files/{name}.html', 'r') as f:
+                pages[f'https://www.ungm.org/Public/Notice/{name}'] = (f.read(), headers)
+
+        def get(url, headers=None, **kwargs):
+            if url not in pages:
+                # A document
+                return MagicMock(status_code=404)
+            content, response_headers = pages[url]
+            if headers and headers.get('If-None-Match') == response_headers.get('ETag'):
+                return MagicMock(status_code=304, headers=response_headers)
+            return MagicMock(status_code=200, content=content, headers=response_headers)
+
+        def worker():
+            worker = UNGMWorker()
+            worker.fetcher.session = MagicMock()
+            worker.fetcher.session.get.side_effect = get
+            return worker
+
+        first = worker()
+        first.parse_tenders([{'url': url, 'reference': ''} for url in pages])
+        self.assertEqual(first.fetcher.stats['changed'], 2)
+        self.assertEqual(
+            Tender.objects.get(reference='RFQ 47-2019').page_fingerprint, 'etag:"v1"')
+        self.assertTrue(
+            Tender.objects.get(reference='LRFQ-2019-9151917').page_fingerprint.startswith('sha256:'))
+
+        second = worker()
+        with patch.object(UNGMWorker, 'parse_ungm_notice') as parse:
+            changed_tenders, _ = second.parse_tenders(Tender.objects.all())
+        parse.assert_not_called()
+        self.assertEqual(changed_tenders, [])
+        self.assertEqual(second.fetcher.stats['unchanged'], 2)
+        self.assertIn('2 unchanged and skipped', second.fetch_summary())
+
+    def test_ungm_unspsc_codes_from_reference_data(self):
+        with open('app/tests/parser_files/base_ungm_notice.html', 'r') as f:
+            html_string = f.read()
+        reference = ReferenceData(unspsc_codes=[
+            ('43232003', '43232003'), ('49221511', '49221511'), ('10101501', '10101501'),
+        ])
+
+        with override_reference_data(reference):
+            tender = self.worker.parse_ungm_notice(html_string, self.url)
+
+        self.assertEqual(tender['tender']['unspsc_codes'], '43232003, 49221511')
+
+    def test_reference_data_reloaded_when_changed(self):
+        first = reference_data()
+        self.assertIs(reference_data(), first)
+
+        code = UNSPCCodeFactory()
+
+        self.assertIn(code.id, reference_data().unspsc_ids)
+        self.assertNotIn(code.id, first.unspsc_ids)
@@ -51,3 +51,14 @@ class VendorsListAjaxViewTests(BaseTestCase):
         self.assertEqual(data[1]['name'], vendor4.name)
 
 
+
+    def test_list_ajax_view_search(self):
+        vendor = VendorFactory(name='Acme Consulting', contact_name='Jane Doe')
+        VendorFactory(name='Other vendor', contact_name='John')
+
+        query_kwargs = {
+            "start": '0', "draw": '1', "length": '10', "search[value]": 'acme',
+        }
+        url = '{}?{}'.format(reverse('vendors_list_ajax_view'), urlencode(query_kwargs))
+        data = json.loads(self.client.get(url).content)['data']
+        self.assertEqual([row['name'] for row in data], [vendor.name])
@@ -132,3 +132,23 @@ class AwardsListAjaxViewTests(BaseTestCase):
         self.assertEqual(data[0]['organization'], award2.tender.organization)
         self.assertEqual(data[0]['value'], str(award2.value))
         self.assertEqual(data[0]['currency'], award2.currency)
+
+    def test_list_ajax_view_search(self):
+        tender_award = AwardFactory(tender=TenderFactory(title='Cloud hosting'))
+        vendor_award = AwardFactory()
+        vendor_award.vendors.add(
+            VendorFactory(name='Cloud Solutions'), VendorFactory(name='Cloud Corp'))
+        AwardFactory()
+
+        query_kwargs = {
+            "start": '0', "draw": '1', "length": '10', "search[value]": 'cloud',
+        }
+        url = '{}?{}'.format(reverse('contract_awards_list_ajax_view'), urlencode(query_kwargs))
+        data = json.loads(self.client.get(url).content)['data']
+        self.assertEqual(
+            [row['url'] for row in data],
+            [
+                reverse('contract_awards_detail_view', kwargs={'pk': pk})
+                for pk in (tender_award.id, vendor_award.id)
+            ],
+        )
@@ -24,6 +24,7 @@ from .views import (
     VendorsListAjaxView,
     VendorDetailView,
     VendorUpdateView,
+    FacetAjaxView,
 )
 
 urlpatterns = [
@@ -66,5 +67,7 @@ urlpatterns = [
     path('management/delete/<str:pk>', ManagementDeleteView.as_view(),
          name='management_delete_view'),
     path('tasks/ajax', TaskListAjaxView.as_view(), name='task_list_ajax_view'),
+    path('facets/<str:name>/ajax', FacetAjaxView.as_view(),
+         name='facet_ajax_view'),
     path('admin_page', RedirectView.as_view(url='/admin'), name='admin_view')
 ]
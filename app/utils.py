@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import string
 
@@ -92,3 +93,11 @@ def transform_vendor_name(vendor_name):
     vendor_name = vendor_name.translate(str.maketrans('', '', string.punctuation))
 
     return vendor_name
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
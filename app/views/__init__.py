@@ -3,3 +3,4 @@ from .management import *
 from .tenders import *
 from .awards import *
 from .vendors import *
+from .facets import *
@@ -1,5 +1,4 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
 from django.db.models.functions import Lower
 from django.template.defaultfilters import floatformat
 from django.template.loader import render_to_string
@@ -77,11 +76,7 @@ class ContractAwardsListAjaxView(BaseAjaxListingView):
 
         search = request.GET.get("search[value]")
         if search:
-            awards = Award.objects.filter(
-                Q(tender__title__icontains=search) |
-                Q(tender__organization__icontains=search) |
-                Q(vendors__name__icontains=search)
-            )
+            awards = awards.search(search)
 
         value = self.request.GET.get("value")
         if value:
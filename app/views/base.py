@@ -1,17 +1,35 @@
+import hashlib
 import json
 
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Q
 from django.db.models.functions import Lower
 from django.http import HttpResponse
 from django.views.generic import View
 
+CURSOR_SALT = 'listing-cursor'
+
 
 class BaseAjaxListingView(View):
+    """
+    Server side processing for DataTables.
+
+    Every response includes a `cursor` for the next page, which the tables
+    send back (see scratch_datatables.js), so the next page is fetched by
+    seeking past the last row of the current one instead of with an OFFSET.
+    Other pages fall back to an OFFSET.
+    """
     filter_names = []
     order_fields = ['id']
     case_sensitive_fields = []
     model = None
+    # (ordered by `ordering_key`, descending), set by `order_data` when the
+    # objects are in an order which can be seeked
+    seek_order = None
 
     def get(self, request):
         objects = self.get_data(request)
@@ -27,15 +45,30 @@ class BaseAjaxListingView(View):
         return self.model.objects.order_by('id')
 
     def order_data(self, request, objects):
+        """
+        Order by the requested column, keeping the order of the filtered
+        objects (e.g. search results ranked by relevance) otherwise.
+
+        The requested column is annotated as `ordering_key` and the id breaks
+        the ties, which keeps the order stable for seeking.
+        """
         field = request.GET.get('order[0][column]')
         sort_type = request.GET.get('order[0][dir]')
         if field and sort_type:
             field_name = self.order_fields[int(field)]
+            if field_name is None:
+                return objects
             if field_name in self.case_sensitive_fields:
-                field_name = Lower(field_name)
-            objects = objects.order_by(field_name)
+                key = Lower(field_name)
+            else:
+                key = F(field_name)
+            objects = objects.annotate(ordering_key=key)
+            self.seek_order = (True, sort_type == 'desc')
             if sort_type == 'desc':
-                return objects.reverse()
+                return objects.order_by(F('ordering_key').desc(), '-id')
+            return objects.order_by('ordering_key', 'id')
+        if objects.query.order_by == ('id',):
+            self.seek_order = (False, False)
         return objects
 
     def filter_data(self, request):
@@ -56,6 +89,58 @@ class BaseAjaxListingView(View):
         objects = objects.filter(**filters)
         return objects
 
+    @staticmethod
+    def seek(objects, cursor, has_key, desc):
+        """
+        Filter the objects coming after the cursor row, in the order set by
+        `order_data`. Nulls come last in ascending order and first in
+        descending order.
+        """
+        last_id = cursor['id']
+        after_id = Q(id__lt=last_id) if desc else Q(id__gt=last_id)
+        if not has_key:
+            return objects.filter(after_id)
+
+        value = cursor['key']
+        if value is None:
+            after = Q(ordering_key__isnull=True) & after_id
+            if desc:
+                after |= Q(ordering_key__isnull=False)
+        else:
+            lookup = 'ordering_key__lt' if desc else 'ordering_key__gt'
+            after = Q(**{lookup: value}) | (Q(ordering_key=value) & after_id)
+            if not desc:
+                after |= Q(ordering_key__isnull=True)
+        return objects.filter(after)
+
+    @staticmethod
+    def query_digest(objects):
+        return hashlib.md5(str(objects.query).encode()).hexdigest()
+
+    def count_data(self, objects):
+        """
+        Return the number of objects: the planner estimate for big unfiltered
+        tables and an exact count otherwise, cached for a short while when
+        filtered.
+        """
+        if not objects.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(objects.model._meta.db_table)]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= settings.LISTING_COUNT_ESTIMATE_MIN:
+                return int(row[0])
+            return objects.count()
+
+        key = f'listing_count_{self.query_digest(objects)}'
+        count = cache.get(key)
+        if count is None:
+            count = objects.count()
+            cache.set(key, count, settings.LISTING_COUNT_CACHE_TTL)
+        return count
+
     def get_data(self, request):
 
         length = int(request.GET.get('length'))
@@ -63,19 +148,42 @@ class BaseAjaxListingView(View):
         draw = int(request.GET.get("draw"))
 
         objects = self.filter_data(request)
-        objects = self.order_data(request, objects)
-        objects_count = objects.count()
+        objects_count = self.count_data(objects)
         objects_filtered_count = objects_count
 
-        paginator = Paginator(objects, length)
-        page_number = start / length + 1
-
-        try:
-            object_list = paginator.page(page_number).object_list
-        except PageNotAnInteger:
-            object_list = paginator.page(1).object_list
-        except EmptyPage:
-            object_list = paginator.page(1).object_list
+        objects = self.order_data(request, objects)
+        digest = self.query_digest(objects)
+        seek_order = self.seek_order
+        cursor = None
+        if start and seek_order and request.GET.get('cursor'):
+            try:
+                cursor = signing.loads(request.GET['cursor'], salt=CURSOR_SALT)
+            except signing.BadSignature:
+                pass
+        if cursor and cursor['start'] == start and cursor['query'] == digest:
+            object_list = list(self.seek(objects, cursor, *seek_order)[:length])
+        else:
+            # Same as the Paginator: the first page for a start which is not
+            # a page start or is past the last page
+            if start % length:
+                start = 0
+            object_list = list(objects[start:start + length])
+            if not object_list and start:
+                start = 0
+                object_list = list(objects[:length])
+
+        next_cursor = None
+        if seek_order and object_list:
+            last = object_list[-1]
+            key = getattr(last, 'ordering_key', None) if seek_order[0] else None
+            if hasattr(key, 'isoformat'):
+                key = key.isoformat()
+            next_cursor = signing.dumps({
+                'start': start + len(object_list),
+                'query': digest,
+                'key': key,
+                'id': last.id,
+            }, salt=CURSOR_SALT)
 
         data = self.format_data(object_list)
 
@@ -84,4 +192,5 @@ class BaseAjaxListingView(View):
             'recordsTotal': objects_count,
             'recordsFiltered': objects_filtered_count,
             'data': data,
+            'cursor': next_cursor,
         }
@@ -0,0 +1,34 @@
+import json
+
+from django.http import Http404, HttpResponse
+from django.views.generic import View
+
+from app.facets import FACETS, LOOKUP_LIMIT, facet_lookup
+
+
+class FacetAjaxView(View):
+    """
+    Options of a filter starting with the typed prefix, in the format of the
+    select2 ajax data source.
+    """
+
+    def get(self, request, name):
+        if name not in FACETS:
+            raise Http404(f'Unknown facet {name}')
+
+        term = request.GET.get('term', '')
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        options, more = facet_lookup(
+            name, term, limit=LOOKUP_LIMIT, offset=(page - 1) * LOOKUP_LIMIT)
+
+        data = {
+            'results': [
+                {'id': value, 'text': value, 'count': count}
+                for value, count in options
+            ],
+            'pagination': {'more': more},
+        }
+        return HttpResponse(json.dumps(data), content_type='application/json')
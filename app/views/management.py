@@ -1,5 +1,5 @@
 import logging
-from datetime import timezone, datetime, date, timedelta
+from datetime import datetime
 
 from django.conf import settings
 from django.contrib.auth import (
@@ -24,9 +24,11 @@ from django_q.tasks import async_task
 from django_q.models import Success, Failure
 
 from app.forms import SearchForm
+from app.indexing import index_queue_status
 from app.models import (
-    CPVCode, UNSPSCCode, Task, Tender, Award, WorkerLog
+    CPVCode, UNSPSCCode, Task, WorkerLog
 )
+from app.stats import homepage_stats
 from app.utils import emails_to_notify, dt_to_json
 from app.views.base import BaseAjaxListingView
 
@@ -44,44 +46,11 @@ class HomepageView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        today = date.today()
-        now = datetime.now(timezone.utc)
-        deadline_gte = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        deadline_lt = now.replace(
-            hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-
-        context["ungm_tenders"] = Tender.objects.filter(source="UNGM").count()
-        context["iucn_tenders"] = Tender.objects.filter(source="IUCN").count()
-        context["ted_tenders"] = Tender.objects.filter(source="TED").count()
+        context.update(homepage_stats())
         if self.request.user.is_authenticated:
             context["favorite_tenders"] = self.request.user.favorite_tenders.count()
         else:
             context["favorite_tenders"] = 0
-        context["keyword_tenders"] = Tender.objects.filter(
-            has_keywords=True
-        ).count()
-        context["awards"] = Award.objects.all().count()
-        context["expired_tenders"] = Tender.objects.filter(
-            deadline__lt=datetime.now(timezone.utc)
-        ).count()
-        context["ungm_published_today"] = Tender.objects.filter(
-            published__exact=today, source="UNGM"
-        ).count()
-        context["iucn_published_today"] = Tender.objects.filter(
-            published__exact=today, source="IUCN"
-        ).count()
-        context["ted_published_today"] = Tender.objects.filter(
-            published__exact=today, source="TED"
-        ).count()
-        context["ungm_deadline_today"] = Tender.objects.filter(
-            deadline__gte=deadline_gte, deadline__lt=deadline_lt, source="UNGM"
-        ).count()
-        context["iucn_deadline_today"] = Tender.objects.filter(
-            deadline__gte=deadline_gte, deadline__lt=deadline_lt, source="IUCN"
-        ).count()
-        context["ted_deadline_today"] = Tender.objects.filter(
-            deadline__gte=deadline_gte, deadline__lt=deadline_lt, source="TED"
-        ).count()
 
         return context
 
@@ -218,6 +187,7 @@ class OverviewPageView(LoginRequiredMixin, TemplateView):
         context["deadline_notifications"] = settings.DEADLINE_NOTIFICATIONS
         context["emails"] = emails_to_notify()
         context["worker_logs"] = WorkerLog.objects.order_by('-update')
+        context["index_queue"] = index_queue_status()
         context["unspscs_codes"] = UNSPSCCode.objects.all()
         context["cpv_codes"] = CPVCode.objects.all()
 
@@ -1,23 +1,23 @@
 import json
-import re
 
 from datetime import timezone, datetime, date
 
 from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
-from django.template.loader import render_to_string
-from django.db.models import Q, Exists, OuterRef
+from django.template.loader import get_template
+from django.db.models import (
+    Count, Exists, OuterRef, Prefetch, prefetch_related_objects
+)
 from django.views.generic.detail import DetailView
 from django.views.generic.list import ListView
 from django.views.generic import TemplateView, View
 from django.urls import reverse
-from elasticsearch_dsl import Q as elasticQ
 
-from app.documents import TenderDoc, TenderDocumentDoc, AwardDoc
 from app.forms import TendersFilter
 from app.models import Tender, TenderDocument, Award, Tag, Favorite
 from app.notifications import send_new_tender_follower_email
+from app.search import SECTIONS, decode_position, search
 from app.views.base import BaseAjaxListingView
 
 
@@ -112,8 +112,27 @@ class TenderListAjaxView(BaseAjaxListingView):
     model = Tender
 
     def format_data(self, object_list):
-        data = [
-            {
+        tenders = list(object_list)
+        prefetch_related_objects(
+            tenders, 'tags', 'keywords',
+            Prefetch('awards', queryset=Award.objects.only('id', 'tender_id')),
+        )
+        favorite_ids = set(
+            Favorite.objects.filter(
+                tender__in=tenders, follower_id=self.request.user.id
+            ).values_list('tender_id', flat=True)
+        )
+        followers_counts = dict(
+            Favorite.objects.filter(tender__in=tenders)
+            .values('tender_id').annotate(count=Count('id'))
+            .values_list('tender_id', 'count')
+        )
+        buttons_template = get_template('tenders_buttons.html')
+
+        data = []
+        for tender in tenders:
+            tender.followers_count = followers_counts.get(tender.id, 0)
+            data.append({
                 'id': tender.id,
                 'title': tender.marked_keyword_title,
                 'url': reverse('tender_detail_view', kwargs={'pk': tender.id}),
@@ -123,19 +142,14 @@ class TenderListAjaxView(BaseAjaxListingView):
                     tender.deadline.strftime("%d/%m/%Y, %H:%M")),
                 'published': 'Not specified' if not tender.published else (
                     tender.published.strftime("%d/%m/%Y")),
-                'notice_type': render_to_string(
-                    'tenders_buttons.html', {
-                        'tender': tender,
-                        'include_notice_type': True,
-                        'tender_is_user_favorite': tender.is_favorite_of(self.request.user)
-                    }
-                ),
-                'tags': ', '.join(tender.tags.values_list('name', flat=True)),
-                'awards': [reverse('contract_awards_detail_view', kwargs={'pk': pk}) for pk in tender.awards.values_list("id", flat=True)]
-
-
-            } for tender in object_list
-        ]
+                'notice_type': buttons_template.render({
+                    'tender': tender,
+                    'include_notice_type': True,
+                    'tender_is_user_favorite': tender.id in favorite_ids,
+                }),
+                'tags': ', '.join(tag.name for tag in tender.tags.all()),
+                'awards': [reverse('contract_awards_detail_view', kwargs={'pk': award.id}) for award in tender.awards.all()]
+            })
         return data
 
     def filter_data(self, request):
@@ -150,23 +164,15 @@ class TenderListAjaxView(BaseAjaxListingView):
 
         search = request.GET.get("search[value]")
         if search:
-            tenders = Tender.objects.filter(
-                Q(title__icontains=search) |
-                Q(organization__icontains=search) |
-                Q(notice_type=search)
-            )
+            tenders = tenders.search(search)
 
         status = self.request.GET.get("status")
 
         if status:
-            awards = Award.objects.all()
-            award_refs = [award.tender.reference for award in awards]
             if status == "open":
-                tenders = tenders.exclude(
-                    Q(reference__in=award_refs) | Q(deadline__lt=date.today()))
+                tenders = tenders.open()
             else:
-                tenders = tenders.filter(
-                    Q(reference__in=award_refs) | Q(deadline__lt=date.today()))
+                tenders = tenders.closed()
 
         seen = self.request.GET.get("seen")
         if seen:
@@ -296,10 +302,7 @@ class TenderArchiveView(TendersListView):
 class TenderArchiveAjaxView(TenderListAjaxView):
 
     def get_objects(self):
-        current_time = datetime.now(timezone.utc)
-        tenders = Tender.objects.filter(
-            deadline__lt=current_time, deadline__isnull=False)
-        return tenders
+        return Tender.objects.expired()
 
 
 class SearchView(LoginRequiredMixin, TemplateView):
@@ -307,93 +310,37 @@ class SearchView(LoginRequiredMixin, TemplateView):
     login_url = "/login"
     redirect_field_name = "login_view"
 
-    @staticmethod
-    def update_fields(context, fields, regex):
-        for entry in context:
-            for item in fields:
-                field = getattr(entry, item)
-                setattr(entry, item, regex.sub(r'<mark>\1</mark>', field))
-
-    @staticmethod
-    def update_award_fields(context, regex):
-        for entry in context:
-            entry["award"].tender.title = regex.sub(
-                r'<mark>\1</mark>', entry["award"].tender.title)
-            entry["award_vendors"] = regex.sub(
-                r'<mark>\1</mark>', entry["award_vendors"])
-            entry["award"].currency = regex.sub(
-                r'<mark>\1</mark>', entry["award"].currency)
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        response['Server-Timing'] = self.timer.server_timing()
+        return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        pk = self.kwargs['pk'].replace('+', '|')
-
-        # Find the tenders that have documents containing the input string
-        result_tender_documents = TenderDocumentDoc.search().query(
-            elasticQ(
-                "multi_match",
-                query=pk,
-                fields=[
-                    'name',
-                    'content',
-                ]
-            )
-        )
-        tender_references = [
-            o.reference
-            for o in result_tender_documents if o.reference is not None
-        ]
-
-        # Find the tenders that match the input string and the tender ids of
-        # the tender documents
-        result_tenders = TenderDoc.search().query(
-            elasticQ(
-                "multi_match",
-                query=pk,
-                fields=[
-                    'title',
-                    'organization',
-                    'source',
-                    'reference',
-                    'unspsc_codes',
-                    'cpv_codes',
-                    'description',
-                ]
-            )
-            |
-            elasticQ(
-                "terms",
-                reference=tender_references,
-            )
-        )
-
-        result_awards = AwardDoc.search().query(
-            elasticQ(
-                "multi_match",
-                query=pk,
-                fields=[
-                    'vendors_name',
-                    'tender_title',
-                    'currency',
-                    'value',
-                ]
-            )
-        )
-        context['tenders'] = result_tenders.to_queryset()
-        context['awards'] = [
-            {
-                "award": award,
-                "award_vendors": award.get_vendors
-            } for award in result_awards.to_queryset()
-        ]
-
-        regex = re.compile(rf'(\b({pk})\b(\s*({pk})\b)*)', re.I)
-
-        tender_fields = ['title', 'description']
-
-        SearchView.update_fields(context['tenders'], tender_fields, regex)
-        SearchView.update_award_fields(context['awards'], regex)
-
+        terms = self.kwargs['pk'].replace('+', ' ')
+
+        positions = {}
+        for section in SECTIONS:
+            position = decode_position(
+                self.request.GET.get(f'{section.name}_after'))
+            if position:
+                positions[section.name] = position
+
+        results, self.timer = search(terms, positions)
+        for name, section_results in results.items():
+            query = self.request.GET.copy()
+            if section_results['next']:
+                query[f'{name}_after'] = section_results['next']
+                section_results['next_url'] = '?' + query.urlencode()
+            if name in positions:
+                query.pop(f'{name}_after', None)
+                section_results['first_url'] = '?' + query.urlencode()
+
+        context['terms'] = terms
+        context['tenders'] = results['tenders']
+        context['documents'] = results['documents']
+        context['awards'] = results['awards']
+        context['timings'] = self.timer.timings
         return context
 
 
@@ -1,5 +1,4 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
 from django.urls import reverse
 from django.views.generic import DetailView, UpdateView
 from django.views.generic.list import ListView
@@ -39,10 +38,7 @@ class VendorsListAjaxView(BaseAjaxListingView):
 
         search = request.GET.get("search[value]")
         if search:
-            vendors = Vendor.objects.filter(
-                Q(name__icontains=search) |
-                Q(contact_name__icontains=search)
-            )
+            vendors = vendors.search(search)
 
         value = self.request.GET.get("value")
         if value:
@@ -104,6 +104,20 @@ ELASTICSEARCH_DSL = {
         "http_auth": env("ELASTICSEARCH_AUTH"),
     },
 }
+# Queue the changed objects and index them in bulk in the django-q workers,
+# see app/indexing.py
+ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = "app.indexing.QueuedSignalProcessor"
+# Seconds between a change and the indexing, also the backoff of the first
+# retry of an object failing to index
+INDEX_QUEUE_DELAY = int(env("INDEX_QUEUE_DELAY", 10))
+INDEX_QUEUE_BATCH_SIZE = int(env("INDEX_QUEUE_BATCH_SIZE", 500))
+INDEX_QUEUE_MAX_ATTEMPTS = int(env("INDEX_QUEUE_MAX_ATTEMPTS", 10))
+# Parallel bulk requests and objects per request of the rebuild_indices
+# command, see app/index_rebuild.py
+INDEX_REBUILD_THREADS = int(env("INDEX_REBUILD_THREADS", 4))
+INDEX_REBUILD_CHUNK_SIZE = int(env("INDEX_REBUILD_CHUNK_SIZE", 500))
+# Results of each kind on a page of the search results
+SEARCH_PAGE_SIZE = int(env("SEARCH_PAGE_SIZE", 20))
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,6 +148,31 @@ Q_CLUSTER = {
     },
 }
 
+# Shared by all the processes, for the cached data they invalidate together
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://{}:{}/1".format(
+            env("REDIS_HOST", "redis"), env("REDIS_PORT", 6379)
+        ),
+    }
+}
+
+# LISTINGS
+# Unfiltered listings of tables with at least this many rows show the row
+# count estimated by Postgres instead of counting them
+LISTING_COUNT_ESTIMATE_MIN = int(env("LISTING_COUNT_ESTIMATE_MIN", 100000))
+# Seconds to cache the row count of a filtered listing
+LISTING_COUNT_CACHE_TTL = int(env("LISTING_COUNT_CACHE_TTL", 60))
+
+# HOMEPAGE
+# Seconds to cache the tender counts shown on the homepage
+HOMEPAGE_STATS_TTL = int(env("HOMEPAGE_STATS_TTL", 60))
+
+# FILTERS
+# Seconds to cache the option lists of the listing filters
+FACETS_CACHE_TTL = int(env("FACETS_CACHE_TTL", 3600))
+
 # EMAIL
 EMAIL_BACKEND = env("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
 EMAIL_HOST = env("EMAIL_HOST", "smtp")
@@ -141,6 +180,17 @@ EMAIL_PORT = env("EMAIL_PORT", 25)
 
 # UNGM
 UNGM_ENDPOINT_URI = env("UNGM_ENDPOINT_URI", "https://www.ungm.org")
+# Threads fetching the notice pages, the requests made at once to a host, and
+# the requests per second (with bursts of UNGM_FETCH_BURST requests) they are
+# allowed to make to it
+UNGM_FETCH_WORKERS = int(env("UNGM_FETCH_WORKERS", 8))
+UNGM_FETCH_PER_HOST = int(env("UNGM_FETCH_PER_HOST", 4))
+UNGM_FETCH_RATE = float(env("UNGM_FETCH_RATE", 4))
+UNGM_FETCH_BURST = int(env("UNGM_FETCH_BURST", 4))
+UNGM_FETCH_TIMEOUT = int(env("UNGM_FETCH_TIMEOUT", 30))
+# Seconds the cookies of the UNGM searches are reused before they are
+# requested again
+UNGM_COOKIES_TTL = int(env("UNGM_COOKIES_TTL", 1800))
 
 # TED
 TED_URL = env("TED_URL", "ted.europa.eu")
@@ -152,6 +202,15 @@ TED_DAYS_AGO = env("TED_DAYS_AGO", 3)
 instance_dir = os.path.abspath(os.path.dirname(__file__))
 FILES_DIR = os.path.join(instance_dir, "files")
 
+# DOCUMENTS
+# Threads extracting the text of the documents in the extract_documents command
+DOCUMENT_EXTRACTION_WORKERS = int(env("DOCUMENT_EXTRACTION_WORKERS", 4))
+
+# KEYWORDS
+# Seconds to wait after a keyword edit before matching the tenders again, so
+# a burst of edits is handled by one reindex
+KEYWORD_REINDEX_DELAY = int(env("KEYWORD_REINDEX_DELAY", 60))
+
 # DEADLINE
 DEADLINE_NOTIFICATIONS = env("DEADLINE_NOTIFICATIONS", (1, 3, 7))
 
@@ -161,6 +220,21 @@ RENEWAL_NOTIFICATIONS = env("RENEWAL_NOTIFICATIONS", 4)
 # TED
 TED_DOC_TYPES = env("TED_DOC_TYPES", [])
 TED_AUTH_TYPE = env("TED_AUTH_TYPE", "")
+# Engine used to parse TED notices: "lxml" or "bs4" (BeautifulSoup)
+TED_PARSER_ENGINE = env("TED_PARSER_ENGINE", "lxml")
+# Number of processes parsing TED notices, 1 parses them in the main process.
+# The Django-Q workers, which cannot start processes, always use 1.
+TED_PARSER_WORKERS = int(env("TED_PARSER_WORKERS", 1))
+# Days after which a renewal date lookup that found nothing is retried
+TED_RENEWAL_LOOKUP_TTL = int(env("TED_RENEWAL_LOOKUP_TTL", 7))
+# Concurrent archive downloads, and the requests per second (with bursts of
+# TED_DOWNLOAD_BURST requests) they are allowed to make to the TED server
+TED_DOWNLOAD_WORKERS = int(env("TED_DOWNLOAD_WORKERS", 4))
+TED_DOWNLOAD_RATE = float(env("TED_DOWNLOAD_RATE", 0.5))
+TED_DOWNLOAD_BURST = int(env("TED_DOWNLOAD_BURST", 2))
+TED_DOWNLOAD_TIMEOUT = int(env("TED_DOWNLOAD_TIMEOUT", 60))
+# Size in MB of the downloaded archives kept for reuse, 0 keeps none
+TED_ARCHIVE_STORE_SIZE = int(env("TED_ARCHIVE_STORE_SIZE", 2048))
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -257,12 +331,16 @@ RUNNABLE_COMMANDS = [
     "add_award",
     "deadline_notifications",
     "delete_expired_tenders",
+    "extract_documents",
+    "index_queue",
     "notify_awards",
     "notify_favorites",
     "notify_keywords",
     "notify_renewal",
     "notify_tenders",
+    "rebuild_indices",
     "remove_unnecessary_newlines",
+    "ted_archives",
     "update_ted",
     "update_ungm",
     "update_iucn",
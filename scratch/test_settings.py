@@ -20,3 +20,10 @@ if 'TRAVIS' in os.environ:
             'http_auth': env('ELASTICSEARCH_TEST_AUTH'),
         },
     }
+
+# The tests run without Redis, each test process has its own cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}